@@ -0,0 +1,942 @@
+import itertools
+import os
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+import instrument
+from search import NameIndex
+from similarity import ProfileIndex
+from winprob import WinProbability
+
+# Precomputed tables are attached to the deliveries frame they were built from
+# (keyed by identity, dropped when the frame is garbage collected), so every
+# analysis call on the same loaded dataset shares one copy.
+_lock = threading.RLock()
+_store = {}
+_builders = {}
+_mergers = {}
+_engine_builders = {}
+
+# Engine that builds the deliveries-level tables. Anything but pandas is an
+# optional dependency; when it is not installed the pandas builders are used.
+ENGINES = ('pandas', 'duckdb', 'polars')
+_engine = os.getenv('IPL_ENGINE', 'pandas')
+
+
+def register(name, merge=None):
+    """
+    Decorator registering a builder ``fn(df) -> table`` under ``name``.
+
+    ``merge(old_table, delta, combined)``, when given, updates the table built
+    for a frame with the rows of ``delta`` appended (see ``extend``) without
+    rebuilding it from every delivery.
+    """
+    def wrap(fn):
+        _builders[name] = fn
+        if merge is not None:
+            _mergers[name] = merge
+        return fn
+    return wrap
+
+
+def register_engine(engine, name):
+    """Decorator registering ``fn(df) -> table`` as ``engine``'s builder for the ``name`` table."""
+    def wrap(fn):
+        _engine_builders[engine, name] = fn
+        return fn
+    return wrap
+
+
+def engine():
+    return _engine
+
+
+def set_engine(name):
+    """
+    Build tables with ``name`` (one of ``ENGINES``) from now on.
+
+    Tables already built are kept: every engine produces the same tables.
+    """
+    global _engine
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine {name!r}; expected one of {', '.join(ENGINES)}")
+    _engine = name
+
+
+def _builder(name):
+    if _engine != 'pandas':
+        import engines
+        if engines.available(_engine):
+            return _engine_builders.get((_engine, name), _builders[name])
+    return _builders[name]
+
+
+def _tables(df):
+    key = id(df)
+    entry = _store.get(key)
+    if entry is None or entry[0]() is not df:
+        ref = weakref.ref(df, lambda _, key=key: _store.pop(key, None))
+        entry = (ref, {})
+        _store[key] = entry
+    return entry[1]
+
+
+def get(df, name):
+    """Return the ``name`` table for ``df``, building it on first use."""
+    tables = _tables(df)
+    if name not in tables:
+        with _lock:
+            if name not in tables:
+                instrument.note(rows=len(df))
+                tables[name] = _builder(name)(df)
+    table = tables[name]
+    if isinstance(table, pd.DataFrame):
+        instrument.note(rows=len(table))
+    return table
+
+
+def built(df, name):
+    """True if the ``name`` table for ``df`` already exists (built, merged or attached with ``put``)."""
+    return name in _tables(df)
+
+
+_versions = itertools.count(1)
+
+
+def version(df):
+    """Token identifying the contents of ``df``, used to key result caches."""
+    tables = _tables(df)
+    if 'version' not in tables:
+        tables['version'] = f"mem-{next(_versions)}"
+    return tables['version']
+
+
+def set_version(df, token):
+    _tables(df)['version'] = token
+    return df
+
+
+def source(df):
+    """Where ``df`` was loaded from (path, cache_dir, size, sha256), or None for in-memory frames."""
+    return _tables(df).get('source')
+
+
+def set_source(df, **source):
+    _tables(df)['source'] = source
+    return df
+
+
+def extend(old, delta, combined):
+    """
+    Carry the tables built for ``old`` over to ``combined`` (``old`` with
+    ``delta`` appended), updating each one from ``delta`` alone.
+
+    ``delta`` must hold whole matches that are not in ``old``, with categorical
+    columns sharing ``combined``'s categories. Tables without a merge rule are
+    rebuilt on next use.
+    """
+    old_tables = _tables(old)
+    tables = _tables(combined)
+    for name in _builders:  # registration order: derived tables see their updated sources
+        if name in old_tables and name in _mergers:
+            tables[name] = _mergers[name](old_tables[name], delta, combined)
+    return combined
+
+
+def fold(acc, chunk, target):
+    """
+    Streaming form of ``extend``: give ``target`` the tables for everything
+    folded into ``acc`` so far plus ``chunk`` (``acc`` is None for the first
+    chunk). ``target`` can be a zero-row frame; only the tables matter.
+    """
+    missing = [name for name in _builders if name not in _mergers]
+    if missing:
+        raise NotImplementedError(f"Tables without a merge rule cannot be built in chunks: {', '.join(missing)}")
+    if acc is None:
+        tables = _tables(target)
+        for name in _builders:
+            tables[name] = get(chunk, name)
+        return target
+    return extend(acc, chunk, target)
+
+
+def _align(old, new):
+    """Cast ``old``'s categorical index levels and columns to ``new``'s (superset) categories."""
+    def cast(values, like):
+        if isinstance(like.dtype, pd.CategoricalDtype) and values.dtype != like.dtype:
+            return values.astype(like.dtype)
+        return values
+
+    old = old.copy(deep=False)
+    if isinstance(old.index, pd.MultiIndex):
+        old.index = old.index.set_levels([cast(lo, ln) for lo, ln in zip(old.index.levels, new.index.levels)])
+    else:
+        old.index = cast(old.index, new.index)
+    for col in old.columns.intersection(new.columns):
+        old[col] = cast(old[col], new[col])
+    return old
+
+
+def _add(old, new, maxes=()):
+    """Row-wise ``old + new`` on the shared keys; ``maxes`` columns keep the larger value."""
+    both = pd.concat([_align(old, new), new])
+    agg = {col: 'max' if col in maxes else 'sum' for col in old.columns}
+    merged = both.groupby(level=list(range(old.index.nlevels)), observed=True).agg(agg)
+    return merged.astype(old.dtypes.to_dict()).sort_index()
+
+
+def _append(old, new):
+    return pd.concat([_align(old, new), new]).sort_index(kind='stable')
+
+
+def build_all(df):
+    """Build every registered table up front (called once at load time)."""
+    for name in _builders:
+        get(df, name)
+    return df
+
+
+# ---------------- helpers ----------------
+def legal_for_batter(df):
+    """Balls that count as faced: everything except wides."""
+    if 'extras_type' not in df.columns:
+        return pd.Series(True, index=df.index)
+    return df['extras_type'].astype(object).ne('wides')
+
+
+# ---------------- Batting ----------------
+BATTING_KEYS = ['batter', 'season', 'bowling_team']
+
+
+@register('batting', merge=lambda old, delta, combined: _add(old, get(delta, 'batting'), maxes=('high_score',)))
+def batting_cube(df):
+    """
+    Batting totals keyed by (batter, season, bowling_team).
+
+    Columns: runs, balls, fours, sixes, innings, fifties, hundreds, high_score,
+    dismissals. Everything except high_score is additive, so any season range
+    or opponent filter is a slice-and-sum over this table. An innings always
+    falls inside a single key, which keeps the 50s/100s counts additive too.
+    """
+    runs = df['batsman_runs']
+    balls = pd.DataFrame({
+        'batter': df['batter'],
+        'season': df['season'],
+        'bowling_team': df['bowling_team'],
+        'match_id': df['match_id'],
+        'runs': runs.astype('int32'),
+        'balls': legal_for_batter(df).astype('int32'),
+        'fours': runs.eq(4).astype('int32'),
+        'sixes': runs.eq(6).astype('int32'),
+    })
+    innings = balls.groupby(BATTING_KEYS + ['match_id'], observed=True, sort=False).sum()
+    score = innings['runs']
+    innings = innings.assign(
+        innings=1,
+        fifties=((score >= 50) & (score < 100)).astype('int32'),
+        hundreds=(score >= 100).astype('int32'),
+    )
+    cube = innings.groupby(level=BATTING_KEYS, observed=True).agg(
+        runs=('runs', 'sum'), balls=('balls', 'sum'), fours=('fours', 'sum'), sixes=('sixes', 'sum'),
+        innings=('innings', 'sum'), fifties=('fifties', 'sum'), hundreds=('hundreds', 'sum'),
+        high_score=('runs', 'max'),
+    )
+
+    out = df.loc[df['player_dismissed'].notna(), ['player_dismissed', 'season', 'bowling_team']]
+    dismissals = out.groupby(['player_dismissed', 'season', 'bowling_team'], observed=True).size()
+    dismissals.index.names = BATTING_KEYS
+    return _batting_table(cube, dismissals)
+
+
+def _batting_table(cube, dismissals):
+    """Join the per-key batting totals with the dismissal counts (both keyed by ``BATTING_KEYS``)."""
+    cube = cube.join(dismissals.rename('dismissals'), how='outer')
+    return cube.fillna(0).astype('int32').sort_index()
+
+
+BATTING_ADDITIVE = ['runs', 'balls', 'fours', 'sixes', 'innings', 'fifties', 'hundreds', 'dismissals']
+
+
+def _with_rates(totals):
+    totals['strike_rate'] = (totals['runs'] / totals['balls'].where(totals['balls'] > 0) * 100).round(2)
+    totals['average'] = (totals['runs'] / totals['dismissals'].where(totals['dismissals'] > 0)).round(2)
+    return totals
+
+
+def _merge_batting_totals(name):
+    def merge(old, delta, combined):
+        new = get(delta, name).drop(columns=['strike_rate', 'average'])
+        return _with_rates(_add(old.drop(columns=['strike_rate', 'average']), new, maxes=('high_score',)))
+    return merge
+
+
+@register('batting_by_season', merge=_merge_batting_totals('batting_by_season'))
+def batting_by_season(df):
+    """
+    Every batting metric per (season, batter) in one grouped pass over the
+    batting cube: the additive counts, high_score, strike_rate and average
+    (NaN when the denominator is 0). Leaderboards select from this table.
+    """
+    cube = get(df, 'batting')
+    agg = {col: 'sum' for col in BATTING_ADDITIVE}
+    agg['high_score'] = 'max'
+    totals = cube.groupby(level=['season', 'batter'], observed=True).agg(agg)
+    return _with_rates(totals)
+
+
+@register('batting_career', merge=_merge_batting_totals('batting_career'))
+def batting_career(df):
+    """The ``batting_by_season`` metrics summed over every season, per batter."""
+    seasons = get(df, 'batting_by_season')
+    agg = {col: 'sum' for col in BATTING_ADDITIVE}
+    agg['high_score'] = 'max'
+    totals = seasons.groupby(level='batter', observed=True).agg(agg)
+    return _with_rates(totals)
+
+
+# ---------------- Bowling ----------------
+BOWLING_KEYS = ['bowler', 'season', 'batting_team', 'bowling_team']
+# Dismissals that are not credited to the bowler.
+NON_BOWLER_DISMISSALS = {'run out', 'retired hurt', 'retired out', 'obstructing the field'}
+
+
+def legal_for_bowler(df):
+    """Balls that count towards the bowler's over: everything except wides and no-balls."""
+    if 'extras_type' not in df.columns:
+        return pd.Series(True, index=df.index)
+    return ~df['extras_type'].astype(object).isin(['wides', 'noballs'])
+
+
+def conceded_runs(df):
+    """Runs charged to the bowler: byes and leg-byes are not."""
+    if 'extras_type' not in df.columns:
+        return df['total_runs']
+    byes = df['extras_type'].astype(object).isin(['byes', 'legbyes'])
+    return df['total_runs'].where(~byes, df['batsman_runs'])
+
+
+def bowler_wickets(df):
+    wicket = df['is_wicket'].astype(bool)
+    if 'dismissal_kind' in df.columns:
+        wicket &= ~df['dismissal_kind'].astype(object).isin(NON_BOWLER_DISMISSALS)
+    return wicket
+
+
+@register('bowling', merge=lambda old, delta, combined: _add(old, get(delta, 'bowling')))
+def bowling_cube(df):
+    """
+    Bowling totals keyed by (bowler, season, batting_team, bowling_team).
+
+    Columns: balls (legal deliveries), runs (conceded, excluding byes and
+    leg-byes), dots, wickets (bowler-credited only) and innings. The bowler's
+    own team is kept as a trailing key so per-team economy is read from the
+    same table; a bowler plays for one side per season, so it adds almost no
+    rows.
+    """
+    legal = legal_for_bowler(df)
+    runs = conceded_runs(df)
+    balls = pd.DataFrame({
+        'bowler': df['bowler'],
+        'season': df['season'],
+        'batting_team': df['batting_team'],
+        'bowling_team': df['bowling_team'],
+        'match_id': df['match_id'],
+        'balls': legal.astype('int32'),
+        'runs': runs.astype('int32'),
+        'dots': (legal & df['total_runs'].eq(0)).astype('int32'),
+        'wickets': bowler_wickets(df).astype('int32'),
+    })
+    innings = balls.groupby(BOWLING_KEYS + ['match_id'], observed=True, sort=False).sum()
+    cube = innings.groupby(level=BOWLING_KEYS, observed=True).sum()
+    cube['innings'] = innings.groupby(level=BOWLING_KEYS, observed=True).size()
+    return cube.astype('int32').sort_index()
+
+
+def _merge_economy(old, delta, combined):
+    teams = delta['bowling_team'].dropna().unique()
+    bowler = get(combined, 'bowling').index.levels[0].dtype
+    # Teams without deliveries in ``delta`` keep their rows, re-cast to the merged bowler categories.
+    merged = {team: rows.set_axis(rows.index.astype(bowler)) for team, rows in old.items()}
+    merged.update(economy_by_team(combined, teams))
+    return merged
+
+
+@register('economy_by_team', merge=_merge_economy)
+def economy_by_team(df, teams=None):
+    """For each bowling team (or only ``teams``), its bowlers' career economy and balls, sorted best first."""
+    bowling = get(df, 'bowling')
+    if teams is not None:
+        bowling = bowling[bowling.index.get_level_values('bowling_team').isin(teams)]
+    per_team = bowling.groupby(level=['bowling_team', 'bowler'], observed=True)[['balls', 'runs']].sum()
+    per_team = per_team[per_team['balls'] > 0]
+    per_team['economy'] = per_team['runs'] / per_team['balls'] * 6
+    per_team = per_team.sort_values('economy', kind='stable')
+    return {team: rows.droplevel('bowling_team')
+            for team, rows in per_team.groupby(level='bowling_team', observed=True, sort=False)}
+
+
+# ---------------- Phases ----------------
+# Over-phase buckets on the 0-based ``over`` column: overs 1-6, 7-15 and 16-20.
+PHASES = ['powerplay', 'middle', 'death']
+PHASE_STARTS = [0, 6, 15]
+
+
+def phase_of(df):
+    """The phase of every delivery as an ordered categorical, bucketed from ``over`` in one pass."""
+    codes = np.searchsorted(PHASE_STARTS, df['over'].to_numpy(), side='right') - 1
+    return pd.Series(pd.Categorical.from_codes(codes, categories=PHASES, ordered=True), index=df.index)
+
+
+BATTING_PHASE_KEYS = ['batter', 'season', 'batting_team', 'phase']
+
+
+@register('batting_phases', merge=lambda old, delta, combined: _add(old, get(delta, 'batting_phases')))
+def batting_phases(df):
+    """
+    Batting totals keyed by (batter, season, batting_team, phase).
+
+    Columns: balls (faced), runs (off the bat), dots, fours, sixes and
+    dismissals. The batter's own team is kept so team views sum over it.
+    """
+    phase = phase_of(df)
+    runs = df['batsman_runs']
+    legal = legal_for_batter(df)
+    balls = pd.DataFrame({
+        'batter': df['batter'],
+        'season': df['season'],
+        'batting_team': df['batting_team'],
+        'phase': phase,
+        'balls': legal.astype('int32'),
+        'runs': runs.astype('int32'),
+        'dots': (legal & runs.eq(0)).astype('int32'),
+        'fours': runs.eq(4).astype('int32'),
+        'sixes': runs.eq(6).astype('int32'),
+    })
+    cube = balls.groupby(BATTING_PHASE_KEYS, observed=True).sum()
+
+    out = df['player_dismissed'].notna()
+    dismissals = pd.DataFrame({
+        'batter': df.loc[out, 'player_dismissed'],
+        'season': df.loc[out, 'season'],
+        'batting_team': df.loc[out, 'batting_team'],
+        'phase': phase[out],
+    }).groupby(BATTING_PHASE_KEYS, observed=True).size()
+    return _batting_table(cube, dismissals)
+
+
+BOWLING_PHASE_KEYS = ['bowler', 'season', 'bowling_team', 'phase']
+
+
+@register('bowling_phases', merge=lambda old, delta, combined: _add(old, get(delta, 'bowling_phases')))
+def bowling_phases(df):
+    """
+    Bowling totals keyed by (bowler, season, bowling_team, phase).
+
+    Columns: balls (legal), runs (conceded), dots, fours and sixes (conceded)
+    and wickets (bowler-credited), counted as in the bowling cube.
+    """
+    legal = legal_for_bowler(df)
+    runs = df['batsman_runs']
+    balls = pd.DataFrame({
+        'bowler': df['bowler'],
+        'season': df['season'],
+        'bowling_team': df['bowling_team'],
+        'phase': phase_of(df),
+        'balls': legal.astype('int32'),
+        'runs': conceded_runs(df).astype('int32'),
+        'dots': (legal & df['total_runs'].eq(0)).astype('int32'),
+        'fours': runs.eq(4).astype('int32'),
+        'sixes': runs.eq(6).astype('int32'),
+        'wickets': bowler_wickets(df).astype('int32'),
+    })
+    return balls.groupby(BOWLING_PHASE_KEYS, observed=True).sum().astype('int32').sort_index()
+
+
+# ---------------- Profiles ----------------
+# Players need this many legal balls (faced or bowled) to be profiled.
+PROFILE_MIN_BALLS = 120
+
+
+def _career_and_phases(table, level, cols):
+    """Per-player career totals of ``cols`` and per-phase balls and runs (players x phases), for qualifying players."""
+    totals = table.groupby(level=[level, 'phase'], observed=True)[cols].sum()
+    career = totals.groupby(level=level, observed=True).sum()
+    career = career[career['balls'] >= PROFILE_MIN_BALLS]
+    by_phase = totals[['balls', 'runs']].unstack('phase', fill_value=0)
+    balls = by_phase['balls'].reindex(index=career.index, columns=PHASES, fill_value=0).to_numpy('float64')
+    runs = by_phase['runs'].reindex(index=career.index, columns=PHASES, fill_value=0).to_numpy('float64')
+    career.index = pd.Index(career.index.astype(object), name='player')
+    return career, balls, runs
+
+
+def _phase_rate(runs, balls, overall, scale):
+    """Per-phase rate, falling back to the career rate for phases the player never played in."""
+    return np.where(balls > 0, runs / np.maximum(balls, 1) * scale, overall[:, None])
+
+
+@register('batting_profiles', merge=lambda old, delta, combined: batting_profiles(combined))
+def batting_profiles(df):
+    """
+    Nearest-neighbour index (see similarity.ProfileIndex) over the career
+    profile of every batter with at least PROFILE_MIN_BALLS balls faced:
+    strike rate, average, boundary %, dot %, strike rate in each phase and
+    the share of balls faced in the powerplay and at the death.
+    """
+    career, phase_balls, phase_runs = _career_and_phases(
+        get(df, 'batting_phases'), 'batter', ['balls', 'runs', 'dots', 'fours', 'sixes', 'dismissals'])
+    balls = career['balls'].to_numpy('float64')
+    runs = career['runs'].to_numpy('float64')
+    strike_rate = runs / balls * 100
+    phase_sr = _phase_rate(phase_runs, phase_balls, strike_rate, 100)
+    features = pd.DataFrame({
+        'Strike Rate': strike_rate,
+        'Average': runs / np.maximum(career['dismissals'].to_numpy(), 1),
+        'Boundary %': (career['fours'] + career['sixes']).to_numpy() / balls * 100,
+        'Dot %': career['dots'].to_numpy() / balls * 100,
+        'Powerplay SR': phase_sr[:, 0],
+        'Middle SR': phase_sr[:, 1],
+        'Death SR': phase_sr[:, 2],
+        'Powerplay Share %': phase_balls[:, 0] / balls * 100,
+        'Death Share %': phase_balls[:, 2] / balls * 100,
+    }, index=career.index)
+    return ProfileIndex(features)
+
+
+@register('bowling_profiles', merge=lambda old, delta, combined: bowling_profiles(combined))
+def bowling_profiles(df):
+    """
+    Nearest-neighbour index over the career profile of every bowler with at
+    least PROFILE_MIN_BALLS legal balls: economy, average, strike rate,
+    dot %, boundary %, economy in each phase and the share of balls bowled
+    in the powerplay and at the death.
+    """
+    career, phase_balls, phase_runs = _career_and_phases(
+        get(df, 'bowling_phases'), 'bowler', ['balls', 'runs', 'dots', 'fours', 'sixes', 'wickets'])
+    balls = career['balls'].to_numpy('float64')
+    runs = career['runs'].to_numpy('float64')
+    wickets = np.maximum(career['wickets'].to_numpy(), 1)
+    economy = runs / balls * 6
+    phase_economy = _phase_rate(phase_runs, phase_balls, economy, 6)
+    features = pd.DataFrame({
+        'Economy': economy,
+        'Average': runs / wickets,
+        'Strike Rate': balls / wickets,
+        'Dot %': career['dots'].to_numpy() / balls * 100,
+        'Boundary %': (career['fours'] + career['sixes']).to_numpy() / balls * 100,
+        'Powerplay Economy': phase_economy[:, 0],
+        'Middle Economy': phase_economy[:, 1],
+        'Death Economy': phase_economy[:, 2],
+        'Powerplay Share %': phase_balls[:, 0] / balls * 100,
+        'Death Share %': phase_balls[:, 2] / balls * 100,
+    }, index=career.index)
+    return ProfileIndex(features)
+
+
+# ---------------- Matchups ----------------
+MATCHUP_KEYS = ['batter', 'bowler']
+
+
+@register('matchups', merge=lambda old, delta, combined: _add(old, get(delta, 'matchups')))
+def matchups(df):
+    """
+    Batter-vs-bowler totals keyed by (batter, bowler).
+
+    Columns: balls (faced), runs (off the bat), dismissals (credited to the
+    bowler), dots, fours and sixes. Only pairs that actually met have a row,
+    so the table grows with the number of pairs rather than batters x
+    bowlers. The index is sorted: a batter's bowlers are one slice and a
+    single pair is one lookup.
+    """
+    runs = df['batsman_runs']
+    balls = pd.DataFrame({
+        'batter': df['batter'],
+        'bowler': df['bowler'],
+        'balls': legal_for_batter(df).astype('int32'),
+        'runs': runs.astype('int32'),
+        'dismissals': bowler_wickets(df).astype('int32'),
+        'dots': (legal_for_bowler(df) & df['total_runs'].eq(0)).astype('int32'),
+        'fours': runs.eq(4).astype('int32'),
+        'sixes': runs.eq(6).astype('int32'),
+    })
+    return balls.groupby(MATCHUP_KEYS, observed=True).sum().astype('int32').sort_index()
+
+
+def put(df, name, table):
+    """Attach an externally built table (e.g. matches.csv) to ``df`` under ``name``."""
+    _tables(df)[name] = table
+    return df
+
+
+# ---------------- Matches ----------------
+MATCH_COLS = ['winner', 'venue', 'result', 'target_runs', 'target_overs', 'method']
+
+
+def _merge_matches(old, delta, combined):
+    new = get(delta, 'matches')
+    if 'winner' not in delta.columns:
+        return new  # re-read from matches.csv, which already holds the new matches
+    return _append(old, new[~new.index.isin(old.index)])
+
+
+@register('matches', merge=_merge_matches)
+def matches_table(df):
+    """
+    Match-level columns indexed by match_id.
+
+    Taken from the deliveries frame when it already carries them (the merged
+    dataset does); otherwise read from matches.csv via data_loader.
+    """
+    if 'winner' in df.columns:
+        cols = [c for c in MATCH_COLS if c in df.columns]
+        return df.drop_duplicates('match_id').set_index('match_id')[cols]
+    import data_loader as dl
+    matches = dl.load_matches().rename(columns={'id': 'match_id'}).set_index('match_id')
+    return matches[[c for c in MATCH_COLS if c in matches.columns]]
+
+
+def _merge_innings(old, delta, combined):
+    # Same order as a full build: by key, then match and innings within a key.
+    facts = pd.concat([_align(old, get(delta, 'innings')), get(delta, 'innings')]).reset_index()
+    facts = facts.sort_values(['batting_team', 'season', 'match_id', 'inning'], kind='stable')
+    return facts.set_index(['batting_team', 'season'])
+
+
+@register('innings', merge=_merge_innings)
+def innings_facts(df):
+    """
+    One row per team innings: match_id, inning, season, batting_team,
+    bowling_team, total, wickets, balls, overs, target, winner, venue.
+
+    Indexed by (batting_team, season) and sorted, so a team's or a season's
+    innings are a binary-search slice. Super-over innings are left out.
+    """
+    balls = pd.DataFrame({
+        'match_id': df['match_id'],
+        'inning': df['inning'],
+        'total': df['total_runs'].astype('int32'),
+        'wickets': df['is_wicket'].astype('int32'),
+        'balls': legal_for_bowler(df).astype('int32'),
+    })
+    grouped = balls[balls['inning'] <= 2].groupby(['match_id', 'inning'], sort=True)
+    facts = grouped[['total', 'wickets', 'balls']].sum()
+    firsts = df.loc[df['inning'] <= 2, ['match_id', 'inning', 'season', 'batting_team', 'bowling_team']]
+    facts = facts.join(firsts.drop_duplicates(['match_id', 'inning']).set_index(['match_id', 'inning']))
+    return _innings_table(df, facts.reset_index())
+
+
+def _innings_table(df, facts):
+    """
+    Finish the innings facts from the per-innings totals (match_id, inning,
+    total, wickets, balls, season, batting_team, bowling_team; ordered by
+    match_id and inning) and the matches table.
+    """
+    facts['overs'] = facts['balls'] // 6 + facts['balls'] % 6 / 10
+
+    first_total = facts.loc[facts['inning'] == 1].set_index('match_id')['total']
+    matches = get(df, 'matches')
+    target = facts['match_id'].map(first_total) + 1
+    if 'target_runs' in matches.columns:
+        target = facts['match_id'].map(matches['target_runs']).fillna(target)
+    facts['target'] = target.where(facts['inning'] == 2)
+    for col in ('winner', 'venue', 'result'):
+        if col in matches.columns:
+            facts[col] = facts['match_id'].map(matches[col])
+    return facts.set_index(['batting_team', 'season']).sort_index()
+
+
+def _team_games(df):
+    """One row per (match, team) from the innings facts: team, season, match_id, opponent, won and lost (both 0 when undecided)."""
+    facts = get(df, 'innings').reset_index()
+    games = facts.drop_duplicates(['match_id', 'batting_team'])
+    winner = games['winner'].astype(object)
+    team = games['batting_team'].astype(object)
+    decided = winner.notna() & ~winner.isin(['', 'NA', 'No Result', 'no result'])
+    return pd.DataFrame({
+        'team': games['batting_team'],
+        'season': games['season'],
+        'match_id': games['match_id'],
+        'opponent': games['bowling_team'],
+        'won': (decided & winner.eq(team)).astype('int32'),
+        'lost': (decided & winner.ne(team)).astype('int32'),
+    })
+
+
+@register('team_results', merge=lambda old, delta, combined: _add(old, get(delta, 'team_results')))
+def team_results(df):
+    """Per (team, season, opponent): matches, wins, losses and no-results, from the innings facts."""
+    games = _team_games(df)
+    results = pd.DataFrame({
+        'team': games['team'],
+        'season': games['season'],
+        'opponent': games['opponent'],
+        'matches': 1,
+        'wins': games['won'],
+        'losses': games['lost'],
+        'no_result': (1 - games['won'] - games['lost']).astype('int32'),
+    })
+    return results.groupby(['team', 'season', 'opponent'], observed=True).sum().sort_index()
+
+
+# ---------------- Form ----------------
+# Innings-by-innings tables in match order (season, then match_id) with running
+# totals per player or team. Any last-N window is a difference of two running
+# totals, so form over any N needs no rolling pass at query time.
+BATTING_FORM_KEYS = ['batter', 'season', 'match_id']
+BOWLING_FORM_KEYS = ['bowler', 'season', 'match_id']
+TEAM_FORM_KEYS = ['team', 'season', 'match_id']
+# A batter's drought is a run of innings below this score; a bowler's, a run of wicketless innings.
+DROUGHT_RUNS = 50
+
+
+def _running(table, cols, bad):
+    """
+    Sort ``table`` into match order and add, per player (the first index
+    level), the innings number, running totals ``cum_<col>`` of ``cols`` and
+    ``drought``: how many innings in a row, up to this one, were ``bad``.
+    """
+    table = table.sort_index()
+    grouped = table.groupby(level=0, observed=True, sort=False)
+    for col in cols:
+        table[f'cum_{col}'] = grouped[col].cumsum()
+    table['number'] = grouped.cumcount() + 1
+    # Every good innings starts a new stretch; the drought is the bad innings counted within it.
+    stretch = (~bad.reindex(table.index)).groupby(level=0, observed=True).cumsum()
+    player = table.index.get_level_values(0)
+    table['drought'] = bad.reindex(table.index).astype('int32').groupby([player, stretch], observed=True).cumsum()
+    counts = cols + [f'cum_{col}' for col in cols] + ['number', 'drought']
+    return table.astype({col: 'int32' for col in counts})
+
+
+def _merge_form(name, finish, base):
+    def merge(old, delta, combined):
+        new = get(delta, name)
+        return finish(pd.concat([_align(old, new), new])[base])
+    return merge
+
+
+def _batting_form(innings):
+    return _running(innings, ['runs', 'balls', 'outs'], innings['runs'] < DROUGHT_RUNS)
+
+
+@register('batting_form', merge=_merge_form('batting_form', _batting_form, ['runs', 'balls', 'outs']))
+def batting_form(df):
+    """
+    One row per batter innings keyed by (batter, season, match_id), in match
+    order: runs, balls, outs (0 or 1), the innings number, running totals
+    cum_runs, cum_balls and cum_outs, and drought (innings in a row below
+    ``DROUGHT_RUNS``, this one included).
+    """
+    balls = pd.DataFrame({
+        'batter': df['batter'],
+        'season': df['season'],
+        'match_id': df['match_id'],
+        'runs': df['batsman_runs'].astype('int32'),
+        'balls': legal_for_batter(df).astype('int32'),
+    })
+    innings = balls.groupby(BATTING_FORM_KEYS, observed=True).sum()
+    out = df.loc[df['player_dismissed'].notna(), ['player_dismissed', 'season', 'match_id']]
+    outs = out.groupby(['player_dismissed', 'season', 'match_id'], observed=True).size()
+    outs.index.names = BATTING_FORM_KEYS
+    innings = innings.join(outs.rename('outs'), how='outer').fillna(0)
+    return _batting_form(innings)
+
+
+def _bowling_form(innings):
+    return _running(innings, ['balls', 'runs', 'wickets'], innings['wickets'] == 0)
+
+
+@register('bowling_form', merge=_merge_form('bowling_form', _bowling_form, ['balls', 'runs', 'wickets']))
+def bowling_form(df):
+    """
+    One row per bowler innings keyed by (bowler, season, match_id), in match
+    order: balls, runs (conceded), wickets, the innings number, running
+    totals and drought (wicketless innings in a row, this one included).
+    """
+    balls = pd.DataFrame({
+        'bowler': df['bowler'],
+        'season': df['season'],
+        'match_id': df['match_id'],
+        'balls': legal_for_bowler(df).astype('int32'),
+        'runs': conceded_runs(df).astype('int32'),
+        'wickets': bowler_wickets(df).astype('int32'),
+    })
+    return _bowling_form(balls.groupby(BOWLING_FORM_KEYS, observed=True).sum())
+
+
+def _team_form(games):
+    """Running totals, winless runs and the streak: +k after k wins in a row, -k after k losses, 0 after a no-result."""
+    games = _running(games, ['won', 'lost'], games['won'] == 0)
+    outcome = games['won'] - games['lost']
+    team = games.index.get_level_values(0)
+    run = outcome.ne(outcome.groupby(level=0, observed=True).shift()).groupby(level=0, observed=True).cumsum()
+    games['streak'] = ((outcome.groupby([team, run], observed=True).cumcount() + 1) * outcome).astype('int32')
+    return games
+
+
+@register('team_form', merge=_merge_form('team_form', _team_form, ['opponent', 'won', 'lost']))
+def team_form(df):
+    """
+    One row per team match keyed by (team, season, match_id), in match
+    order: opponent, won and lost (both 0 for a no-result), the match
+    number, running totals cum_won and cum_lost, drought (matches without a
+    win in a row) and the streak.
+    """
+    return _team_form(_team_games(df).set_index(TEAM_FORM_KEYS))
+
+
+# ---------------- Win probability ----------------
+CHASE_KEYS = ['runs_needed', 'balls_left', 'wickets']
+
+
+def _target_balls(overs):
+    """Balls in a (possibly shortened) chase from target overs such as 20.0 or 15.3."""
+    overs = pd.to_numeric(overs, errors='coerce').fillna(20)
+    return (overs // 1 * 6 + (overs % 1 * 10).round()).astype('int32')
+
+
+def _decided_chases(df):
+    """Decided second innings from the innings table, indexed by match_id, with won (1 if the chasing side won) and limit (balls)."""
+    facts = get(df, 'innings')
+    facts = facts[facts['inning'].eq(2).to_numpy() & facts['target'].notna().to_numpy()].reset_index()
+    winner = facts['winner'].astype(object)
+    decided = winner.notna() & ~winner.isin(['', 'NA', 'No Result', 'no result'])
+    facts['won'] = winner.eq(facts['batting_team'].astype(object)).astype('int8')
+    facts = facts[decided].set_index('match_id')
+    matches = get(df, 'matches')
+    overs = matches['target_overs'] if 'target_overs' in matches.columns else pd.Series(20, index=matches.index)
+    facts['limit'] = facts.index.map(_target_balls(overs)).fillna(120)
+    return facts
+
+
+@register('chase_balls', merge=lambda old, delta, combined: _append(old, get(delta, 'chase_balls')))
+def chase_balls(df):
+    """
+    The state before each delivery of every decided second innings, indexed
+    by match_id with a match's deliveries in order: over, ball, runs_needed,
+    balls_left, wickets (in hand) and won (1 if the chasing side went on to
+    win). Win-% curves are read from here rather than the delivery rows, so
+    they also work on a frame from ``load_ipl_chunked``.
+    """
+    facts = _decided_chases(df)
+    rows = df[(df['inning'].to_numpy() == 2) & df['match_id'].isin(facts.index).to_numpy()]
+    match = rows['match_id']
+    runs = rows['total_runs'].astype('int32')
+    wickets = rows['is_wicket'].astype('int32')
+    legal = legal_for_bowler(rows).astype('int32')
+    return pd.DataFrame({
+        'over': rows['over'],
+        'ball': rows['ball'],
+        'runs_needed': (match.map(facts['target']) - runs.groupby(match).cumsum() + runs).astype('int32'),
+        'balls_left': (match.map(facts['limit']) - legal.groupby(match).cumsum() + legal).astype('int32'),
+        'wickets': (10 - wickets.groupby(match).cumsum() + wickets).astype('int32'),
+        'won': match.map(facts['won']).astype('int8'),
+    }).set_axis(pd.Index(match, name='match_id')).sort_index(kind='stable')
+
+
+@register('chase_states', merge=lambda old, delta, combined: _add(old, get(delta, 'chase_states')))
+def chase_states(df):
+    """
+    Every (runs_needed, balls_left, wickets in hand) state reached in a
+    decided chase: how many times (states) and how many of those chases were
+    won (wins). Additive, so it merges and persists like the cubes.
+    """
+    balls = get(df, 'chase_balls')
+    balls = balls[(balls['runs_needed'] > 0) & (balls['balls_left'] > 0)]
+    counts = balls.groupby(CHASE_KEYS)['won'].agg(['size', 'sum'])
+    return counts.set_axis(['states', 'wins'], axis=1).astype('int32').sort_index()
+
+
+@register('win_model', merge=lambda old, delta, combined: win_model(combined))
+def win_model(df):
+    """Win-probability lookup grid (see winprob.WinProbability) fitted from the chase_states table."""
+    return WinProbability(get(df, 'chase_states'))
+
+
+# ---------------- Partnerships ----------------
+PARTNERSHIP_KEYS = ['batting_team', 'season', 'match_id', 'inning', 'wicket']
+
+
+def _pair_dtype(df):
+    """One categorical dtype for batter1/batter2: every name that can be at the crease."""
+    batter, non_striker = df['batter'].dtype, df['non_striker'].dtype
+    if isinstance(batter, pd.CategoricalDtype) and isinstance(non_striker, pd.CategoricalDtype):
+        return pd.CategoricalDtype(batter.categories.union(non_striker.categories))
+    return None
+
+
+@register('partnerships', merge=lambda old, delta, combined: _append(old, get(delta, 'partnerships')))
+def partnerships(df):
+    """
+    One row per partnership, keyed by (batting_team, season, match_id,
+    inning, wicket), where wicket is the one the pair batted for (1 for the
+    openers).
+
+    Columns: bowling_team, batter1 and batter2 (the pair that started it, in
+    name order), runs (extras included), balls (faced, so no wides),
+    batter1_runs, batter2_runs and unbroken (1 when no wicket ended it).
+    Deliveries are split into partnerships by the running wicket count of
+    their innings, so the whole table is a handful of grouped passes.
+    Super-over innings are left out.
+    """
+    rows = df[df['inning'].to_numpy() <= 2]
+    out = rows['is_wicket'].astype('int32')
+    fallen = out.groupby([rows['match_id'], rows['inning']]).cumsum() - out
+    balls = pd.DataFrame({
+        'match_id': rows['match_id'],
+        'inning': rows['inning'],
+        'wicket': (fallen + 1).astype('int8'),
+        'runs': rows['total_runs'].astype('int32'),
+        'balls': legal_for_batter(rows).astype('int32'),
+        'out': out,
+    })
+    group = balls.groupby(['match_id', 'inning', 'wicket'], sort=True)
+    code = group.ngroup().to_numpy()
+    table = group[['runs', 'balls']].sum()
+    starts = rows[['batting_team', 'season', 'bowling_team', 'batter', 'non_striker']].groupby(code).first()
+
+    first = starts['batter'].astype(object).to_numpy()
+    second = starts['non_striker'].astype(object).fillna('').to_numpy()
+    swap = second < first
+    batter1, batter2 = np.where(swap, second, first), np.where(swap, first, second)
+    striker = rows['batter'].astype(object).to_numpy()
+    scored = rows['batsman_runs'].to_numpy()
+    table['batter1_runs'] = np.bincount(code, scored * (striker == batter1[code]), len(table)).astype('int32')
+    table['batter2_runs'] = np.bincount(code, scored * (striker == batter2[code]), len(table)).astype('int32')
+    table['unbroken'] = (1 - group['out'].last()).astype('int8')
+
+    dtype = _pair_dtype(df)
+    table['batter1'] = pd.Series(batter1, index=table.index).astype(dtype or object)
+    table['batter2'] = pd.Series(batter2, index=table.index).astype(dtype or object)
+    for col in ('batting_team', 'season', 'bowling_team'):
+        table[col] = starts[col].set_axis(table.index)
+    table = table.reset_index().set_index(PARTNERSHIP_KEYS).sort_index()
+    return table[['bowling_team', 'batter1', 'batter2', 'runs', 'balls', 'batter1_runs', 'batter2_runs', 'unbroken']]
+
+
+# ---------------- Names ----------------
+def _busiest_first(activity):
+    activity = activity.set_axis(activity.index.astype(object))
+    return activity.sort_index().sort_values(ascending=False, kind='stable').index
+
+
+@register('names', merge=lambda old, delta, combined: name_indexes(combined))
+def name_indexes(df):
+    """
+    Search indexes (search.NameIndex) over 'players' (everyone who batted or
+    bowled), 'bowlers' and 'teams', busiest first: by balls faced plus
+    bowled, balls bowled and matches played.
+    """
+    # New Series with object labels; the cached tables keep their categorical index.
+    faced = get(df, 'batting_career')['balls']
+    faced = faced.set_axis(faced.index.astype(object))
+    bowled = get(df, 'bowling').groupby(level='bowler', observed=True)['balls'].sum()
+    bowled = bowled.set_axis(bowled.index.astype(object))
+    played = get(df, 'team_results').groupby(level='team', observed=True)['matches'].sum()
+    return {
+        'players': NameIndex(_busiest_first(faced.add(bowled, fill_value=0))),
+        'bowlers': NameIndex(_busiest_first(bowled)),
+        'teams': NameIndex(_busiest_first(played)),
+    }
@@ -1,303 +1,978 @@
-import seaborn  as sns
-import matplotlib.pyplot as plt
-import analysis as an
-import pandas as pd
-import plotly.graph_objects as go
 import numpy as np
-def normalize_dataframe(df, exclude_cols=None):
+import pandas as pd
+
+import aggregates as ag
+from instrument import traced
+from memo import cached
+
+
+def _season_mask(seasons, start_year=None, end_year=None):
+    mask = np.ones(len(seasons), dtype=bool)
+    if start_year is not None:
+        mask &= np.asarray(seasons >= start_year)
+    if end_year is not None:
+        mask &= np.asarray(seasons <= end_year)
+    return mask
+
+
+def _slice(cube, player=None, start_year=None, end_year=None, opponent=None):
+    """Rows of a (player, season, team) cube for one player, season range and opponent."""
+    if player is not None:
+        try:
+            cube = cube.xs(player, level=0, drop_level=False)
+        except KeyError:
+            return cube.iloc[0:0]
+    mask = _season_mask(cube.index.get_level_values(1), start_year, end_year)
+    if opponent is not None:
+        mask &= np.asarray(cube.index.get_level_values(2) == opponent)
+    return cube[mask]
+
+
+def _plain(frame):
+    """Turn categorical columns back into plain labels so callers (and seaborn axes) only see values present."""
+    cats = frame.select_dtypes('category').columns
+    return frame.astype({col: object for col in cats}) if len(cats) else frame
+
+
+def _ratio(num, den, scale=1, digits=2, na='NA'):
+    return round(num / den * scale, digits) if den else na
+
+
+# ---------------- Lookups ----------------
+# Choices for the app's select boxes, read from the tables rather than the
+# deliveries so they also work on frames from load_ipl_chunked.
+def _level_values(table, level):
+    return sorted(table.index.get_level_values(level).unique().dropna().tolist())
+
+
+@traced
+@cached
+def seasons(df):
+    return _level_values(ag.get(df, 'batting_by_season'), 'season')
+
+
+@traced
+@cached
+def teams(df):
+    return _level_values(ag.get(df, 'team_results'), 'team')
+
+
+@traced
+@cached
+def bowlers(df):
+    return _level_values(ag.get(df, 'bowling'), 'bowler')
+
+
+@traced
+@cached
+def players(df):
+    """Everyone who batted, bowled or was dismissed."""
+    return sorted(set(_level_values(ag.get(df, 'batting'), 'batter')) | set(bowlers(df)))
+
+
+@traced
+@cached
+def search_names(df, query, kind='players', limit=20, within=None):
     """
-    Normalize numeric columns in the DataFrame between 0 and 1.
-    
-    Parameters:
-    - df: DataFrame to normalize
-    - exclude_cols: list of column names to exclude from normalization (e.g., ['Player', 'Team'])
-
-    Returns:
-    - A new DataFrame with normalized numeric columns
+    Autocomplete: up to ``limit`` ``kind`` names ('players', 'bowlers' or
+    'teams') matching ``query`` by prefix, word, substring or with a typo,
+    best first; the busiest names when ``query`` is empty. ``within`` (a
+    frozenset) restricts the results.
     """
-    df_norm = df.copy()
-    exclude_cols = exclude_cols if exclude_cols else []
-
-    for col in df.columns:
-        if col in exclude_cols or df[col].dtype == 'object':
-            continue
-
-        col_min = df[col].min()
-        col_max = df[col].max()
-        if col_max != col_min:
-            df_norm[col] = (df[col] - col_min) / (col_max - col_min)
-        else:
-            df_norm[col] = 0  
-
-    return df_norm
-def top_batsmen_by_season(df,season='all',n=10):
+    return ag.get(df, 'names')[kind].search(query, limit, within)
+
+
+# ---------------- Player (batting) ----------------
+@traced
+@cached
+def player_analysis(df, player_name, start_year=None, end_year=None):
+    rows = _slice(ag.get(df, 'batting'), player_name, start_year, end_year)
+    if rows.empty:
+        return pd.DataFrame()
+    tot = rows.sum()
+    seasons = rows.index.get_level_values('season')
+    return pd.DataFrame([{
+        'Player': player_name,
+        'From': seasons.min(),
+        'To': seasons.max(),
+        'Matches': int(tot['innings']),
+        'Runs': int(tot['runs']),
+        'Balls': int(tot['balls']),
+        'Average': _ratio(tot['runs'], tot['dismissals']),
+        'Strike Rate': _ratio(tot['runs'], tot['balls'], 100),
+        'Highest': int(rows['high_score'].max()),
+        '50s': int(tot['fifties']),
+        '100s': int(tot['hundreds']),
+        '4s': int(tot['fours']),
+        '6s': int(tot['sixes']),
+    }])
+
+
+# ---------------- Leaderboards ----------------
+BATTING_METRICS = ag.BATTING_ADDITIVE + ['high_score', 'strike_rate', 'average']
+
+
+@traced
+@cached
+def leaderboard(df, metric='runs', n=10, season=None, min_balls=0, per_season=False):
     """
-    Plots top batsmen for either a single season or all seasons.
+    Top ``n`` batters by ``metric`` (one of BATTING_METRICS), over the whole
+    IPL or in one ``season``; ``per_season=True`` ranks every season at once.
+
+    Reads the precomputed season/career tables and only selects the top rows
+    (nlargest, or a grouped rank per season) instead of sorting everyone.
+    Batters with fewer than ``min_balls`` balls faced are left out.
     """
-    # Clean column names
-    df.columns = df.columns.str.strip().str.lower()
-
-    # Get data
-    top_batsmen = an.top_batsmen_by_season(df, season)
-
-    if season != 'all':
-        # Plot for single season
-        fig ,ax = plt.subplots(figsize=(12,8))
-        sns.barplot(data=top_batsmen, x='batter', y='batsman_runs', palette='Blues_d')
-        ax.set_title(f"Top {n} Batsmen in Season {season}")
-        ax.set_xlabel("Batsman")
-        ax.set_ylabel("Runs")
-        ax.tick_params(axis='x',rotation = 45)
-        fig.tight_layout()
-        return fig
+    if metric not in BATTING_METRICS:
+        raise ValueError(f"Unknown batting metric {metric!r}; expected one of {BATTING_METRICS}")
+    if season is None and not per_season:
+        table = ag.get(df, 'batting_career')
     else:
-        # Plot for all seasons 
-        g = sns.FacetGrid(top_batsmen, col="season", col_wrap=4, height=4, sharex=False, sharey=False)
-        g.map_dataframe(sns.barplot, x='batter', y='batsman_runs', hue='batter', palette='Blues_d', legend=False)
-        g.set_titles("Season {col_name}")
-        g.set_axis_labels("Batsman", "Runs")
-
-        for ax in g.axes.flat:
-            for label in ax.get_xticklabels():
-                label.set_rotation(45)
-
-        g.tight_layout()
-        return g
-def plot_team_wins_season(df):
-    win_mat = an.team_win_by_season(df)
-
-    fig, ax = plt.subplots(figsize=(12, 8))
-
-    sns.heatmap(win_mat, annot=True, fmt=".0f", cmap="YlGnBu", linewidths=0.5, ax=ax)
-
-    ax.set_title("Matches won by Team across Seasons", fontsize=16)
-    ax.set_xlabel("Season")
-    ax.set_ylabel("Team")
-    ax.tick_params(axis='x', rotation=45)
-    ax.tick_params(axis='y', rotation=0)
-
-    fig.tight_layout()
-    return fig
-def plot_team_vs_opponents(stats_dict,team_name):
-    team_name = team_name.title()
-    data = stats_dict[team_name]['Against Opponents']
-    
-    df = pd.DataFrame(data).T.reset_index().rename(columns={"index":'Opponent'})
-    plt.figure(figsize=(12,6))
-    
-    sns.barplot(data=df.melt(id_vars='Opponent',value_vars=['Wins','Losses']),x='Opponent',y='value',hue='variable')
-    plt.title(f"{team_name} - wins and losses Vs each opponent")
-    plt.ylabel('Count')
-    plt.xlabel('Opponent Teams')
-    plt.xticks(rotation = 90)
-    plt.tight_layout()
-    plt.show()  
-def plot_win_percentage_against_Opponents(stats_dict, team_name):
-    team_name=team_name.title()
-    data = stats_dict[team_name]['Against Opponents']
-    df = pd.DataFrame(data).T.reset_index().rename(columns={'index':'Opponent'})
-    
-    plt.figure(figsize=(10,5))
-    sns.lineplot(data=df,x='Opponent',y='Win %',markers='o',color='g')
-    plt.title(f"{team_name}-win percentage vs each opponent ")
-    plt.ylabel('Win %')
-    plt.xlabel('opponent teams')
-    plt.xticks(rotation=85)
-    plt.ylim(0,100)
-    plt.tight_layout()
-    plt.show()
-def plot_highest_run_by_team(df,team_name,n=5):
-    highest = an.highest_scores_by_team(df,team_name)
-    fig , ax =plt.subplots(figsize=(12,8))
-    
-    sns.barplot(data=highest,x='Against',y='score')
-    ax.set_title(f"{team_name}- highest score against opponents")
-    ax.set_xlabel('teams')
-    ax.set_ylabel('scores')
-    ax.set_xticklabels(ax.get_xticklabels(), rotation=45)
-
-    fig.tight_layout()
-    return fig
-def plot_highest_chase_by_team(df,team_name,n=5):
-    highest = an.highest_chase_by_team(df,team_name)
-    plt.figure(figsize=(12,8))
-    
-    sns.barplot(data=highest,x='Against',y='score',palette='viridis')
-    plt.title(f"{team_name}- highest score chase against opponents")
-    plt.xlabel('teams')
-    plt.ylabel('scores')
-    plt.xticks(rotation =65)
-    plt.tight_layout()
-    plt.show()
-def plot_growth_of_batsman_overtime(df, player_name):
-    growth = an.batsman_growth_by_season(df,player_name)
-    fig ,ax= plt.subplots(figsize=(12,8))
-    sns.lineplot(data=growth,x='Season',y='Runs',markers='o',label='Runs')
-    sns.lineplot(data=growth,x='Season',y='Strike Rate',markers='s',label='Strike Rate')
-    ax.set_title(f"player {player_name} growth over season")
-    ax.set_xlabel('sesaon ')
-    ax.set_ylabel('scores')
-    ax.tick_params(axis='x', rotation=45)
-    fig.tight_layout()
-    return fig
-
-
-def compare_growth(df, player1, player2):
-    growth = an.compare_batsman_growth(df, player1, player2)
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.lineplot(data=growth, x='Season', y='Runs', hue='player', marker='o', ax=ax)
-    ax.set_title(f"{player1} vs {player2} - Runs over Seasons")
-    ax.set_xlabel("Season")
-    ax.set_ylabel("Runs")
-    ax.grid(True)
-    fig.tight_layout()
-    return fig
-
-def top_runs_by_player(df, n=10):
-    runs = an.most_runs_by_IPL(df)
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='player', y='player_runs', data=runs.head(n), ax=ax)
-    ax.set_title('Most Runs by Player in IPL')
-    ax.set_xlabel('Player Name')
-    ax.set_ylabel('Runs')
-    plt.xticks(rotation=80)
-    fig.tight_layout()
-    return fig
-
-def plot_player_against_team(df, player_name, team_name, season='all'):
-    stats_df = an.player_against_teams(df, player_name, team_name)
-    metrics = ['Total Runs', 'Balls Faced', 'Dismissals', 'Strike Rate', 'Fours', 'Sixes']
-    values = [stats_df.at[0, metric] for metric in metrics]
-
-    fig, ax = plt.subplots(figsize=(10, 5))
-    bars = ax.barh(metrics, values, color='skyblue')
-    ax.set_xlabel('Value')
-    ax.set_title(f"{stats_df.at[0, 'Player']} vs {stats_df.at[0, 'Against Team']} ({stats_df.at[0, 'Season']})")
-
-    for bar in bars:
-        ax.text(bar.get_width(), bar.get_y() + 0.25, f'{bar.get_width():.1f}', va='center')
-
-    fig.tight_layout()
-    return fig
-
-def plot_player_head_to_head(df, player1, player2, start_year=None, end_year=None):
-    df_summary = an.player_head_to_head(df, player1, player2)
-    categories = ['Runs', 'Average', '6s', '4s', '50s', '100s', 'Strike Rate']
-    player1, player2 = df_summary['Player'].values
-    values1 = [df_summary.iloc[0][cat] if df_summary.iloc[0][cat] != 'NA' else 0 for cat in categories]
-    values2 = [df_summary.iloc[1][cat] if df_summary.iloc[1][cat] != 'NA' else 0 for cat in categories]
-
-    x = np.arange(len(categories))
-    width = 0.35
-
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars1 = ax.bar(x - width / 2, values1, width, label=player1, color='steelblue')
-    bars2 = ax.bar(x + width / 2, values2, width, label=player2, color='orange')
-
-    for bar in bars1 + bars2:
-        height = bar.get_height()
-        ax.annotate(f'{height:.0f}', xy=(bar.get_x() + bar.get_width() / 2, height),
-                    xytext=(0, 3), textcoords="offset points", ha='center', va='bottom')
-
-    ax.set_ylabel('Value')
-    ax.set_title('Player Performance Comparison')
-    ax.set_xticks(x)
-    ax.set_xticklabels(categories)
-    ax.legend()
-    ax.grid(axis='y', linestyle='--', alpha=0.7)
-    fig.tight_layout()
-    return fig
-def plot_most_Strike_rate_in_IPL(df,n=10):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x="Player", y="Strike Rate", data=result_df, ax=ax, palette="viridis")
-    ax.set_title("Top Strike Rates in IPL")
-    ax.set_ylabel("Strike Rate")
-    ax.set_xlabel("Player")
-    plt.xticks(rotation=45)
-    return fig
-def plot_most_six_in_IPL(df, n=10):
-    data = an.most_six_by_player(df, n)
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='batter', y='sixes', data=data, ax=ax)
-    ax.set_title('Most 6s by Player in IPL')
-    ax.set_xlabel('Player Name')
-    ax.set_ylabel('6s')
-    ax.tick_params(axis='x', rotation=80)
-    fig.tight_layout()
-    return fig
-
-def plot_most_four_in_IPL(df, n=10):
-    data = an.most_fours_by_player(df, n)
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.barplot(x='batter', y='fours', data=data, ax=ax)
-    ax.set_title('Most 4s by Player in IPL')
-    ax.set_xlabel('Player Name')
-    ax.set_ylabel('4s')
-    ax.tick_params(axis='x', rotation=80)
-    fig.tight_layout()
-    return fig
-
-import plotly.graph_objects as go
-
-def plot_bowler_headtohead(df, player1, player2, start_year=None, end_year=None):
-    df = an.bowler_headtohead(df, player1, player2, start_year, end_year)
-    df_copy = df.copy()
-    df = normalize_dataframe(df)
-    metrices = [col for col in df.columns if col != 'Bowler' and df[col].dtype != 'object']
-
-    fig = go.Figure()
-
-    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
-
-    for i, (_, row) in enumerate(df.iterrows()):
-        values = [row[m] for m in metrices]
-        values.append(values[0])  
-        color = colors[i % len(colors)]  
-        fig.add_trace(go.Scatterpolar(
-            r=values,
-            theta=metrices + [metrices[0]],
-            fill='toself',
-            name=row['Bowler'],
-            line=dict(color=color),
-            fillcolor=color,
-            opacity=0.6
-        ))
-
-    fig.update_layout(
-        title='Bowler vs Bowler – Normalized Radar Comparison',
-        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
-        showlegend=True
-    )
-
-    return fig
-
-def plot_team_season_performance(df,teamname):
-    result_df=an.team_season_performance(df,teamname)
-
-    fig, ax = plt.subplots(figsize=(12, 8))  
-    sns.lineplot(x='season', y='win %', data=result_df, ax=ax)
-    ax.set_title("Team Performance Season-wise")
-    ax.set_xlabel("Season / Years")
-    ax.set_ylabel("Winning Rate")
-    fig.tight_layout()
-
-    return fig 
-def plot_team_head_to_head(df,team_name1,team_name2,start_year=None,end_year=None):
-    result=an.head_to_head(df,team_name1,team_name2,start_year,end_year)
-    keys = [f'{team_name1.title()} Wins', f'{team_name2.title()} Wins']
-    values = [result.get(keys[0], 0), result.get(keys[1], 0)]
-
-    
-    data = pd.DataFrame({
-        'Team': keys,
-        'Wins': values
+        table = ag.get(df, 'batting_by_season')
+        if season is not None:
+            table = table[table.index.get_level_values('season') == season]
+    if min_balls:
+        table = table[table['balls'] >= min_balls]
+
+    if per_season:
+        rank = table.groupby(level='season', observed=True)[metric].rank(method='first', ascending=False)
+        top = table[rank <= n].assign(_rank=rank[rank <= n])
+        top = top.sort_values(['season', '_rank']).drop(columns='_rank')
+    else:
+        top = table.loc[table[metric].nlargest(n).index]
+    return _plain(top.reset_index())
+
+
+@traced
+@cached
+def top_batsmen_by_season(df, season='all', n=10):
+    """Top ``n`` run scorers of one season, or of every season when ``season='all'``."""
+    if season == 'all':
+        top = leaderboard(df, 'runs', n, per_season=True)
+    else:
+        top = leaderboard(df, 'runs', n, season=season)
+    return top[['season', 'batter', 'runs']].rename(columns={'runs': 'batsman_runs'})
+
+
+@traced
+@cached
+def batsman_growth_by_season(df, player_name):
+    rows = _slice(ag.get(df, 'batting'), player_name)
+    if rows.empty:
+        return pd.DataFrame(columns=['Season', 'Runs', 'Balls', 'Strike Rate', '4s', '6s'])
+    growth = rows.groupby(level='season', observed=True)[['runs', 'balls', 'fours', 'sixes']].sum()
+    growth = growth.reset_index()
+    growth['Strike Rate'] = (growth['runs'] / growth['balls'].where(growth['balls'] > 0) * 100).round(2)
+    growth = growth.rename(columns={'season': 'Season', 'runs': 'Runs', 'balls': 'Balls', 'fours': '4s', 'sixes': '6s'})
+    return growth[['Season', 'Runs', 'Balls', 'Strike Rate', '4s', '6s']]
+
+
+@traced
+@cached
+def compare_batsman_growth(df, player1, player2):
+    frames = []
+    for player in (player1, player2):
+        frames.append(batsman_growth_by_season(df, player).assign(player=player))
+    return pd.concat(frames, ignore_index=True)
+
+
+@traced
+@cached
+def most_runs_by_IPL(df):
+    runs = ag.get(df, 'batting_career')['runs'].sort_values(ascending=False, kind='stable')
+    return _plain(runs.rename('player_runs').rename_axis('player').reset_index())
+
+
+@traced
+@cached
+def player_against_teams(df, player_name, team_name, season='all'):
+    if season == 'all':
+        rows = _slice(ag.get(df, 'batting'), player_name, opponent=team_name)
+    else:
+        rows = _slice(ag.get(df, 'batting'), player_name, season, season, opponent=team_name)
+    tot = rows.sum()
+    return pd.DataFrame([{
+        'Player': player_name,
+        'Against Team': team_name,
+        'Season': season,
+        'Total Runs': int(tot['runs']),
+        'Balls Faced': int(tot['balls']),
+        'Dismissals': int(tot['dismissals']),
+        'Strike Rate': _ratio(tot['runs'], tot['balls'], 100) if tot['balls'] else 0,
+        'Fours': int(tot['fours']),
+        'Sixes': int(tot['sixes']),
+    }])
+
+
+@traced
+@cached
+def player_head_to_head(df, player1, player2, start_year=None, end_year=None):
+    frames = []
+    for player in (player1, player2):
+        stats = player_analysis(df, player, start_year, end_year)
+        if stats.empty:
+            stats = pd.DataFrame([{'Player': player, 'Matches': 0, 'Runs': 0, 'Average': 'NA',
+                                   'Strike Rate': 'NA', '50s': 0, '100s': 0, '4s': 0, '6s': 0}])
+        frames.append(stats)
+    cols = ['Player', 'Matches', 'Runs', 'Average', 'Strike Rate', '50s', '100s', '4s', '6s']
+    return pd.concat(frames, ignore_index=True)[cols]
+
+
+@traced
+@cached
+def most_strikerate_by_players(df, n=10, min_balls=100):
+    top = leaderboard(df, 'strike_rate', n, min_balls=min_balls)
+    top = top.rename(columns={'batter': 'Player', 'runs': 'Runs', 'balls': 'Balls', 'strike_rate': 'Strike Rate'})
+    return top[['Player', 'Runs', 'Balls', 'Strike Rate']]
+
+
+@traced
+@cached
+def most_six_by_player(df, n=10):
+    return leaderboard(df, 'sixes', n)[['batter', 'sixes']]
+
+
+@traced
+@cached
+def most_fours_by_player(df, n=10):
+    return leaderboard(df, 'fours', n)[['batter', 'fours']]
+
+
+# ---------------- Bowler ----------------
+def _bowling_summary(rows, bowler_name, na='NA'):
+    tot = rows.sum()
+    balls, runs, wickets = int(tot['balls']), int(tot['runs']), int(tot['wickets'])
+    return {
+        'Bowler': bowler_name,
+        'Matches': int(tot['innings']),
+        'Overs': f"{balls // 6}.{balls % 6}",
+        'Runs': runs,
+        'Wickets': wickets,
+        'Economy': _ratio(runs, balls, 6, na=na),
+        'Average': _ratio(runs, wickets, na=na),
+        'Strike Rate': _ratio(balls, wickets, na=na),
+        'Dot %': _ratio(int(tot['dots']), balls, 100, na=na),
+    }
+
+
+@traced
+@cached
+def bowler_record(df, bowler_name, start_year=None, end_year=None):
+    rows = _slice(ag.get(df, 'bowling'), bowler_name, start_year, end_year)
+    if rows.empty:
+        raise ValueError(f"No bowling data for {bowler_name} between {start_year} and {end_year}")
+    seasons = rows.index.get_level_values('season')
+    record = _bowling_summary(rows, bowler_name)
+    record.update({'From': seasons.min(), 'To': seasons.max()})
+    cols = ['Bowler', 'From', 'To', 'Matches', 'Overs', 'Runs', 'Wickets', 'Economy', 'Average', 'Strike Rate', 'Dot %']
+    return pd.DataFrame([record])[cols]
+
+
+@traced
+@cached
+def bowler_headtohead(df, bowler1, bowler2, start_year=None, end_year=None):
+    """Side-by-side bowling numbers; missing ratios are NaN so the radar chart can normalize them."""
+    cube = ag.get(df, 'bowling')
+    records = []
+    for bowler in (bowler1, bowler2):
+        record = _bowling_summary(_slice(cube, bowler, start_year, end_year), bowler, na=np.nan)
+        del record['Overs']
+        records.append(record)
+    return pd.DataFrame(records)
+
+
+@traced
+@cached
+def economy_rate(df, team_name, min_balls=60):
+    """Bowlers of ``team_name`` by career economy, best first (min. ``min_balls`` legal balls)."""
+    team = ag.get(df, 'economy_by_team').get(team_name)
+    if team is None:
+        return pd.Series(dtype=float, name='economy')
+    return team.loc[team['balls'] >= min_balls, 'economy'].round(2)
+
+
+# ---------------- Phases ----------------
+def _phase_totals(rows):
+    """``rows`` of a phase table summed per phase, with every phase present (zeros where none)."""
+    totals = rows.groupby(level='phase', observed=True).sum()
+    return totals.reindex(pd.CategoricalIndex(ag.PHASES, categories=ag.PHASES, ordered=True, name='phase'), fill_value=0)
+
+
+def _pct(count, balls, scale=100):
+    return (count / balls.where(balls > 0) * scale).round(2)
+
+
+def _batting_phase_table(rows):
+    t = _phase_totals(rows)
+    return pd.DataFrame({
+        'Phase': ag.PHASES,
+        'Runs': t['runs'].to_numpy(),
+        'Balls': t['balls'].to_numpy(),
+        'Dismissals': t['dismissals'].to_numpy(),
+        'Strike Rate': _pct(t['runs'], t['balls']).to_numpy(),
+        'Dot %': _pct(t['dots'], t['balls']).to_numpy(),
+        'Boundary %': _pct(t['fours'] + t['sixes'], t['balls']).to_numpy(),
+    })
+
+
+def _bowling_phase_table(rows):
+    t = _phase_totals(rows)
+    return pd.DataFrame({
+        'Phase': ag.PHASES,
+        'Balls': t['balls'].to_numpy(),
+        'Runs': t['runs'].to_numpy(),
+        'Wickets': t['wickets'].to_numpy(),
+        'Economy': _pct(t['runs'], t['balls'], 6).to_numpy(),
+        'Dot %': _pct(t['dots'], t['balls']).to_numpy(),
+        'Boundary %': _pct(t['fours'] + t['sixes'], t['balls']).to_numpy(),
     })
-    
-    fig , ax= plt.subplots(figsize=(12,8))
-    sns.barplot(x='Team',y='Wins',data=data,ax=ax, palette='Set2')
-    ax.set_title(f"{team_name1} Vs {team_name2} ")
-    ax.set_xlabel("teams")
-    ax.set_ylabel("Number of wins")
-    ax.bar_label(ax.containers[0],fmt='%d')
-    fig.tight_layout()
-    return fig 
+
+
+def _team_rows(table, level, team_name, start_year=None, end_year=None):
+    mask = _season_mask(table.index.get_level_values('season'), start_year, end_year)
+    mask &= np.asarray(table.index.get_level_values(level) == team_name)
+    return table[mask]
+
+
+@traced
+@cached
+def batting_by_phase(df, player_name, start_year=None, end_year=None):
+    """Runs, balls, strike rate, dot % and boundary % of ``player_name`` in the powerplay, middle and death overs."""
+    return _batting_phase_table(_slice(ag.get(df, 'batting_phases'), player_name, start_year, end_year))
+
+
+@traced
+@cached
+def bowling_by_phase(df, bowler_name, start_year=None, end_year=None):
+    """Balls, runs, wickets, economy, dot % and boundary % of ``bowler_name`` per phase."""
+    return _bowling_phase_table(_slice(ag.get(df, 'bowling_phases'), bowler_name, start_year, end_year))
+
+
+@traced
+@cached
+def team_phase_stats(df, team_name, start_year=None, end_year=None):
+    """``team_name``'s batting and bowling per phase, side by side."""
+    batting = _batting_phase_table(_team_rows(ag.get(df, 'batting_phases'), 'batting_team', team_name,
+                                              start_year, end_year))
+    bowling = _bowling_phase_table(_team_rows(ag.get(df, 'bowling_phases'), 'bowling_team', team_name,
+                                              start_year, end_year))
+    return pd.DataFrame({
+        'Phase': ag.PHASES,
+        'Strike Rate': batting['Strike Rate'],
+        'Bat Dot %': batting['Dot %'],
+        'Bat Boundary %': batting['Boundary %'],
+        'Wickets Lost': batting['Dismissals'],
+        'Economy': bowling['Economy'],
+        'Bowl Dot %': bowling['Dot %'],
+        'Bowl Boundary %': bowling['Boundary %'],
+        'Wickets Taken': bowling['Wickets'],
+    })
+
+
+@traced
+@cached
+def team_phase_by_season(df, team_name, side='batting'):
+    """
+    Season x phase table of ``team_name``'s strike rate (``side='batting'``)
+    or economy (``side='bowling'``).
+    """
+    if side == 'batting':
+        rows = _team_rows(ag.get(df, 'batting_phases'), 'batting_team', team_name)
+        scale = 100
+    elif side == 'bowling':
+        rows = _team_rows(ag.get(df, 'bowling_phases'), 'bowling_team', team_name)
+        scale = 6
+    else:
+        raise ValueError(f"side must be 'batting' or 'bowling', not {side!r}")
+    totals = rows.groupby(level=['season', 'phase'], observed=True)[['runs', 'balls']].sum()
+    rate = _pct(totals['runs'], totals['balls'], scale).unstack('phase')
+    rate = rate.reindex(columns=pd.CategoricalIndex(ag.PHASES, categories=ag.PHASES, ordered=True, name='phase'))
+    rate.columns = rate.columns.astype(object)
+    return rate
+
+
+# ---------------- Form ----------------
+FORM_WINDOW = 10
+FORM_ROLES = ('batting', 'bowling')
+
+
+def _last(cum, n):
+    """Sum of the last ``n`` rows (per player/team, the first index level) from a running total."""
+    return cum - cum.groupby(level=0, observed=True).shift(n, fill_value=0)
+
+
+def _form_rows(df, table, name, start_year=None, end_year=None):
+    rows = _slice(ag.get(df, table), name)
+    return rows, _season_mask(rows.index.get_level_values('season'), start_year, end_year)
+
+
+@traced
+@cached
+def batting_form(df, player_name, n=FORM_WINDOW, start_year=None, end_year=None):
+    """
+    ``player_name``'s innings in match order, each with the runs, strike rate
+    and average over the last ``n`` innings (counted across seasons) and the
+    number of innings in a row without a fifty.
+    """
+    rows, mask = _form_rows(df, 'batting_form', player_name, start_year, end_year)
+    runs, balls, outs = (_last(rows[f'cum_{col}'], n) for col in ('runs', 'balls', 'outs'))
+    return pd.DataFrame({
+        'Innings': rows['number'].to_numpy(),
+        'Season': rows.index.get_level_values('season'),
+        'Match': rows.index.get_level_values('match_id'),
+        'Runs': rows['runs'].to_numpy(),
+        'Balls': rows['balls'].to_numpy(),
+        'Out': rows['outs'].to_numpy() > 0,
+        'Rolling Runs': runs.to_numpy(),
+        'Rolling Strike Rate': _pct(runs, balls).to_numpy(),
+        'Rolling Average': _pct(runs, outs, 1).to_numpy(),
+        'Innings Without 50': rows['drought'].to_numpy(),
+    })[mask].reset_index(drop=True)
+
+
+@traced
+@cached
+def bowling_form(df, bowler_name, n=FORM_WINDOW, start_year=None, end_year=None):
+    """
+    ``bowler_name``'s innings in match order, each with the wickets and
+    economy over the last ``n`` innings and the number of wicketless innings
+    in a row.
+    """
+    rows, mask = _form_rows(df, 'bowling_form', bowler_name, start_year, end_year)
+    balls, runs, wickets = (_last(rows[f'cum_{col}'], n) for col in ('balls', 'runs', 'wickets'))
+    return pd.DataFrame({
+        'Innings': rows['number'].to_numpy(),
+        'Season': rows.index.get_level_values('season'),
+        'Match': rows.index.get_level_values('match_id'),
+        'Balls': rows['balls'].to_numpy(),
+        'Runs': rows['runs'].to_numpy(),
+        'Wickets': rows['wickets'].to_numpy(),
+        'Rolling Wickets': wickets.to_numpy(),
+        'Rolling Economy': _pct(runs, balls, 6).to_numpy(),
+        'Wicketless Innings': rows['drought'].to_numpy(),
+    })[mask].reset_index(drop=True)
+
+
+def _win_pct(won, lost):
+    decided = won + lost
+    return (won / decided.where(decided > 0) * 100).round(2)
+
+
+def _streak_label(streak):
+    streak = np.asarray(streak)
+    count = np.abs(streak).astype(str).astype(object)
+    return np.where(streak > 0, 'W' + count, np.where(streak < 0, 'L' + count, 'NR'))
+
+
+@traced
+@cached
+def team_form(df, team_name, n=FORM_WINDOW, start_year=None, end_year=None):
+    """
+    ``team_name``'s matches in order, each with the win % over the last
+    ``n`` matches (no-results left out) and the streak after it: +k after k
+    wins in a row, -k after k losses, 0 after a no-result.
+    """
+    rows, mask = _form_rows(df, 'team_form', team_name, start_year, end_year)
+    result = np.where(rows['won'] > 0, 'Won', np.where(rows['lost'] > 0, 'Lost', 'No Result'))
+    return pd.DataFrame({
+        'Match #': rows['number'].to_numpy(),
+        'Season': rows.index.get_level_values('season'),
+        'Match': rows.index.get_level_values('match_id'),
+        'Opponent': rows['opponent'].astype(object).to_numpy(),
+        'Result': result,
+        'Rolling Win %': _win_pct(_last(rows['cum_won'], n), _last(rows['cum_lost'], n)).to_numpy(),
+        'Streak': rows['streak'].to_numpy(),
+        'Winless Run': rows['drought'].to_numpy(),
+    })[mask].reset_index(drop=True)
+
+
+def _current(table, n):
+    """Each player's (or team's) latest row, the longest drought they ever had, and their totals over the last ``n`` rows."""
+    group = table.groupby(level=0, observed=True)
+    cums = [col for col in table.columns if col.startswith('cum_')]
+    last = table[cums].sub(group[cums].shift(n, fill_value=0))
+    last.columns = [col[len('cum_'):] for col in cums]
+    latest = group.tail(1)
+    latest = latest.drop(columns=cums + list(last.columns)).join(last)
+    latest = latest.join(group['drought'].max().rename('longest_drought'))
+    return latest.reset_index(level=[1, 2])
+
+
+@traced
+@cached
+def in_form(df, role='batting', n=FORM_WINDOW, top=10):
+    """
+    Leaderboard of the players in best form over their last ``n`` innings:
+    most runs (``role='batting'``) or wickets (``role='bowling'``), among
+    players who played in the latest season and have at least ``n`` innings.
+    """
+    if role not in FORM_ROLES:
+        raise ValueError(f"role must be one of {', '.join(FORM_ROLES)}, not {role!r}")
+    table = ag.get(df, f'{role}_form')
+    latest = _current(table, n)
+    latest = latest[(latest['season'] == table.index.get_level_values('season').max()) & (latest['number'] >= n)]
+    if role == 'batting':
+        board = pd.DataFrame({
+            'Innings': latest['number'],
+            'Runs': latest['runs'],
+            'Strike Rate': _pct(latest['runs'], latest['balls']),
+            'Average': _pct(latest['runs'], latest['outs'], 1),
+            'Innings Without 50': latest['drought'],
+            'Longest Without 50': latest['longest_drought'],
+        })
+        board = board.sort_values(['Runs', 'Strike Rate'], ascending=False, kind='stable')
+    else:
+        board = pd.DataFrame({
+            'Innings': latest['number'],
+            'Wickets': latest['wickets'],
+            'Economy': _pct(latest['runs'], latest['balls'], 6),
+            'Wicketless Innings': latest['drought'],
+            'Longest Wicketless': latest['longest_drought'],
+        })
+        board = board.sort_values(['Wickets', 'Economy'], ascending=[False, True], kind='stable')
+    board.index = board.index.astype(object)
+    return board.head(top).rename_axis('Player').reset_index()
+
+
+@traced
+@cached
+def team_streaks(df, n=FORM_WINDOW):
+    """Every team's current streak, longest winning and losing streaks, longest winless run and win % over its last ``n`` matches."""
+    table = ag.get(df, 'team_form')
+    latest = _current(table, n)
+    streaks = table['streak'].groupby(level=0, observed=True).agg(['max', 'min']).reindex(latest.index)
+    board = pd.DataFrame({
+        'Last Season': latest['season'],
+        'Matches': latest['number'],
+        'Current Streak': _streak_label(latest['streak']),
+        'Longest Winning Streak': streaks['max'].clip(lower=0),
+        'Longest Losing Streak': -streaks['min'].clip(upper=0),
+        'Longest Winless Run': latest['longest_drought'],
+        'Recent Win %': _win_pct(latest['won'], latest['lost']),
+    })
+    board.index = board.index.astype(object)
+    board = board.sort_values(['Last Season', 'Recent Win %'], ascending=False, kind='stable')
+    return board.rename_axis('Team').reset_index()
+
+
+# ---------------- Similar players ----------------
+PROFILE_ROLES = ('batting', 'bowling')
+
+
+def _profiles(df, role):
+    if role not in PROFILE_ROLES:
+        raise ValueError(f"role must be one of {', '.join(PROFILE_ROLES)}, not {role!r}")
+    return ag.get(df, f'{role}_profiles')
+
+
+@traced
+@cached
+def profiled_players(df, role='batting'):
+    """Players with enough balls faced (or bowled) to be in the ``role`` similarity index."""
+    return sorted(_profiles(df, role).features.index)
+
+
+@traced
+@cached
+def similar_players(df, player_name, k=10, role='batting'):
+    """The ``k`` players whose ``role`` career profile is closest to ``player_name``'s, nearest first."""
+    index = _profiles(df, role)
+    if player_name not in index:
+        raise ValueError(f"{player_name} has fewer than {ag.PROFILE_MIN_BALLS} balls to build a {role} profile from")
+    nearest = index.query(player_name, k)
+    table = index.features.loc[nearest.index].round(2)
+    table.insert(0, 'Distance', nearest.round(3).to_numpy())
+    return table.rename_axis('Player').reset_index()
+
+
+@traced
+@cached
+def profile_percentiles(df, players, role='batting'):
+    """Percentile (0-1, among every profiled player) of each profile feature for ``players``."""
+    index = _profiles(df, role)
+    missing = [player for player in players if player not in index]
+    if missing:
+        raise ValueError(f"No {role} profile for {', '.join(missing)}")
+    return index.percentiles.loc[list(players)].rename_axis('Player').reset_index()
+
+
+# ---------------- Batter vs bowler ----------------
+MATCHUP_METRICS = ('balls', 'runs', 'dismissals', 'dots', 'fours', 'sixes', 'strike_rate', 'dot_pct')
+
+
+def _with_matchup_rates(rows):
+    balls = rows['balls'].where(rows['balls'] > 0)
+    return rows.assign(strike_rate=(rows['runs'] / balls * 100).round(2),
+                       dot_pct=(rows['dots'] / balls * 100).round(2))
+
+
+@traced
+@cached
+def matchup(df, batter, bowler):
+    """``batter`` against ``bowler``: one lookup in the matchups table (all zeros if they never met)."""
+    try:
+        row = ag.get(df, 'matchups').loc[(batter, bowler)]
+    except KeyError:
+        row = pd.Series(0, index=ag.get(df, 'matchups').columns)
+    balls, runs, dismissals = int(row['balls']), int(row['runs']), int(row['dismissals'])
+    return pd.DataFrame([{
+        'Batter': batter,
+        'Bowler': bowler,
+        'Balls': balls,
+        'Runs': runs,
+        'Dismissals': dismissals,
+        'Strike Rate': _ratio(runs, balls, 100),
+        'Average': _ratio(runs, dismissals),
+        'Dot %': _ratio(int(row['dots']), balls, 100),
+        'Fours': int(row['fours']),
+        'Sixes': int(row['sixes']),
+    }])
+
+
+@traced
+@cached
+def toughest_bowlers(df, batter, n=10, min_balls=12):
+    """
+    The bowlers ``batter`` has struggled against most (min. ``min_balls``
+    balls faced): most dismissals first, then lowest strike rate.
+    """
+    table = ag.get(df, 'matchups')
+    try:
+        rows = table.xs(batter, level='batter')
+    except KeyError:
+        rows = table.iloc[0:0].droplevel('batter')
+    rows = _with_matchup_rates(rows[rows['balls'] >= min_balls])
+    rows = rows.sort_values(['dismissals', 'strike_rate'], ascending=[False, True], kind='stable').head(n)
+    return _plain(rows.reset_index())
+
+
+@traced
+@cached
+def matchup_matrix(df, metric='strike_rate', n=15, min_balls=6):
+    """
+    ``metric`` as a batter x bowler grid: the ``n`` batters who faced the most
+    balls against the ``n`` bowlers who bowled the most to them. Pairs with
+    fewer than ``min_balls`` balls are NaN. Only this slice is made dense.
+    """
+    if metric not in MATCHUP_METRICS:
+        raise ValueError(f"Unknown metric {metric!r}; expected one of {', '.join(MATCHUP_METRICS)}")
+    table = ag.get(df, 'matchups')
+    batters = table.groupby(level='batter', observed=True)['balls'].sum().nlargest(n).index
+    rows = table[table.index.get_level_values('batter').isin(batters)]
+    bowlers = rows.groupby(level='bowler', observed=True)['balls'].sum().nlargest(n).index
+    rows = rows[rows.index.get_level_values('bowler').isin(bowlers)]
+    rows = _with_matchup_rates(rows[rows['balls'] >= min_balls])
+    grid = rows[metric].unstack('bowler')
+    grid = grid.reindex(index=batters, columns=bowlers)
+    grid.index = grid.index.astype(object)
+    grid.columns = grid.columns.astype(object)
+    return grid
+
+
+# ---------------- Team ----------------
+def _results(df, team_name=None, start_year=None, end_year=None, opponent=None):
+    return _slice(ag.get(df, 'team_results'), team_name, start_year, end_year, opponent)
+
+
+def _win_table(rows, level):
+    table = rows.groupby(level=level, observed=True).sum()
+    decided = table['wins'] + table['losses']
+    table['win %'] = (table['wins'] / decided.where(decided > 0) * 100).round(2)
+    return table.rename(columns={'matches': 'Matches', 'wins': 'Wins', 'losses': 'Losses', 'no_result': 'No Result'})
+
+
+@traced
+@cached
+def team_season_performance(df, team_name):
+    return _win_table(_results(df, team_name), 'season').reset_index()
+
+
+@traced
+@cached
+def head_to_head(df, team1, team2, start_year=None, end_year=None):
+    """Season-by-season results of ``team1`` against ``team2``."""
+    rows = _results(df, team1, start_year, end_year, opponent=team2)
+    table = _win_table(rows, 'season').reset_index()
+    table = table.rename(columns={'season': 'Season', 'Wins': f'{team1} Wins', 'Losses': f'{team2} Wins'})
+    return table[['Season', 'Matches', f'{team1} Wins', f'{team2} Wins', 'No Result']]
+
+
+@traced
+@cached
+def team_record(df, team_name):
+    """Returns (overall record, record against each opponent) for ``team_name``."""
+    rows = _results(df, team_name)
+    vs_opponent = _plain(_win_table(rows, 'opponent').rename_axis('Opponent').reset_index())
+    overall = vs_opponent[['Matches', 'Wins', 'Losses', 'No Result']].sum()
+    decided = overall['Wins'] + overall['Losses']
+    solo = pd.DataFrame([{'Team': team_name, **overall.to_dict(), 'win %': _ratio(overall['Wins'], decided, 100)}])
+    return solo, vs_opponent.sort_values('Matches', ascending=False, ignore_index=True)
+
+
+@traced
+@cached
+def key_players(df, team_name, start_year=None, end_year=None, n=5):
+    """
+    Returns (top ``n`` run scorers, top ``n`` wicket takers) for
+    ``team_name`` between ``start_year`` and ``end_year``.
+    """
+    bat = _team_rows(ag.get(df, 'batting_phases'), 'batting_team', team_name, start_year, end_year)
+    bat = bat.groupby(level='batter', observed=True)[['runs', 'balls']].sum().sort_index()
+    bat = bat.sort_values('runs', ascending=False, kind='stable').head(n)
+    batters = pd.DataFrame({
+        'Player': bat.index.astype(object),
+        'Runs': bat['runs'].to_numpy(),
+        'Balls': bat['balls'].to_numpy(),
+        'Strike Rate': _pct(bat['runs'], bat['balls']).to_numpy(),
+    })
+    bowl = _team_rows(ag.get(df, 'bowling_phases'), 'bowling_team', team_name, start_year, end_year)
+    bowl = bowl.groupby(level='bowler', observed=True)[['wickets', 'balls', 'runs']].sum().sort_index()
+    bowl = bowl.sort_values('wickets', ascending=False, kind='stable').head(n)
+    bowlers = pd.DataFrame({
+        'Player': bowl.index.astype(object),
+        'Wickets': bowl['wickets'].to_numpy(),
+        'Balls': bowl['balls'].to_numpy(),
+        'Economy': _pct(bowl['runs'], bowl['balls'], 6).to_numpy(),
+    })
+    return batters, bowlers
+
+
+@traced
+@cached
+def team_win_by_season(df):
+    wins = ag.get(df, 'team_results').groupby(level=['team', 'season'], observed=True)['wins'].sum()
+    return wins.unstack('season', fill_value=0)
+
+
+def _team_innings(df, team_name):
+    facts = ag.get(df, 'innings')
+    try:
+        return facts.xs(team_name, level=0, drop_level=False).reset_index()
+    except KeyError:
+        return facts.iloc[0:0].reset_index()
+
+
+def _best_per_opponent(innings):
+    best = innings.sort_values('total', ascending=False).drop_duplicates('bowling_team')
+    best = best.rename(columns={'bowling_team': 'Against', 'total': 'score', 'season': 'Season'})
+    return _plain(best.reset_index(drop=True))
+
+
+@traced
+@cached
+def highest_scores_by_team(df, team_name):
+    """Highest total ``team_name`` has made against each opponent."""
+    best = _best_per_opponent(_team_innings(df, team_name))
+    return best[['Against', 'score', 'wickets', 'overs', 'Season', 'venue']]
+
+
+@traced
+@cached
+def highest_chase_by_team(df, team_name):
+    """Highest successful chase by ``team_name`` against each opponent."""
+    innings = _team_innings(df, team_name)
+    chases = innings[(innings['inning'] == 2) & (innings['winner'].astype(object) == team_name)]
+    best = _best_per_opponent(chases)
+    return best[['Against', 'score', 'target', 'wickets', 'overs', 'Season', 'venue']]
+
+
+# ---------------- Partnerships ----------------
+def _partnership_rows(df, team_name=None, start_year=None, end_year=None, player_name=None):
+    table = ag.get(df, 'partnerships')
+    mask = _season_mask(table.index.get_level_values('season'), start_year, end_year)
+    if team_name is not None:
+        mask &= np.asarray(table.index.get_level_values('batting_team') == team_name)
+    if player_name is not None:
+        mask &= np.asarray((table['batter1'] == player_name) | (table['batter2'] == player_name))
+    return table[mask]
+
+
+def _stands(rows):
+    """One line per partnership, for listing individual stands."""
+    index = rows.index
+    return pd.DataFrame({
+        'Team': index.get_level_values('batting_team').astype(object),
+        'Season': index.get_level_values('season'),
+        'Match': index.get_level_values('match_id'),
+        'Inning': index.get_level_values('inning'),
+        'Wicket': index.get_level_values('wicket'),
+        'Batters': (rows['batter1'].astype(object) + ' & ' + rows['batter2'].astype(object)).to_numpy(),
+        'Runs': rows['runs'].to_numpy(),
+        'Balls': rows['balls'].to_numpy(),
+        'Run Rate': _pct(rows['runs'], rows['balls'], 6).to_numpy(),
+        'Against': rows['bowling_team'].astype(object).to_numpy(),
+        'Unbroken': rows['unbroken'].to_numpy() > 0,
+    })
+
+
+def _partnership_summary(rows, by):
+    """Partnerships grouped by ``by``: count, runs, balls, average (per completed stand), run rate, 50+/100+ stands, best."""
+    totals = rows.assign(completed=1 - rows['unbroken'], fifties=rows['runs'] >= 50, hundreds=rows['runs'] >= 100)
+    totals = totals.groupby(by, observed=True).agg(
+        partnerships=('runs', 'size'), runs=('runs', 'sum'), balls=('balls', 'sum'), completed=('completed', 'sum'),
+        fifties=('fifties', 'sum'), hundreds=('hundreds', 'sum'), best=('runs', 'max'))
+    return pd.DataFrame({
+        'Partnerships': totals['partnerships'],
+        'Runs': totals['runs'],
+        'Balls': totals['balls'],
+        'Average': _pct(totals['runs'], totals['completed'], 1),
+        'Run Rate': _pct(totals['runs'], totals['balls'], 6),
+        '50+': totals['fifties'],
+        '100+': totals['hundreds'],
+        'Best': totals['best'],
+    })
+
+
+@traced
+@cached
+def match_partnerships(df, match_id):
+    """Every partnership of ``match_id``, innings by innings, with each batter's share."""
+    table = ag.get(df, 'partnerships')
+    rows = table[np.asarray(table.index.get_level_values('match_id') == match_id)]
+    rows = rows.sort_index(level=['inning', 'wicket'], sort_remaining=False)
+    stands = _stands(rows)
+    stands.insert(stands.columns.get_loc('Runs') + 1, 'Split', (rows['batter1_runs'].astype(str) + ' + '
+                                                            + rows['batter2_runs'].astype(str)).to_numpy())
+    return stands.drop(columns=['Season', 'Match'])
+
+
+@traced
+@cached
+def top_partnerships(df, team_name=None, start_year=None, end_year=None, n=10):
+    """The ``n`` biggest partnerships (of ``team_name`` when given) between ``start_year`` and ``end_year``."""
+    stands = _stands(_partnership_rows(df, team_name, start_year, end_year))
+    return stands.sort_values(['Runs', 'Balls'], ascending=[False, True], kind='stable').head(n).reset_index(drop=True)
+
+
+@traced
+@cached
+def partnerships_by_wicket(df, team_name=None, start_year=None, end_year=None):
+    """Partnership record for each wicket (1 = openers), for ``team_name`` or every team."""
+    rows = _partnership_rows(df, team_name, start_year, end_year)
+    return _partnership_summary(rows, 'wicket').rename_axis('Wicket').reset_index()
+
+
+@traced
+@cached
+def batting_pairs(df, team_name=None, start_year=None, end_year=None, n=10, min_partnerships=5):
+    """Most productive batting pairs by runs together, among pairs with at least ``min_partnerships`` stands."""
+    rows = _partnership_rows(df, team_name, start_year, end_year)
+    pairs = _partnership_summary(rows, ['batter1', 'batter2'])
+    pairs = pairs[pairs['Partnerships'] >= min_partnerships]
+    pairs = pairs.sort_values(['Runs', 'Run Rate'], ascending=False, kind='stable').head(n)
+    names = pairs.index.to_frame(index=False).astype(object)
+    pairs.insert(0, 'Batters', (names['batter1'] + ' & ' + names['batter2']).to_numpy())
+    return pairs.reset_index(drop=True)
+
+
+@traced
+@cached
+def player_partnerships(df, player_name, start_year=None, end_year=None):
+    """``player_name``'s partnerships with each partner: totals, average, run rate and both batters' runs."""
+    rows = _partnership_rows(df, start_year=start_year, end_year=end_year, player_name=player_name)
+    first = (rows['batter1'] == player_name).to_numpy()
+    rows = rows.assign(
+        partner=np.where(first, rows['batter2'].astype(object), rows['batter1'].astype(object)),
+        own=np.where(first, rows['batter1_runs'], rows['batter2_runs']),
+        other=np.where(first, rows['batter2_runs'], rows['batter1_runs']))
+    table = _partnership_summary(rows, 'partner')
+    shares = rows.groupby('partner')[['own', 'other']].sum()
+    table.insert(3, f"{player_name}'s Runs", shares['own'])
+    table.insert(4, "Partner's Runs", shares['other'])
+    table = table.sort_values(['Runs', 'Partnerships'], ascending=False, kind='stable')
+    return table.rename_axis('Partner').reset_index()
+
+
+# ---------------- Win probability ----------------
+@traced
+@cached
+def win_probability(df, runs_needed, balls_left, wickets_in_hand):
+    """Chance (%) that a side needing ``runs_needed`` off ``balls_left`` with ``wickets_in_hand`` wins, from every past chase."""
+    return round(float(ag.get(df, 'win_model')(runs_needed, balls_left, wickets_in_hand)) * 100, 2)
+
+
+def _with_win_pct(df, balls):
+    chance = ag.get(df, 'win_model')(balls['runs_needed'], balls['balls_left'], balls['wickets'])
+    balls['Win %'] = (chance.astype('float64') * 100).round(2)
+    balls['Ball #'] = balls.groupby('match_id', sort=False).cumcount() + 1
+    return balls
+
+
+@traced
+@cached
+def chase_curve(df, match_id):
+    """The chasing side's win % before every delivery of ``match_id``'s second innings."""
+    balls = _with_win_pct(df, ag.get(df, 'chase_balls').loc[match_id:match_id].reset_index())
+    return pd.DataFrame({
+        'Ball #': balls['Ball #'],
+        'Over': balls['over'].astype(str) + '.' + balls['ball'].astype(str),
+        'Runs Needed': balls['runs_needed'],
+        'Balls Left': balls['balls_left'],
+        'Wickets In Hand': balls['wickets'],
+        'Win %': balls['Win %'],
+    })
+
+
+def _season_innings(df, season, team_name=None):
+    facts = ag.get(df, 'innings')
+    mask = _season_mask(facts.index.get_level_values('season'), season, season)
+    if team_name is not None:
+        mask &= np.asarray((facts.index.get_level_values('batting_team') == team_name)
+                           | (facts['bowling_team'] == team_name))
+    return facts.loc[mask]
+
+
+def _season_chases(df, season, team_name=None):
+    """The decided second innings of ``season`` (involving ``team_name``), indexed by match_id in match order."""
+    facts = _season_innings(df, season, team_name).reset_index()
+    winner = facts['winner'].astype(object)
+    decided = winner.notna() & ~winner.isin(['', 'NA', 'No Result', 'no result'])
+    facts = facts[facts['inning'].eq(2) & facts['target'].notna() & decided]
+    return facts.set_index('match_id').sort_index()
+
+
+@traced
+@cached
+def season_chase_list(df, season, team_name=None):
+    """The decided chases in ``season`` (Match, Chasing, Target, Defending) without scoring them, for picking one."""
+    facts = _season_chases(df, season, team_name)
+    return pd.DataFrame({
+        'Match': facts.index.to_numpy(),
+        'Chasing': facts['batting_team'].astype(object).to_numpy(),
+        'Target': facts['target'].astype('int32').to_numpy(),
+        'Defending': facts['bowling_team'].astype(object).to_numpy(),
+    })
+
+
+@traced
+@cached
+def chase_curves(df, season, team_name=None):
+    """
+    Win-% curves of every decided chase in ``season`` (only those involving
+    ``team_name`` when given), scored in one batched lookup: one row per
+    delivery with Match, Chasing, Defending, Ball #, Win % and Won.
+    """
+    facts = _season_chases(df, season, team_name)
+    balls = ag.get(df, 'chase_balls')
+    balls = _with_win_pct(df, balls[balls.index.isin(facts.index)].reset_index())
+    return pd.DataFrame({
+        'Match': balls['match_id'],
+        'Chasing': balls['match_id'].map(facts['batting_team']).astype(object),
+        'Defending': balls['match_id'].map(facts['bowling_team']).astype(object),
+        'Ball #': balls['Ball #'],
+        'Win %': balls['Win %'],
+        'Won': balls['won'].astype(bool),
+    })
+
+
+@traced
+@cached
+def season_chases(df, season, team_name=None):
+    """Every decided chase in ``season`` with its target, result and the lowest and highest win % the chasing side had along the way."""
+    curves = chase_curves(df, season, team_name)
+    chases = curves.groupby('Match', sort=False).agg(
+        Chasing=('Chasing', 'first'), Defending=('Defending', 'first'), Won=('Won', 'first'),
+        **{'Lowest Win %': ('Win %', 'min'), 'Highest Win %': ('Win %', 'max')})
+    target = ag.get(df, 'innings').set_index('match_id')['target'].dropna()
+    chases.insert(2, 'Target', chases.index.map(target).astype('int32'))
+    return chases.reset_index()
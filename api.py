@@ -0,0 +1,374 @@
+"""
+HTTP API over analysis.py for tools that want the dashboard's numbers.
+
+Usage:
+    python api.py --data datasets/cleanandmerged.csv --port 8000
+    curl 'localhost:8000/head_to_head?team1=Mumbai+Indians&team2=Chennai+Super+Kings&start_year=2015'
+    curl -H 'Accept: application/vnd.apache.arrow.stream' 'localhost:8000/player_analysis?player_name=V+Kohli'
+
+Every public analysis function is an endpoint of the same name and its
+parameters are query parameters, converted to the type of their default.
+Seasons must be one of the dataset's seasons and list parameters are
+repeated. ``GET /`` lists the endpoints and ``GET /health`` reports the
+dataset version and cache statistics.
+
+JSON responses carry the result as a Table Schema document (pandas
+``orient='table'``), so column types travel with the rows. Functions
+returning two tables give a list of two. ``Accept:
+application/vnd.apache.arrow.stream`` (or ``?format=arrow``) returns an
+Arrow IPC stream instead.
+
+ETags are built from the dataset version and the normalized request.
+If-None-Match is answered with 304 before anything is computed, and
+appended matches, picked up by ``dl.refresh`` every ``IPL_API_REFRESH``
+seconds, change every ETag.
+
+One asyncio event loop accepts connections and parses requests, with
+HTTP/1.1 keep-alive. Analysis calls and encoding run on ``IPL_API_WORKERS``
+threads, so cached answers and 304s are not held up by a slow query.
+Identical requests in flight share one computation. Every request uses the
+same loaded dataset, the process-wide result cache (memo.results), and a
+cache of encoded bodies (``IPL_API_CACHE_MB``).
+"""
+import argparse
+import asyncio
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import pandas as pd
+
+import aggregates as ag
+import analysis as an
+import data_loader as dl
+import memo
+
+API_WORKERS = int(os.getenv('IPL_API_WORKERS', '4'))
+REFRESH_INTERVAL = float(os.getenv('IPL_API_REFRESH', '5'))  # seconds between checks for appended matches
+bodies = memo.ResultCache(int(float(os.getenv('IPL_API_CACHE_MB', '64')) * 2**20))
+
+JSON = 'application/json'
+ARROW = 'application/vnd.apache.arrow.stream'
+MAX_HEADERS = 100
+
+# Parameters whose type is not the type of their default.
+PARAM_TYPES = {
+    'start_year': 'season', 'end_year': 'season', 'season': 'season',
+    'players': 'list', 'within': 'set',
+    'runs_needed': 'int', 'balls_left': 'int', 'wickets_in_hand': 'int', 'match_id': 'int',
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _param_type(param):
+    if param.name in PARAM_TYPES:
+        return PARAM_TYPES[param.name]
+    if isinstance(param.default, bool):
+        return 'bool'
+    if isinstance(param.default, int):
+        return 'int'
+    return 'str'
+
+
+def endpoints():
+    """{name: (function, {parameter: (type, default)})} for every public analysis function."""
+    found = {}
+    for name, fn in inspect.getmembers(an, inspect.isfunction):
+        if fn.__module__ != an.__name__ or name.startswith('_'):
+            continue
+        params = list(inspect.signature(fn).parameters.values())[1:]  # all but df
+        found[name] = (fn, {p.name: (_param_type(p), p.default) for p in params})
+    return found
+
+
+def _convert(name, kind, values, seasons):
+    if kind == 'list':
+        return tuple(values)
+    if kind == 'set':
+        return frozenset(values)
+    value = values[-1]
+    if kind == 'int':
+        try:
+            return int(value)
+        except ValueError:
+            raise HTTPError(400, f"{name} must be an integer, not {value!r}") from None
+    if kind == 'bool':
+        if value.lower() in ('1', 'true', 'yes'):
+            return True
+        if value.lower() in ('0', 'false', 'no'):
+            return False
+        raise HTTPError(400, f"{name} must be true or false, not {value!r}")
+    if kind == 'season':
+        if value == 'all':
+            return value
+        for season in seasons:
+            if str(season) == value:
+                return season
+        raise HTTPError(400, f"{name}: no season {value!r} in the data")
+    return value
+
+
+def _canonical(value):
+    if isinstance(value, frozenset):
+        return sorted(value)
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _etag(version, name, kwargs, fmt):
+    request = json.dumps([name, sorted((k, _canonical(v)) for k, v in kwargs.items()), fmt], default=str)
+    return f'"{version}-{hashlib.sha1(request.encode()).hexdigest()[:16]}"'
+
+
+# ---------------- Encoding ----------------
+def _table(result):
+    """``result`` as a frame with a default index, plain (non-categorical) columns and string column names."""
+    frame = result.to_frame() if isinstance(result, pd.Series) else result
+    if not isinstance(frame.index, pd.RangeIndex):
+        frame = frame.reset_index()
+    cats = frame.select_dtypes('category').columns
+    frame = frame.astype({col: object for col in cats}) if len(cats) else frame
+    frame.columns = [str(col) for col in frame.columns]
+    return frame
+
+
+def _json_value(value):
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def encode_json(result, meta):
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        payload = _table(result).to_json(orient='table', index=False)
+    elif isinstance(result, tuple) and all(isinstance(part, (pd.DataFrame, pd.Series)) for part in result):
+        payload = '[' + ','.join(_table(part).to_json(orient='table', index=False) for part in result) + ']'
+    else:
+        payload = json.dumps(result, default=_json_value)
+    return (json.dumps(meta, separators=(',', ':'))[:-1] + ',"result":' + payload + '}').encode()
+
+
+def _arrow_table(frame):
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Columns mixing numbers and 'NA' markers become strings.
+        mixed = {}
+        for col in frame.columns:
+            try:
+                pa.array(frame[col], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                mixed[col] = frame[col].map(lambda v: None if v is None or v != v else str(v))
+        return pa.Table.from_pandas(frame.assign(**mixed), preserve_index=False)
+
+
+def encode_arrow(result):
+    import pyarrow as pa
+
+    if isinstance(result, tuple):
+        raise HTTPError(406, "This endpoint returns several tables; request JSON instead")
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        frame = _table(result)
+    else:
+        frame = pd.DataFrame({'value': list(result) if isinstance(result, (list, tuple, pd.Index)) else [result]})
+    table = _arrow_table(frame)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _compute(fn, df, kwargs, fmt, meta):
+    result = fn(df, **kwargs)
+    return encode_arrow(result) if fmt == 'arrow' else encode_json(result, meta)
+
+
+# ---------------- Server ----------------
+class Server:
+    """Answers requests against one shared dataset, kept current with ``dl.refresh``."""
+
+    def __init__(self, df, workers=API_WORKERS):
+        self.df = df
+        self.endpoints = endpoints()
+        self.requests = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self._inflight = {}
+        self._checked = time.monotonic()
+
+    async def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked >= REFRESH_INTERVAL:
+            self._checked = now
+            self.df = await asyncio.get_running_loop().run_in_executor(self._pool, dl.refresh, self.df)
+
+    def index(self):
+        described = {}
+        for name, (fn, params) in self.endpoints.items():
+            described[name] = {
+                'doc': inspect.cleandoc(fn.__doc__ or '').split('\n\n')[0].replace('\n', ' '),
+                'params': {param: {'type': kind, 'required': default is inspect.Parameter.empty,
+                                   'default': None if default is inspect.Parameter.empty else default}
+                           for param, (kind, default) in params.items()},
+            }
+        return {'version': ag.version(self.df), 'endpoints': described}
+
+    def health(self):
+        return {'status': 'ok', 'version': ag.version(self.df), 'rows': len(self.df), 'requests': self.requests,
+                'results': memo.stats(), 'bodies': bodies.stats()}
+
+    def _arguments(self, name, query, df):
+        params = self.endpoints[name][1]
+        # A blank typed parameter (``end_year=``) means the default, as if it were left out.
+        query = {p: values for p, values in query.items() if values != [''] or params.get(p, ('str',))[0] == 'str'}
+        unknown = set(query) - set(params)
+        if unknown:
+            raise HTTPError(400, f"Unknown parameter(s) {', '.join(sorted(unknown))}; "
+                                 f"{name} takes {', '.join(params) or 'none'}")
+        missing = [p for p, (_, default) in params.items() if default is inspect.Parameter.empty and p not in query]
+        if missing:
+            raise HTTPError(400, f"Missing parameter(s) {', '.join(missing)}")
+        seasons = an.seasons(df)
+        # Every parameter is passed by keyword, defaults included, so equal requests share a cache key.
+        return {p: _convert(p, kind, query[p], seasons) if p in query else default
+                for p, (kind, default) in params.items()}
+
+    async def respond(self, method, target, headers):
+        """(status, headers, body) for one request."""
+        if method not in ('GET', 'HEAD'):
+            raise HTTPError(405, f"{method} is not supported; use GET")
+        url = urlsplit(target)
+        name = unquote(url.path).strip('/')
+        await self._refresh()
+        df = self.df
+        if name in ('', 'endpoints'):
+            return 200, {'Content-Type': JSON}, json.dumps(self.index(), default=_json_value).encode()
+        if name == 'health':
+            return 200, {'Content-Type': JSON, 'Cache-Control': 'no-store'}, json.dumps(self.health()).encode()
+        if name not in self.endpoints:
+            raise HTTPError(404, f"No endpoint {name!r}; GET / lists them")
+
+        query = parse_qs(url.query, keep_blank_values=True)
+        fmt = query.pop('format', [None])[-1]
+        if fmt is None:
+            fmt = 'arrow' if ARROW in headers.get('accept', '') else 'json'
+        if fmt not in ('json', 'arrow'):
+            raise HTTPError(400, f"format must be json or arrow, not {fmt!r}")
+        kwargs = self._arguments(name, query, df)
+        etag = _etag(ag.version(df), name, kwargs, fmt)
+        reply = {'ETag': etag, 'Cache-Control': 'no-cache', 'Vary': 'Accept'}
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, reply, b''
+
+        entry = bodies.get(etag)
+        if entry is None:
+            future = self._inflight.get(etag)
+            if future is None:
+                meta = {'function': name, 'version': ag.version(df)}
+                future = asyncio.get_running_loop().run_in_executor(
+                    self._pool, _compute, self.endpoints[name][0], df, kwargs, fmt, meta)
+                self._inflight[etag] = future
+                future.add_done_callback(lambda _: self._inflight.pop(etag, None))
+            # Shielded: a client that disconnects must not cancel the result the others await.
+            body = await asyncio.shield(future)
+            bodies.put(etag, body)
+        else:
+            body = entry[0]
+        return 200, {**reply, 'Content-Type': ARROW if fmt == 'arrow' else JSON}, body
+
+    async def handle(self, reader, writer):
+        """Serve the requests of one connection until it closes or asks to."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    method, target, version = line.decode('latin-1').split()
+                    headers = await _read_headers(reader)
+                except ValueError:
+                    _write(writer, 400, {'Content-Type': JSON}, _error("Malformed request"), False)
+                    break
+                length = int(headers.get('content-length') or 0)
+                if length:
+                    await reader.readexactly(length)
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                self.requests += 1
+                try:
+                    status, reply, body = await self.respond(method, target, headers)
+                except HTTPError as e:
+                    status, reply, body = e.status, {'Content-Type': JSON}, _error(str(e))
+                except (ValueError, KeyError) as e:  # the analysis function rejected its arguments
+                    status, reply, body = 400, {'Content-Type': JSON}, _error(str(e).strip("'\""))
+                except Exception as e:
+                    status, reply, body = 500, {'Content-Type': JSON}, _error(f"{type(e).__name__}: {e}")
+                _write(writer, status, reply, b'' if method == 'HEAD' else body, keep_alive, len(body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _read_headers(reader):
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            return headers
+        key, sep, value = line.decode('latin-1').partition(':')
+        if not sep:
+            raise ValueError("Malformed header")
+        headers[key.strip().lower()] = value.strip()
+    raise ValueError("Too many headers")
+
+
+def _error(message):
+    return json.dumps({'error': message}).encode()
+
+
+def _write(writer, status, reply, body, keep_alive, length=None):
+    head = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+            f"Content-Length: {len(body) if length is None else length}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    head += [f"{key}: {value}" for key, value in reply.items()]
+    writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+
+
+async def serve(df, host='127.0.0.1', port=8000, workers=API_WORKERS, ready=None):
+    """Serve ``df`` until cancelled. ``ready`` (an asyncio.Event) is set once the socket listens."""
+    server = Server(df, workers)
+    tcp = await asyncio.start_server(server.handle, host, port, backlog=1024)
+    print(f"Serving {len(server.endpoints)} endpoints on http://{host}:{port}", flush=True)
+    if ready is not None:
+        ready.set()
+    async with tcp:
+        await tcp.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=dl.DATA_PATH, help='ball-by-ball CSV')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--workers', type=int, default=API_WORKERS, help='threads running analysis calls')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(dl.load_with_tables(args.data), args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
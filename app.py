@@ -4,11 +4,18 @@ import os
 from dotenv import load_dotenv
 
 import data_loader as dl
+import instrument
+import lazy
+import memo
+import aggregates as ag
 import analysis as an
-import visualize as vv
 import llmutil as ai
 import prompts as pm
 
+# Plotting pulls in matplotlib, seaborn and plotly; load them on the first chart.
+vv = lazy.module("visualize")
+render = lazy.module("render")
+
 # Title & API Setup
 st.title("IPL Data Analysis Dashboard")
 st.write("Welcome to the IPL Analysis UI built with Streamlit")
@@ -21,54 +28,86 @@ if not api_key:
 else:
     ai.setup_gemini(api_key)
 
+# Streams the Gemini answer into the page as it arrives instead of blocking on the full reply.
+def show_summary(prompt):
+    with st.container(border=True):
+        return st.write_stream(ai.stream_summary(prompt))
+
 # Load Data
-@st.cache_data
+# cache_resource (not cache_data) so every session shares one frame and the
+# aggregate tables built on it, instead of unpickling a private copy per rerun.
+@st.cache_resource
 def load_data():
-    return dl.load_ipl()
-
-df = load_data()
-players = pd.unique(pd.concat([df['batter'], df['bowler'], df['player_dismissed']]).dropna())
-years = sorted(df['season'].unique())
+    if os.getenv("IPL_CHUNKED") == "1":
+        # Fold the CSV into the aggregate tables in bounded memory (IPL_CHUNK_MB) instead of loading it whole.
+        return {"df": dl.load_ipl_chunked()}
+    return {"df": ag.build_all(dl.load_ipl())}
+
+# Matches appended to the CSV since the last run are merged in incrementally;
+# when nothing changed this is a single stat call.
+data = load_data()
+data["df"] = df = dl.refresh(data["df"])
+years = an.seasons(df)
+
+
+def pick_name(label, key, kind="players", within=None):
+    """
+    A search box and a short selectbox of the best matches (see
+    an.search_names), instead of a selectbox holding every name.
+    """
+    query = st.text_input(f"Search {label.lower()}", key=f"{key}_search", placeholder="Type part of a name, e.g. Kohli")
+    options = an.search_names(df, query, kind, 20, within)
+    if not options:
+        st.caption(f"No match for '{query}', showing the most active instead.")
+        options = an.search_names(df, "", kind, 20, within)
+    return st.selectbox(label, options, key=key)
 
 # Sidebar Menu
 st.sidebar.title("IPL Dashboard Menu")
 option = st.sidebar.selectbox("Choose Analysis Type", [
     "Team Analysis", 
     "Player Analysis", 
-    "Bowler Analysis"
+    "Bowler Analysis",
+    "Similar Players",
+    "Form",
+    "Win Probability"
 ])
 
 # Team Analysis Section
 if option == "Team Analysis":
     st.header("Team Analysis")
-    all_teams = sorted(df['batting_team'].unique())
+    all_teams = an.teams(df)
 
-    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
         "Team Season Performance", 
         "Head to Head", 
         "Team Wins by Season", 
         "Team Record", 
         "Highest Scores", 
-        "Highest Chases"
+        "Highest Chases",
+        "Phase Performance",
+        "Partnerships"
     ])
 
-    with tab1:
+    # Each tab is a fragment: its widgets rerun only that tab, and nothing is
+    # computed until the tab's own button is pressed.
+    @st.fragment
+    def team_season_tab():
         selected_team = st.selectbox("Select Team", all_teams)
-        result_df = an.team_season_performance(df, selected_team)
         if st.button("Show Season Performance"):
+            result_df = an.team_season_performance(df, selected_team)
             st.session_state.team_season_df = result_df
             st.dataframe(result_df)
         if "team_season_df" in st.session_state:
             if st.button("Summarize Team Season Performance"):
                 prompt = pm.genrate_team_season_summary_prompt(selected_team, st.session_state.team_season_df)
-                summary = ai.summarize_stats(prompt)
                 st.markdown("Summary")
-                st.success(summary)
+                show_summary(prompt)
         if st.button("Visualize Season Performance"):
-            fig = vv.plot_team_season_performance(df, selected_team)
-            st.pyplot(fig)
+            st.image(render.render('plot_team_season_performance', df, selected_team))
 
-    with tab2:
+    @st.fragment
+    def head_to_head_tab():
         team1 = st.selectbox("Team 1", all_teams)
         team2 = st.selectbox("Team 2", all_teams)
         start = st.selectbox("Start Year", years, index=0)
@@ -85,70 +124,109 @@ if option == "Team Analysis":
         if "head_to_head_df" in st.session_state:
             if st.button("Summarize Head to Head"):
                 prompt = pm.genrate_head_to_head_summary_prompt(team1, team2, st.session_state.head_to_head_df)
-                summary = ai.summarize_stats(prompt)
                 st.markdown("Summary")
-                st.success(summary)
+                show_summary(prompt)
 
         if st.button("Visualize Head to Head"):
             if team1 != team2:
-                fig = vv.plot_team_head_to_head(df, team1, team2, start, end)
-                st.pyplot(fig)
+                st.image(render.render('plot_team_head_to_head', df, team1, team2, start, end))
 
-    with tab3:
+    @st.fragment
+    def team_wins_tab():
         wins_team = st.selectbox("Select Team ", all_teams,key="unique_team_selector_1")
-        wins_df = an.team_season_performance(df, wins_team)
         if st.button("Show Team Wins"):
-            st.dataframe(wins_df)
+            st.dataframe(an.team_season_performance(df, wins_team))
         if st.button("Visualize Team Wins"):
-            fig = vv.plot_team_season_performance(df, wins_team)
-            st.pyplot(fig)
+            st.image(render.render('plot_team_season_performance', df, wins_team))
 
-    with tab4:
+    @st.fragment
+    def team_record_tab():
         record_team = st.selectbox("Select Team", all_teams,key="unique_team_selector_2")
-        team_solo, team_vs_opponent = an.team_record(df, record_team)
         if st.button("Show Team Record"):
+            team_solo, team_vs_opponent = an.team_record(df, record_team)
             st.session_state.team_record_df = team_vs_opponent
             st.dataframe(team_solo)
         if st.button("Show Opponent Record"):
+            team_solo, team_vs_opponent = an.team_record(df, record_team)
             st.dataframe(team_vs_opponent)
         if "team_record_df" in st.session_state:
             if st.button("Summarize Team Record"):
                 prompt = pm.genrate_team_record_summary_prompt(record_team, st.session_state.team_record_df)
-                summary = ai.summarize_stats(prompt)
                 st.markdown("Summary")
-                st.success(summary)
+                show_summary(prompt)
 
-    with tab5:
+    @st.fragment
+    def highest_scores_tab():
         team_for_runs = st.selectbox("Select Team", all_teams,key="unique_team_selector_3")
-        highest_scores_df = an.highest_scores_by_team(df, team_for_runs)
         if st.button("Show Highest Scores"):
+            highest_scores_df = an.highest_scores_by_team(df, team_for_runs)
             st.session_state.highest_scores_df = highest_scores_df
             st.dataframe(highest_scores_df)
         if st.button("Visualize Highest Scores"):
-            fig = vv.plot_highest_run_by_team(df, team_for_runs)
-            st.pyplot(fig)
+            st.image(render.render('plot_highest_run_by_team', df, team_for_runs))
         if "highest_scores_df" in st.session_state:
             if st.button("Summarize Highest Scores"):
                 prompt = pm.genrate_highest_scores_prompt(team_for_runs, st.session_state.highest_scores_df)
-                summary = ai.summarize_stats(prompt)
                 st.markdown("Summary")
-                st.success(summary)
+                show_summary(prompt)
 
-    with tab6:
+    @st.fragment
+    def highest_chases_tab():
         team_for_chase = st.selectbox("Select Team", all_teams,key="unique_team_selector_4")
-        highest_chase_df = an.highest_chase_by_team(df, team_for_chase)
         if st.button("Show Highest Chases"):
+            highest_chase_df = an.highest_chase_by_team(df, team_for_chase)
             st.session_state.highest_chase_df = highest_chase_df
             st.dataframe(highest_chase_df)
         if st.button("Visualize Highest Chases"):
-            fig = vv.plot_highest_chase_by_team(df, team_for_chase)
-            st.pyplot(fig)
+            st.image(render.render('plot_highest_chase_by_team', df, team_for_chase))
         if "highest_chase_df" in st.session_state:
             if st.button("Summarize Highest Chases"):
                 prompt = pm.genrate_highest_chases_prompt(team_for_chase, st.session_state.highest_chase_df)
-                summary = ai.summarize_stats(prompt)
                 st.markdown("Summary")
-                st.success(summary)
+                show_summary(prompt)
+
+    @st.fragment
+    def team_phase_tab():
+        phase_team = st.selectbox("Select Team", all_teams, key="unique_team_selector_5")
+        phase_start = st.selectbox("Start Year", years, index=0, key="team_phase_start")
+        phase_end = st.selectbox("End Year", years, index=len(years) - 1, key="team_phase_end")
+        if st.button("Show Phase Performance"):
+            st.dataframe(an.team_phase_stats(df, phase_team, phase_start, phase_end))
+        phase_side = st.radio("Side", ["batting", "bowling"], horizontal=True, key="team_phase_side")
+        if st.button("Visualize Phases by Season"):
+            st.image(render.render('plot_team_phases_by_season', df, phase_team, phase_side))
+
+    @st.fragment
+    def team_partnerships_tab():
+        pt_team = st.selectbox("Select Team", all_teams, key="team_partnership_team")
+        pt_start = st.selectbox("Start Year", years, index=0, key="team_partnership_start")
+        pt_end = st.selectbox("End Year", years, index=len(years) - 1, key="team_partnership_end")
+        if st.button("Show Partnerships by Wicket"):
+            st.dataframe(an.partnerships_by_wicket(df, pt_team, pt_start, pt_end))
+        if st.button("Show Best Stands and Pairs"):
+            st.subheader("Highest Partnerships")
+            st.dataframe(an.top_partnerships(df, pt_team, pt_start, pt_end))
+            st.subheader("Most Productive Pairs")
+            st.dataframe(an.batting_pairs(df, pt_team, pt_start, pt_end))
+        if st.button("Visualize Partnerships by Wicket"):
+            st.image(render.render('plot_partnerships_by_wicket', df, pt_team, pt_start, pt_end))
+
+    with tab1:
+        team_season_tab()
+    with tab2:
+        head_to_head_tab()
+    with tab3:
+        team_wins_tab()
+    with tab4:
+        team_record_tab()
+    with tab5:
+        highest_scores_tab()
+    with tab6:
+        highest_chases_tab()
+    with tab7:
+        team_phase_tab()
+    with tab8:
+        team_partnerships_tab()
 
 # Player Analysis Section
 elif option == "Player Analysis":
@@ -164,15 +242,17 @@ elif option == "Player Analysis":
         "player_head_to_head",
         "most_strikerate_by_players",
         "most_six_by_player",
-        "most_fours_by_player"
+        "most_fours_by_player",
+        "batting_by_phase",
+        "partnerships"
     ]
 
     ana_type = st.selectbox("What do you want to analyze?", list_ana)
 
     if ana_type == "player_analysis":
         
-        selected_player = st.selectbox("Select a Player", sorted(players))
-        years = sorted(df['season'].unique())
+        selected_player = pick_name("Select a Player", "pa_player")
+        years = an.seasons(df)
         start_year = st.selectbox("Start Year", years, index=0)
         end_year = st.selectbox("End Year", years, index=len(years) - 1)
 
@@ -197,9 +277,8 @@ elif option == "Player Analysis":
                     prompt = pm.generate_player_summary_prompt(df, selected_player, start_year, end_year)
 
                     if prompt:
-                        summary = ai.summarize_stats(prompt)
                         st.markdown("###  Summary")
-                        st.success(summary)
+                        show_summary(prompt)
                     else:
                         st.warning("Prompt was empty or failed to generate.")
 
@@ -207,7 +286,7 @@ elif option == "Player Analysis":
                     st.error(f"🔥 Gemini Error: {e}")
 
     if ana_type == 'top_batsmen_by_season':
-        years = ['All'] + sorted(df['season'].unique())
+        years = ['All'] + an.seasons(df)
         season = st.selectbox("Select a season (select 'All' for overall)", years, key="season")
         number = st.number_input("Enter number of top batsmen", min_value=1, max_value=10, step=1, format="%d")
     
@@ -224,21 +303,19 @@ elif option == "Player Analysis":
             try:
                 prompt = pm.genrate_top_batsman_prompt(season,number)
                 if prompt:
-                    summary = ai.summarize_stats(prompt)
                     st.markdown("### Summary")
-                    st.success(summary)
+                    show_summary(prompt)
                 else:
                     st.warning("Prompt was empty or failed to generate.")
             except Exception as e:
                 st.warning(f"Summary generation failed: {e}")
         
         if st.button("Visualize Top Batsmen"):
-            fig = vv.top_batsmen_by_season(df, season if season != 'All' else 'all', number)
-            st.pyplot(fig)
+            st.image(render.render('top_batsmen_by_season', df, season if season != 'All' else 'all', number))
     
     
     if ana_type == "batsman_growth_by_season":
-        player_growth = st.selectbox("Enter the player name",players,key="player_growth")
+        player_growth = pick_name("Select a Player", "player_growth")
         
         if st.button("show growth"):
             st.session_state.growth_data = an.batsman_growth_by_season(df,player_growth)
@@ -249,17 +326,15 @@ elif option == "Player Analysis":
                     prompt = pm.genrate_growth_of_batsman(player_growth)
                     if prompt:
                         st.write("summarizing")
-                        summary = ai.summarize_stats(prompt)
                         st.markdown(" summary")
-                        st.success(summary)
+                        show_summary(prompt)
         
         if st.button("visualize growth "):
-            fig = vv.plot_growth_of_batsman_overtime(df,player_growth)
-            st.pyplot(fig)
+            st.image(render.render('plot_growth_of_batsman_overtime', df, player_growth))
         
     if ana_type == "compare_batsman_growth":
-        player1 = st.selectbox("Select Player 1", sorted(players), key="cg1")
-        player2 = st.selectbox("Select Player 2", sorted(players), key="cg2")
+        player1 = pick_name("Select Player 1", "cg1")
+        player2 = pick_name("Select Player 2", "cg2")
 
         if player1 == player2:
             st.warning("Please select two different players")
@@ -269,12 +344,11 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize Growth"):
-            fig = vv.compare_growth(df, player1, player2)
-            st.pyplot(fig)
+            st.image(render.render('compare_growth', df, player1, player2))
 
     if ana_type == "player_against_teams":
-        player = st.selectbox("Select Player", sorted(players), key="pat1")
-        teams = sorted(df['bowling_team'].unique())
+        player = pick_name("Select Player", "pat1")
+        teams = an.teams(df)
         team = st.selectbox("Select Against Team", teams, key="pat2")
 
         if st.button("Show Performance"):
@@ -283,12 +357,11 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize vs Team"):
-            fig = vv.plot_player_against_team(df, player, team)
-            st.pyplot(fig)
+            st.image(render.render('plot_player_against_team', df, player, team))
 
     if ana_type == "player_head_to_head":
-        player1 = st.selectbox("Player 1", sorted(players), key="ph1")
-        player2 = st.selectbox("Player 2", sorted(players), key="ph2")
+        player1 = pick_name("Player 1", "ph1")
+        player2 = pick_name("Player 2", "ph2")
 
         if player1 == player2:
             st.warning("Please select two different players")
@@ -298,8 +371,7 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize Head-to-Head"):
-            fig = vv.plot_player_head_to_head(df, player1, player2)
-            st.pyplot(fig)
+            st.image(render.render('plot_player_head_to_head', df, player1, player2))
     
     
     if ana_type == "most_runs_by_IPL":
@@ -311,11 +383,11 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize Top Run Scorers"):
-            fig = vv.top_runs_by_player(df, number)
-            st.pyplot(fig)
-        if ana_type == "most_strikerate_by_players":
-            number = st.slider("Number of top players", 5, 20, 10)
-            min_balls = st.slider("Minimum balls faced", 30, 300, 100, step=10)
+            st.image(render.render('top_runs_by_player', df, number))
+
+    elif ana_type == "most_strikerate_by_players":
+        number = st.slider("Number of top players", 5, 20, 10)
+        min_balls = st.slider("Minimum balls faced", 30, 300, 100, step=10)
 
         if st.button("Show Top Strike Rates"):
             result_df = an.most_strikerate_by_players(df, n=number, min_balls=min_balls)
@@ -323,8 +395,7 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize Strike Rate"):
-            fig = vv.plot_most_Strike_rate_in_IPL
-            st.pyplot(fig)
+            st.image(render.render('plot_most_Strike_rate_in_IPL', df, number, min_balls))
     
     
     if ana_type == "most_six_by_player":
@@ -336,8 +407,7 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize Sixes"):
-            fig = vv.plot_most_six_in_IPL(df, number)
-            st.pyplot(fig)
+            st.image(render.render('plot_most_six_in_IPL', df, number))
 
     if ana_type == "most_fours_by_player":
         number = st.slider("Number of top players", 5, 20, 10)
@@ -348,23 +418,46 @@ elif option == "Player Analysis":
             st.dataframe(result_df)
 
         if st.button("Visualize Fours"):
-            fig = vv.plot_most_four_in_IPL(df, number)
-            st.pyplot(fig)
+            st.image(render.render('plot_most_four_in_IPL', df, number))
+    if ana_type == "batting_by_phase":
+        phase_player = pick_name("Select Player", "bp1")
+        bp_start = st.selectbox("Start Year", years, index=0, key="bp_start")
+        bp_end = st.selectbox("End Year", years, index=len(years) - 1, key="bp_end")
+
+        if st.button("Show Phase Stats"):
+            st.subheader(f"{phase_player} by Phase")
+            st.dataframe(an.batting_by_phase(df, phase_player, bp_start, bp_end))
+
+        if st.button("Visualize Phase Stats"):
+            st.image(render.render('plot_batting_by_phase', df, phase_player, bp_start, bp_end))
+    if ana_type == "partnerships":
+        pp_player = pick_name("Select Player", "pp1")
+        pp_start = st.selectbox("Start Year", years, index=0, key="pp_start")
+        pp_end = st.selectbox("End Year", years, index=len(years) - 1, key="pp_end")
+
+        if st.button("Show Partnerships"):
+            st.subheader(f"{pp_player}'s Partners")
+            st.dataframe(an.player_partnerships(df, pp_player, pp_start, pp_end))
+
+        if st.button("Visualize Partnerships"):
+            st.image(render.render('plot_player_partnerships', df, pp_player, pp_start, pp_end))
 # Bowler Analysis Section
 elif option == "Bowler Analysis":
     st.header("Bowler Stats and Comparison")
-    all_bowlers = sorted(df["bowler"].unique())
-    all_bowling_teams = sorted(df['bowling_team'].unique())
+    all_bowling_teams = an.teams(df)
 
-    tab1, tab2, tab3 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
         "Bowler Record",
         "Head-to-Head Comparison",
-        "Best Economy (By Team)"
+        "Best Economy (By Team)",
+        "Batter vs Bowler",
+        "By Phase"
     ])
 
     # ---------------- Bowler Record ----------------
-    with tab1:
-        selected_bowler = st.selectbox("Select Bowler", all_bowlers)
+    @st.fragment
+    def bowler_record_tab():
+        selected_bowler = pick_name("Select Bowler", "bowler_record", "bowlers")
         start_yr = st.selectbox("Start Year", years, index=0)
         end_yr = st.selectbox("End Year", years, index=len(years) - 1)
 
@@ -380,16 +473,16 @@ elif option == "Bowler Analysis":
             if st.button("Summarize Bowler Stats"):
                 prompt = pm.genrate_bowler(selected_bowler, start_yr, end_yr)
                 if prompt:
-                    summary = ai.summarize_stats(prompt)
                     st.markdown("Summary")
-                    st.success(summary)
+                    show_summary(prompt)
                 else:
                     st.warning("Prompt was empty")
 
     # ---------------- Head-to-Head ----------------
-    with tab2:
-        bowler1 = st.selectbox("Bowler 1", all_bowlers, key="bow1")
-        bowler2 = st.selectbox("Bowler 2", all_bowlers, key="bow2")
+    @st.fragment
+    def bowler_h2h_tab():
+        bowler1 = pick_name("Bowler 1", "bow1", "bowlers")
+        bowler2 = pick_name("Bowler 2", "bow2", "bowlers")
         h2h_start = st.selectbox("Start Year", years, index=0, key="head2head_start")
         h2h_end = st.selectbox("End Year", years, index=len(years) - 1, key="head2head_end")
 
@@ -408,9 +501,8 @@ elif option == "Bowler Analysis":
                 try:
                     prompt = pm.genrate_bowler_comparison_prompt(bowler1, bowler2, h2h_start, h2h_end)
                     if prompt:
-                        summary = ai.summarize_stats(prompt)
                         st.markdown("Summary")
-                        st.success(summary)
+                        show_summary(prompt)
                     else:
                         st.warning("Prompt generation failed")
                 except Exception as e:
@@ -419,7 +511,8 @@ elif option == "Bowler Analysis":
             fig = vv.plot_bowler_headtohead(df,bowler1,bowler2,h2h_start,h2h_end)
             st.plotly_chart(fig, use_container_width=True)
     # ---------------- Economy Rate ----------------
-    with tab3:
+    @st.fragment
+    def economy_tab():
         econ_team = st.selectbox("Select Bowling Team", all_bowling_teams)
         if st.button("Show Best Economy Bowler"):
             econ_df = an.economy_rate(df, econ_team)
@@ -433,10 +526,194 @@ elif option == "Bowler Analysis":
                 try:
                     prompt = pm.genrate_economy_summary_prompt(bowler_name, eco, econ_team)
                     if prompt:
-                        summary = ai.summarize_stats(prompt)
                         st.markdown("Summary")
-                        st.success(summary)
+                        show_summary(prompt)
                     else:
                         st.warning("Prompt failed to generate.")
                 except Exception as e:
                     st.error(str(e))
+
+    # ---------------- Batter vs Bowler ----------------
+    @st.fragment
+    def matchup_tab():
+        mu_batter = pick_name("Batter", "mu_batter")
+        mu_bowler = pick_name("Bowler", "mu_bowler", "bowlers")
+        if st.button("Show Matchup"):
+            st.dataframe(an.matchup(df, mu_batter, mu_bowler))
+        if st.button("Toughest Bowlers for Batter"):
+            st.dataframe(an.toughest_bowlers(df, mu_batter))
+
+        mu_metric = st.selectbox("Heatmap metric", an.MATCHUP_METRICS, index=an.MATCHUP_METRICS.index('strike_rate'))
+        mu_n = st.slider("Batters and bowlers shown", 5, 30, 15)
+        if st.button("Visualize Matchups"):
+            st.image(render.render('plot_matchup_heatmap', df, mu_metric, mu_n))
+
+    # ---------------- By Phase ----------------
+    @st.fragment
+    def bowler_phase_tab():
+        phase_bowler = pick_name("Select Bowler", "bowler_phase", "bowlers")
+        bph_start = st.selectbox("Start Year", years, index=0, key="bowler_phase_start")
+        bph_end = st.selectbox("End Year", years, index=len(years) - 1, key="bowler_phase_end")
+        if st.button("Show Bowling by Phase"):
+            st.dataframe(an.bowling_by_phase(df, phase_bowler, bph_start, bph_end))
+        if st.button("Visualize Bowling by Phase"):
+            st.image(render.render('plot_bowling_by_phase', df, phase_bowler, bph_start, bph_end))
+
+    with tab1:
+        bowler_record_tab()
+    with tab2:
+        bowler_h2h_tab()
+    with tab3:
+        economy_tab()
+    with tab4:
+        matchup_tab()
+    with tab5:
+        bowler_phase_tab()
+
+# Similar Players Section
+elif option == "Similar Players":
+    st.header("Find Similar Players")
+    sim_role = st.radio("Compare as", list(an.PROFILE_ROLES), horizontal=True)
+    sim_player = pick_name("Select Player", f"sim_player_{sim_role}", within=frozenset(an.profiled_players(df, sim_role)))
+    sim_k = st.slider("Number of similar players", 1, 20, 5)
+
+    if st.button("Find Similar Players"):
+        try:
+            st.dataframe(an.similar_players(df, sim_player, sim_k, sim_role))
+            st.plotly_chart(vv.plot_similar_players_radar(df, sim_player, min(sim_k, 5), sim_role),
+                            use_container_width=True)
+        except ValueError as e:
+            st.warning(str(e))
+
+# Form Section
+elif option == "Form":
+    st.header("Form and Streaks")
+    form_teams = an.teams(df)
+
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "Batting Form",
+        "Bowling Form",
+        "Team Form",
+        "In Form Now"
+    ])
+
+    @st.fragment
+    def batting_form_tab():
+        form_player = pick_name("Select Player", "form_batter")
+        bf_n = st.slider("Innings in the window", 3, 30, an.FORM_WINDOW, key="form_batter_n")
+        bf_start = st.selectbox("Start Year", years, index=0, key="form_batter_start")
+        bf_end = st.selectbox("End Year", years, index=len(years) - 1, key="form_batter_end")
+        if st.button("Show Batting Form"):
+            st.dataframe(an.batting_form(df, form_player, bf_n, bf_start, bf_end))
+        if st.button("Visualize Batting Form"):
+            st.image(render.render('plot_batting_form', df, form_player, bf_n, bf_start, bf_end))
+
+    @st.fragment
+    def bowling_form_tab():
+        form_bowler = pick_name("Select Bowler", "form_bowler", "bowlers")
+        bwf_n = st.slider("Innings in the window", 3, 30, an.FORM_WINDOW, key="form_bowler_n")
+        bwf_start = st.selectbox("Start Year", years, index=0, key="form_bowler_start")
+        bwf_end = st.selectbox("End Year", years, index=len(years) - 1, key="form_bowler_end")
+        if st.button("Show Bowling Form"):
+            st.dataframe(an.bowling_form(df, form_bowler, bwf_n, bwf_start, bwf_end))
+        if st.button("Visualize Bowling Form"):
+            st.image(render.render('plot_bowling_form', df, form_bowler, bwf_n, bwf_start, bwf_end))
+
+    @st.fragment
+    def team_form_tab():
+        form_team = st.selectbox("Select Team", form_teams, key="form_team")
+        tf_n = st.slider("Matches in the window", 3, 30, an.FORM_WINDOW, key="form_team_n")
+        tf_start = st.selectbox("Start Year", years, index=0, key="form_team_start")
+        tf_end = st.selectbox("End Year", years, index=len(years) - 1, key="form_team_end")
+        if st.button("Show Team Form"):
+            st.dataframe(an.team_form(df, form_team, tf_n, tf_start, tf_end))
+        if st.button("Visualize Team Form"):
+            st.image(render.render('plot_team_form', df, form_team, tf_n, tf_start, tf_end))
+
+    @st.fragment
+    def in_form_tab():
+        if_role = st.radio("Leaderboard", list(an.FORM_ROLES), horizontal=True, key="in_form_role")
+        if_n = st.slider("Innings in the window", 3, 30, an.FORM_WINDOW, key="in_form_n")
+        if_top = st.slider("Number of players", 5, 50, 10, key="in_form_top")
+        if st.button("Show In-Form Players"):
+            st.caption(f"Players from the latest season with at least {if_n} innings, over their last {if_n}.")
+            st.dataframe(an.in_form(df, if_role, if_n, if_top))
+        if st.button("Show Team Streaks"):
+            st.dataframe(an.team_streaks(df, if_n))
+
+    with tab1:
+        batting_form_tab()
+    with tab2:
+        bowling_form_tab()
+    with tab3:
+        team_form_tab()
+    with tab4:
+        in_form_tab()
+
+# Win Probability Section
+elif option == "Win Probability":
+    st.header("Chase Win Probability")
+
+    tab1, tab2 = st.tabs([
+        "Season Chases",
+        "Live Calculator"
+    ])
+
+    @st.fragment
+    def season_chases_tab():
+        wp_season = st.selectbox("Season", years, index=len(years) - 1, key="wp_season")
+        wp_team = st.selectbox("Team", ["All"] + an.teams(df), key="wp_team")
+        wp_team = None if wp_team == "All" else wp_team
+        if st.button("Show Chases"):
+            st.dataframe(an.season_chases(df, wp_season, wp_team))
+        if st.button("Visualize Season Chases"):
+            st.image(render.render('plot_season_chases', df, wp_season, wp_team))
+        chases = an.season_chase_list(df, wp_season, wp_team)
+        if chases.empty:
+            return
+        labels = {row.Match: f"{row.Chasing} chasing {row.Target} v {row.Defending} ({row.Match})"
+                  for row in chases.itertuples()}
+        wp_match = st.selectbox("Chase", list(labels), format_func=labels.get, key="wp_match")
+        if st.button("Show Chase Curve"):
+            st.dataframe(an.chase_curve(df, wp_match))
+        if st.button("Visualize Chase Curve"):
+            st.image(render.render('plot_chase_curve', df, wp_match))
+
+    @st.fragment
+    def live_calculator_tab():
+        wp_runs = st.number_input("Runs needed", min_value=0, max_value=400, value=40, key="wp_runs")
+        wp_balls = st.number_input("Balls left", min_value=0, max_value=120, value=30, key="wp_balls")
+        wp_wickets = st.number_input("Wickets in hand", min_value=0, max_value=10, value=6, key="wp_wickets")
+        st.metric("Chasing side wins", f"{an.win_probability(df, int(wp_runs), int(wp_balls), int(wp_wickets))}%")
+
+    with tab1:
+        season_chases_tab()
+    with tab2:
+        live_calculator_tab()
+
+# ---------------- Diagnostics ----------------
+# Hidden unless the page is opened with ?diagnostics=1.
+if st.query_params.get("diagnostics") == "1":
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        tracing = st.toggle("Record call timings", value=instrument.is_enabled())
+        allocations = st.checkbox("Track allocations (slower)", value=False)
+        if tracing and not instrument.is_enabled():
+            instrument.enable(allocations=allocations)
+        elif not tracing and instrument.is_enabled():
+            instrument.disable()
+        if st.button("Clear timings"):
+            instrument.clear()
+
+        st.caption("Result cache")
+        st.json(memo.stats())
+        st.caption("Figure cache")
+        st.json(render.stats())
+        summary = instrument.summary()
+        if summary.empty:
+            st.caption("No calls recorded yet.")
+        else:
+            st.dataframe(summary.round(2))
+            st.download_button("Download spans (JSON)", instrument.to_json(),
+                               file_name="ipl_spans.json", mime="application/json")
+            st.download_button("Download Chrome trace", instrument.to_chrome_trace(),
+                               file_name="ipl_trace.json", mime="application/json")
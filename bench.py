@@ -0,0 +1,439 @@
+"""
+Benchmark every public function in analysis.py and visualize.py on synthetic data.
+
+Usage:
+    python bench.py --rows 100000 1000000 10000000 --out bench_results.json
+    python bench.py --compare old.json new.json [--threshold 1.25]
+    python bench.py --startup [--budget 1.0]
+    python bench.py --engines --rows 1000000
+    python bench.py --chunked --rows 100000 [--chunk-rows 7000]
+    python bench.py --api [http://127.0.0.1:8000] [--connections 32 --duration 10]
+
+Each function is timed with the result cache bypassed (median and best of
+``--repeat`` runs) and its peak Python allocation is measured with
+tracemalloc. Building the aggregate tables is reported separately as
+``aggregates.build_all``. Results go to a JSON file so runs from different
+commits can be compared with ``--compare``. A function whose parameters have
+no value in ``sample_arguments`` is recorded as skipped, listed at the end of
+the run, and makes it exit non-zero.
+
+``--startup`` times, in fresh interpreters, the imports app.py does before
+its first page renders and exits non-zero if they exceed ``--budget``
+seconds or pull in a plotting or LLM library that should load on first use.
+
+``--engines`` builds every aggregate table with each installed engine
+(pandas, DuckDB, Polars), prints the build times and exits non-zero if any
+table differs from the pandas build.
+
+``--chunked`` loads the same synthetic CSV whole and with ``load_ipl_chunked``
+in ``--chunk-rows`` pieces and exits non-zero if any aggregate table differs.
+
+``--api`` load-tests a running ``api.py``: a request mix over the busiest
+players, bowlers and teams is sent once to warm the shared caches, then
+replayed at random over ``--connections`` keep-alive connections for
+``--duration`` seconds. It prints requests per second and p50/p99 latency
+and exits non-zero on any 5xx. ``--revalidate`` sends the ETags from the
+warm-up pass as If-None-Match, as a polling client would.
+"""
+import argparse
+import asyncio
+import collections
+import gc
+import inspect
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import urllib.request
+import warnings
+from urllib.parse import urlencode, urlsplit
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import aggregates as ag  # noqa: E402
+import analysis as an  # noqa: E402
+from search import NameIndex  # noqa: E402
+from similarity import ProfileIndex  # noqa: E402
+import synthetic  # noqa: E402
+import visualize as vv  # noqa: E402
+from winprob import WinProbability  # noqa: E402
+
+
+def public_functions(module):
+    return [(name, fn) for name, fn in inspect.getmembers(module, inspect.isfunction)
+            if fn.__module__ == module.__name__ and not name.startswith('_')]
+
+
+def sample_arguments(df):
+    """Argument values by parameter name, picked from the busiest players and teams."""
+    batters = an.most_runs_by_IPL(df)['player']
+    bowlers = ag.get(df, 'bowling').groupby(level='bowler', observed=True)['balls'].sum().nlargest(2).index
+    teams = df['batting_team'].value_counts().index
+    seasons = sorted(df['season'].unique())
+    profiled = set(an.profiled_players(df))
+    chases = ag.get(df, 'chase_balls').index  # a decided chase, so its match has a win-% curve too
+    # The {team: {'Against Opponents': {opponent: {...}}}} layout the opponent plots take.
+    vs_opponent = an.team_record(df, teams[0])[1].rename(columns={'win %': 'Win %'}).set_index('Opponent')
+    return {
+        'batter': batters.iloc[0], 'bowler': bowlers[0],
+        'player_name': batters.iloc[0], 'player1': batters.iloc[0], 'player2': batters.iloc[1],
+        'players': [player for player in batters if player in profiled][:5],
+        'query': batters.iloc[0][:-3] + batters.iloc[0][-2:],  # a letter short, so the typo pass runs
+        'bowler_name': bowlers[0], 'bowler1': bowlers[0], 'bowler2': bowlers[1],
+        'team_name': teams[0], 'teamname': teams[0], 'team1': teams[0], 'team2': teams[1],
+        'team_name1': teams[0], 'team_name2': teams[1],
+        'stats_dict': {teams[0].title(): {'Against Opponents': vs_opponent.to_dict('index')}},
+        'start_year': seasons[0], 'end_year': seasons[-1], 'season': seasons[-1],
+        'match_id': chases[-1], 'runs_needed': 40, 'balls_left': 30, 'wickets_in_hand': 6,
+        'n': 10, 'min_balls': 100,
+    }
+
+
+# Functions whose parameter names mean something else than the shared table suggests.
+OVERRIDES = {
+    'visualize.plot_bowler_headtohead': lambda a: {'player1': a['bowler1'], 'player2': a['bowler2']},
+    'visualize.normalize_dataframe': lambda a: {'df': pd.DataFrame({'x': np.arange(1000), 'y': np.arange(1000) ** 2})},
+}
+
+
+def bind(module, name, fn, df, args):
+    values = dict(args, df=df)
+    values.update(OVERRIDES.get(f"{module.__name__}.{name}", lambda a: {})(args))
+    kwargs = {}
+    for param in inspect.signature(fn).parameters.values():
+        if param.name in values:
+            kwargs[param.name] = values[param.name]
+        elif param.default is inspect.Parameter.empty:
+            return None
+    return kwargs
+
+
+def measure(fn, kwargs, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(**kwargs)
+        times.append(time.perf_counter() - start)
+        plt.close('all')
+    gc.collect()
+    tracemalloc.start()
+    fn(**kwargs)
+    plt.close('all')
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'peak_bytes': peak}
+
+
+def run(rows, repeat):
+    records = []
+    start = time.perf_counter()
+    df = synthetic.generate(rows)
+    generated = time.perf_counter() - start
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    ag.build_all(df)
+    build = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    records.append({'function': 'aggregates.build_all', 'rows': len(df), 'status': 'ok',
+                    'median_s': build, 'min_s': build, 'peak_bytes': peak})
+
+    args = sample_arguments(df)
+    for module in (an, vv):
+        for name, fn in public_functions(module):
+            record = {'function': f"{module.__name__}.{name}", 'rows': len(df)}
+            kwargs = bind(module, name, fn, df, args)
+            if kwargs is None:
+                record['status'] = 'skipped'
+            else:
+                try:
+                    record.update(measure(getattr(fn, 'uncached', fn), kwargs, repeat), status='ok')
+                except Exception as e:
+                    record.update(status='error', error=f"{type(e).__name__}: {e}")
+            records.append(record)
+            print(f"{len(df):>10,} {record['function']:<50} {record['status']:<8} "
+                  f"{record.get('median_s', float('nan')) * 1000:10.2f} ms", file=sys.stderr)
+    skipped = [record['function'] for record in records if record['status'] == 'skipped']
+    if skipped:
+        print(f"{len(df):>10,} skipped, no sample arguments: {', '.join(skipped)}", file=sys.stderr)
+    return {'rows': len(df), 'generate_s': generated, 'memory_bytes': int(df.memory_usage(deep=True).sum())}, records
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path, threshold):
+    """Print per-function timing ratios; returns 1 if any function slowed down by more than ``threshold``."""
+    def load(path):
+        with open(path) as f:
+            data = json.load(f)
+        return {(r['function'], r['rows']): r for r in data['results'] if r['status'] == 'ok'}
+
+    old, new = load(old_path), load(new_path)
+    regressed = False
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key]['median_s'] / old[key]['median_s'] if old[key]['median_s'] else float('inf')
+        flag = 'REGRESSION' if ratio > threshold else ''
+        regressed |= bool(flag)
+        print(f"{key[1]:>10,} {key[0]:<50} {old[key]['median_s'] * 1000:10.2f} -> "
+              f"{new[key]['median_s'] * 1000:10.2f} ms  x{ratio:5.2f} {flag}")
+    return 1 if regressed else 0
+
+
+# What app.py imports before the first page renders (streamlit itself is excluded).
+STARTUP_IMPORTS = ("import data_loader, aggregates, analysis, instrument, lazy, memo, llmutil, prompts; "
+                   "lazy.module('visualize'); lazy.module('render')")
+DEFERRED_MODULES = ('matplotlib', 'seaborn', 'plotly.graph_objects', 'google.generativeai')
+
+
+def startup(budget, repeat=3):
+    """Best-of-``repeat`` cold import time of the app's startup modules; returns 1 if over budget."""
+    code = ("import json, sys, time; import streamlit; before = set(sys.modules); start = time.perf_counter(); " +
+            STARTUP_IMPORTS + "; print(json.dumps({'seconds': time.perf_counter() - start, "
+            f"'loaded': [m for m in {DEFERRED_MODULES!r} if m in sys.modules and m not in before]}}))")
+    runs = [json.loads(subprocess.check_output([sys.executable, '-W', 'ignore', '-c', code], text=True,
+                                               cwd=os.path.dirname(os.path.abspath(__file__))))
+            for _ in range(repeat)]
+    best = min(run['seconds'] for run in runs)
+    loaded = sorted({m for run in runs for m in run['loaded']})
+    print(f"startup imports: {best:.3f} s (budget {budget:.3f} s)")
+    if loaded:
+        print(f"loaded at startup but should be deferred: {', '.join(loaded)}")
+    return 1 if best > budget or loaded else 0
+
+
+def _same(a, b):
+    if isinstance(a, ProfileIndex):
+        a, b = a.features, b.features
+    if isinstance(a, WinProbability):
+        a, b = a.states, b.states
+    if isinstance(a, NameIndex):
+        return a.names == b.names
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_same(a[k], b[k]) for k in a)
+    if isinstance(a, (tuple, list)):
+        return type(a) is type(b) and len(a) == len(b) and all(_same(x, y) for x, y in zip(a, b))
+    if not isinstance(a, (pd.DataFrame, pd.Series)):
+        return type(a) is type(b) and a == b
+    try:
+        if isinstance(a, pd.Series):
+            pd.testing.assert_series_equal(a, b)
+        else:
+            pd.testing.assert_frame_equal(a, b)
+    except AssertionError:
+        return False
+    return True
+
+
+def engines(rows, repeat):
+    """Time ``build_all`` per engine; returns 1 if an engine's tables differ from the pandas ones."""
+    import engines as eng
+    failed = False
+    for n in rows:
+        df = synthetic.generate(n)
+        reference = None
+        for name in ag.ENGINES:
+            if not eng.available(name):
+                print(f"{n:>10,} {name:<8} not installed")
+                continue
+            ag.set_engine(name)
+            times = []
+            for _ in range(repeat):
+                frame = df.copy(deep=False)  # a new frame gets its own tables
+                start = time.perf_counter()
+                ag.build_all(frame)
+                times.append(time.perf_counter() - start)
+            tables = {table: ag.get(frame, table) for table in ag._builders}
+            reference = reference or tables
+            differ = [table for table in tables if not _same(reference[table], tables[table])]
+            failed |= bool(differ)
+            print(f"{n:>10,} {name:<8} {statistics.median(times) * 1000:10.2f} ms"
+                  + (f"  DIFFERS: {', '.join(differ)}" if differ else ""))
+    ag.set_engine('pandas')
+    return 1 if failed else 0
+
+
+def chunked(rows, chunk_rows):
+    """Check ``load_ipl_chunked`` builds exactly the tables ``load_ipl`` does; returns 1 if any differ."""
+    import tempfile
+    import data_loader as dl
+    failed = False
+    for n in rows:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'deliveries.csv')
+            synthetic.generate(n).to_csv(path, index=False)
+            start = time.perf_counter()
+            whole = ag.build_all(dl.load_ipl(path, use_cache=False))
+            whole_s = time.perf_counter() - start
+            start = time.perf_counter()
+            streamed = dl.load_ipl_chunked(path, chunk_rows=chunk_rows)
+            streamed_s = time.perf_counter() - start
+        differ = [table for table in ag._builders if not _same(ag.get(whole, table), ag.get(streamed, table))]
+        failed |= bool(differ)
+        print(f"{n:>10,} in memory {whole_s:8.2f} s  chunked ({chunk_rows:,} rows) {streamed_s:8.2f} s"
+              + (f"  DIFFERS: {', '.join(differ)}" if differ else "  identical"))
+    return 1 if failed else 0
+
+
+def api_paths(url, per_kind=10):
+    """The load-test request mix, as paths, over the ``per_kind`` busiest players, bowlers and teams."""
+    def get(path):
+        with urllib.request.urlopen(url + path) as response:
+            return json.load(response)['result']
+
+    def path(name, **params):
+        return f"/{name}?{urlencode(params)}"
+
+    busiest = {kind: get(path('search_names', query='', kind=kind, limit=per_kind))
+               for kind in ('players', 'bowlers', 'teams')}
+    players, bowlers, teams = busiest['players'], busiest['bowlers'], busiest['teams']
+    seasons = get('/seasons')
+    paths = []
+    for i, player in enumerate(players):
+        paths += [
+            path('player_analysis', player_name=player),
+            path('player_analysis', player_name=player, start_year=seasons[-3], end_year=seasons[-1]),
+            path('batting_by_phase', player_name=player),
+            path('toughest_bowlers', batter=player),
+            path('matchup', batter=player, bowler=bowlers[i % len(bowlers)]),
+            path('search_names', query=player[:4]),
+        ]
+    for bowler in bowlers:
+        paths += [path('bowler_record', bowler_name=bowler), path('bowling_by_phase', bowler_name=bowler)]
+    for team1, team2 in zip(teams, teams[1:]):
+        paths += [path('head_to_head', team1=team1, team2=team2), path('team_record', team_name=team1)]
+    paths += [path('leaderboard', metric='runs', season=season) for season in seasons]
+    return paths
+
+
+async def _get(reader, writer, host, path, etag=None):
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"] + ([f"If-None-Match: {etag}"] if etag else [])
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('etag')
+
+
+async def _load_test(url, paths, connections, duration, revalidate):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    start = time.perf_counter()
+    for path in paths:
+        _, etags[path] = await _get(reader, writer, parts.netloc, path)
+    warmup = time.perf_counter() - start
+    writer.close()
+
+    latencies, statuses = [], collections.Counter()
+    deadline = time.perf_counter() + duration
+
+    async def client(seed):
+        rng = random.Random(seed)
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while time.perf_counter() < deadline:
+                path = rng.choice(paths)
+                sent = time.perf_counter()
+                status, _ = await _get(reader, writer, parts.netloc, path, etags[path] if revalidate else None)
+                latencies.append(time.perf_counter() - sent)
+                statuses[status] += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client(seed) for seed in range(connections)))
+    return warmup, time.perf_counter() - start, latencies, statuses
+
+
+def api(url, connections, duration, revalidate):
+    """Load-test the API at ``url``; returns 1 if any request failed with a 5xx."""
+    url = url.rstrip('/')
+    paths = api_paths(url)
+    warmup, elapsed, latencies, statuses = asyncio.run(_load_test(url, paths, connections, duration, revalidate))
+    ms = np.percentile(latencies, [50, 99]) * 1000
+    print(f"warm-up: {len(paths)} distinct requests in {warmup:.2f} s ({warmup / len(paths) * 1000:.1f} ms each)")
+    print(f"{connections} connections, {elapsed:.1f} s: {len(latencies)} requests, "
+          f"{len(latencies) / elapsed:.0f} req/s, p50 {ms[0]:.2f} ms, p99 {ms[1]:.2f} ms")
+    print("statuses: " + ", ".join(f"{status} x{count}" for status, count in sorted(statuses.items())))
+    return 1 if any(status >= 500 for status in statuses) else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out', default='bench_results.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--threshold', type=float, default=1.25)
+    parser.add_argument('--startup', action='store_true')
+    parser.add_argument('--budget', type=float, default=1.0)
+    parser.add_argument('--engines', action='store_true')
+    parser.add_argument('--chunked', action='store_true')
+    parser.add_argument('--chunk-rows', type=int, default=7000)
+    parser.add_argument('--api', nargs='?', const='http://127.0.0.1:8000', metavar='URL')
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--revalidate', action='store_true')
+    args = parser.parse_args()
+    warnings.simplefilter('ignore')  # seaborn deprecation noise would drown the progress lines
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    if args.startup:
+        sys.exit(startup(args.budget))
+    if args.engines:
+        sys.exit(engines(args.rows, args.repeat))
+    if args.chunked:
+        sys.exit(chunked(args.rows, args.chunk_rows))
+    if args.api:
+        sys.exit(api(args.api, args.connections, args.duration, args.revalidate))
+
+    datasets, results = [], []
+    for rows in args.rows:
+        info, records = run(rows, args.repeat)
+        datasets.append(info)
+        results.extend(records)
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'machine': platform.platform(),
+            'datasets': datasets,
+        },
+        'results': results,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+    # Every public function must be timed: a new parameter name needs a value in sample_arguments.
+    sys.exit(1 if any(record['status'] == 'skipped' for record in results) else 0)
+
+
+if __name__ == '__main__':
+    main()
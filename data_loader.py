@@ -1,6 +1,423 @@
+import hashlib
+import io
+import json
+import os
+import threading
+
 import pandas as pd
 
-def load_ipl(path='D:/data science/Projects/IPl/datasets/cleanandmerged.csv'):
-    return pd.read_csv(path)
-def load_matches(path='D:/data science/datasets/ipl/matches.csv'):
+import aggregates as ag
+
+# Columns stored as categoricals in the columnar cache. Names, teams and venues
+# repeat hundreds of thousands of times, so dictionary-encoding them is most of
+# the memory win.
+CATEGORY_COLS = [
+    'batting_team', 'bowling_team', 'batter', 'bowler', 'non_striker',
+    'player_dismissed', 'fielder', 'dismissal_kind', 'extras_type',
+    'venue', 'city', 'team1', 'team2', 'toss_winner', 'toss_decision',
+    'winner', 'player_of_match', 'match_type', 'result',
+]
+CACHE_FORMAT = 1
+# Precomputed tables written next to the Arrow cache, so a warm start attaches
+# them instead of rebuilding them from every delivery.
+PERSISTED_TABLES = ['matchups', 'chase_states']
+DATA_PATH = 'D:/data science/Projects/IPl/datasets/cleanandmerged.csv'
+
+
+def _file_hash(path, block=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _appended_tail(path, size, sha256, block=1 << 20):
+    """
+    Bytes added to ``path`` after its first ``size`` bytes, or None if those
+    bytes no longer hash to ``sha256`` (the file was edited, not appended to).
+    Returns the tail and the hash of the whole file, computed in the same pass.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        remaining = size
+        while remaining:
+            chunk = f.read(min(block, remaining))
+            if not chunk:
+                return None
+            digest.update(chunk)
+            remaining -= len(chunk)
+        if digest.hexdigest() != sha256:
+            return None
+        tail = f.read()
+    digest.update(tail)
+    return tail, digest.hexdigest()
+
+
+def _cache_paths(path, cache_dir):
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(path)), '.cache')
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(cache_dir, stem + '.arrow'), os.path.join(cache_dir, stem + '.json')
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _cache_is_fresh(path, meta, meta_path):
+    """
+    Size and mtime are checked first; the content hash is only recomputed when
+    the mtime moved but the size did not (e.g. the file was touched or copied),
+    so a warm start never reads the CSV.
+    """
+    if not meta or meta.get('format') != CACHE_FORMAT:
+        return False
+    st = os.stat(path)
+    if st.st_size != meta['size']:
+        return False
+    if st.st_mtime_ns == meta['mtime_ns']:
+        return True
+    if _file_hash(path) != meta['sha256']:
+        return False
+    # Same content under a new mtime: record it so the next start skips hashing.
+    meta['mtime_ns'] = st.st_mtime_ns
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return True
+
+
+def optimize_dtypes(df):
+    """Convert name-like columns to categoricals and downcast small integer columns."""
+    for col in CATEGORY_COLS:
+        if col in df.columns and (pd.api.types.is_object_dtype(df[col]) or pd.api.types.is_string_dtype(df[col])):
+            df[col] = df[col].astype('category')
+    for col in df.select_dtypes(include='integer').columns:
+        df[col] = pd.to_numeric(df[col], downcast='integer')
+    if 'season' in df.columns and not pd.api.types.is_numeric_dtype(df['season']):
+        # Seasons like "2007/08" stay ordered so range filters keep working.
+        df['season'] = pd.Categorical(df['season'], categories=sorted(df['season'].dropna().unique()), ordered=True)
+    return df
+
+
+def _write_cache(df, path, cache_dir, st, sha256):
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    cache_path, meta_path = _cache_paths(path, cache_dir)
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = cache_path + '.tmp'
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp, compression='uncompressed')
+    os.replace(tmp, cache_path)
+    meta = {'format': CACHE_FORMAT, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': sha256}
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+    return meta
+
+
+def _table_path(path, cache_dir, name):
+    cache_path, _ = _cache_paths(path, cache_dir)
+    return os.path.splitext(cache_path)[0] + f'.{name}.arrow'
+
+
+def _write_tables(df, path, cache_dir, sha256):
+    """Write the ``PERSISTED_TABLES`` built for ``df``, tagged with the hash of the CSV they came from."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+
+    for name in PERSISTED_TABLES:
+        if not ag.built(df, name):
+            continue
+        table = pa.Table.from_pandas(ag.get(df, name))
+        table = table.replace_schema_metadata({**table.schema.metadata, b'sha256': sha256.encode()})
+        table_path = _table_path(path, cache_dir, name)
+        feather.write_feather(table, table_path + '.tmp', compression='uncompressed')
+        os.replace(table_path + '.tmp', table_path)
+
+
+def _attach_tables(df, path, cache_dir, sha256):
+    """Attach the persisted tables written for this exact CSV; build and write the missing or stale ones."""
+    import pyarrow as pa
+
+    stale = False
+    for name in PERSISTED_TABLES:
+        if ag.built(df, name):
+            continue
+        table_path = _table_path(path, cache_dir, name)
+        if os.path.exists(table_path):
+            with pa.memory_map(table_path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+            if (table.schema.metadata or {}).get(b'sha256') == sha256.encode():
+                ag.put(df, name, table.to_pandas())
+                continue
+        ag.get(df, name)
+        stale = True
+    if stale:
+        _write_tables(df, path, cache_dir, sha256)
+    return df
+
+
+def build_cache(path, cache_dir=None):
+    """Parse the CSV once and write it as an uncompressed Arrow IPC file next to a fingerprint."""
+    st = os.stat(path)
+    df = optimize_dtypes(pd.read_csv(path))
+    _write_cache(df, path, cache_dir, st, _file_hash(path))
+    return df
+
+
+def read_cache(cache_path):
+    import pyarrow as pa
+
+    with pa.memory_map(cache_path, 'r') as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.to_pandas()
+
+
+def load_ipl(path=DATA_PATH, cache_dir=None, use_cache=True):
+    """
+    Load the ball-by-ball dataset.
+
+    The first load converts the CSV into a typed Arrow IPC cache; later loads
+    memory-map that file instead of re-parsing, as long as the CSV still
+    matches the recorded size, mtime and hash. Rows appended to the CSV since
+    the cache was written are parsed on their own and added to it.
+    """
+    if not use_cache:
+        return optimize_dtypes(pd.read_csv(path))
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return optimize_dtypes(pd.read_csv(path))
+
+    cache_path, meta_path = _cache_paths(path, cache_dir)
+    meta = _read_meta(meta_path)
+    if os.path.exists(cache_path) and _cache_is_fresh(path, meta, meta_path):
+        df = read_cache(cache_path)
+    elif os.path.exists(cache_path) and meta and meta.get('format') == CACHE_FORMAT \
+            and os.path.getsize(path) > meta['size']:
+        cached = ag.set_source(read_cache(cache_path), path=path, cache_dir=cache_dir,
+                               size=meta['size'], sha256=meta['sha256'])
+        df = _catch_up(cached)
+        if df is None:
+            df = build_cache(path, cache_dir)
+        meta = _read_meta(meta_path)
+    else:
+        df = build_cache(path, cache_dir)
+        meta = _read_meta(meta_path)
+    ag.set_source(df, path=path, cache_dir=cache_dir, size=meta['size'], sha256=meta['sha256'])
+    _attach_tables(df, path, cache_dir, meta['sha256'])
+    # The CSV's content hash doubles as the dataset version for result caches.
+    return ag.set_version(df, meta['sha256'][:16])
+
+
+# ---------------- Incremental ingest ----------------
+def _align_categories(df, delta):
+    """
+    Return ``df`` and ``delta`` with each categorical column of ``df`` sharing
+    one dtype whose categories are the sorted union of both, as reading the
+    combined file in one go would give, so ties sort the same way.
+    """
+    df = df.copy(deep=False)
+    delta = delta[df.columns].copy()
+    for col in df.columns:
+        dtype = df[col].dtype
+        if not isinstance(dtype, pd.CategoricalDtype):
+            continue
+        values = delta[col].dropna().unique()
+        extra = pd.Index(values, dtype=dtype.categories.dtype).difference(dtype.categories) if len(values) else []
+        if len(extra):
+            dtype = pd.CategoricalDtype(dtype.categories.append(pd.Index(extra)).sort_values(), ordered=dtype.ordered)
+            df[col] = df[col].cat.set_categories(dtype.categories)
+        if isinstance(delta[col].dtype, pd.CategoricalDtype):
+            delta[col] = delta[col].cat.set_categories(dtype.categories).astype(dtype)
+        else:
+            delta[col] = delta[col].astype(dtype)
+    return df, delta
+
+
+def _catch_up(df):
+    """
+    ``df`` plus the rows appended to its CSV since it was loaded, with its
+    precomputed tables updated from the new rows alone and the Arrow cache
+    rewritten. Returns ``df`` itself when nothing was appended and None when
+    the file changed in some other way.
+    """
+    source = ag.source(df)
+    st = os.stat(source['path'])
+    if st.st_size == source['size']:
+        return df
+    found = _appended_tail(source['path'], source['size'], source['sha256'])
+    if found is None or st.st_size < source['size']:
+        return None
+    tail, sha256 = found
+    with open(source['path'], 'rb') as f:
+        header = f.readline()
+    delta = optimize_dtypes(pd.read_csv(io.BytesIO(header + tail)))
+    if delta['match_id'].isin(df['match_id'].unique()).any():
+        return None  # a match was split across the append; only a rebuild gets its innings right
+
+    df_aligned, delta = _align_categories(df, delta)
+    combined = pd.concat([df_aligned, delta], ignore_index=True)
+    ag.extend(df, delta, combined)
+    meta = _write_cache(combined, source['path'], source['cache_dir'], st, sha256)
+    _write_tables(combined, source['path'], source['cache_dir'], sha256)
+    ag.set_source(combined, path=source['path'], cache_dir=source['cache_dir'], size=meta['size'], sha256=sha256)
+    return ag.set_version(combined, sha256[:16])
+
+
+_refresh_lock = threading.Lock()
+
+
+def refresh(df):
+    """
+    Bring a frame returned by ``load_ipl`` up to date with its CSV.
+
+    Appended matches are read on their own and merged into the precomputed
+    tables, which takes seconds even on the full dataset; any other change
+    to the file falls back to a full ``load_ipl``. The result has a new
+    dataset version, so cached results for the old one are not reused.
+    Cheap (one stat call) when the file has not changed.
+    """
+    source = ag.source(df)
+    if source is None:
+        return df
+    with _refresh_lock:
+        updated = _catch_up(df)
+        if updated is None:
+            updated = load_ipl(source['path'], source['cache_dir'])
+        return updated
+
+
+def _append_csv(path, rows):
+    """Append ``rows`` to the CSV at ``path`` in the file's own column order."""
+    with open(path, 'rb') as f:
+        columns = pd.read_csv(f, nrows=0).columns
+        needs_newline = False
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b'\n'
+    missing = columns.difference(rows.columns)
+    if len(missing):
+        raise ValueError(f"New rows for {path} lack columns: {', '.join(missing)}")
+    with open(path, 'a', newline='') as f:
+        if needs_newline:
+            f.write('\n')
+        rows[columns].to_csv(f, header=False, index=False)
+
+
+def ingest(df, deliveries, matches=None, matches_path=None):
+    """
+    Append new matches to the dataset ``df`` was loaded from and return the
+    updated frame (see ``refresh``).
+
+    ``deliveries`` (and optionally ``matches``, for datasets whose match
+    details live in matches.csv) are DataFrames or CSV paths holding complete
+    matches not yet in ``df``.
+    """
+    source = ag.source(df)
+    if source is None:
+        raise ValueError("ingest() needs a frame returned by load_ipl()")
+    deliveries = pd.read_csv(deliveries) if isinstance(deliveries, str) else deliveries
+    if deliveries['match_id'].isin(df['match_id'].unique()).any():
+        raise ValueError("New deliveries include matches that are already loaded")
+    if matches is not None:
+        matches = pd.read_csv(matches) if isinstance(matches, str) else matches
+        _append_csv(matches_path or MATCHES_PATH, matches)
+    _append_csv(source['path'], deliveries)
+    return refresh(df)
+
+
+# ---------------- Chunked (out-of-core) loading ----------------
+CHUNK_MB = float(os.getenv('IPL_CHUNK_MB', '256'))
+
+
+class _HashingReader:
+    """File wrapper hashing the bytes as the CSV parser reads them, so streaming needs one pass."""
+
+    def __init__(self, f):
+        self._f = f
+        self.digest = hashlib.sha256()
+
+    def read(self, size=-1):
+        data = self._f.read(size)
+        self.digest.update(data)
+        return data
+
+    def __iter__(self):
+        return iter(self._f)
+
+
+def _chunk_rows(path, memory_mb, categorical):
+    """Rows per chunk so parsing and aggregating one chunk stays near ``memory_mb``."""
+    sample = pd.read_csv(path, nrows=10_000, dtype=categorical)
+    per_row = sample.memory_usage(deep=True).sum() / max(len(sample), 1)
+    # The parsed chunk, its typed copy and the per-chunk tables are alive together.
+    return max(10_000, int(memory_mb * 2**20 / (per_row * 4)))
+
+
+def load_ipl_chunked(path=DATA_PATH, memory_mb=CHUNK_MB, chunk_rows=None):
+    """
+    Fold the dataset into the precomputed tables chunk by chunk instead of
+    loading it whole.
+
+    Returns a zero-row frame with the dataset's columns and the finished
+    tables attached; every ``analysis`` function works on it and gives the
+    same results as on ``load_ipl``. Peak memory is about ``memory_mb`` for the
+    chunk being folded plus the tables themselves, which grow with players and
+    seasons rather than deliveries (except ``chase_balls``, about 20 bytes per
+    delivery of a decided chase). Deliveries must be grouped by match (the
+    usual ball-by-ball layout): a match cut off at a chunk boundary is carried
+    into the next chunk.
+    """
+    columns = pd.read_csv(path, nrows=0).columns
+    categorical = {col: 'object' for col in CATEGORY_COLS if col in columns}
+    chunk_rows = chunk_rows or _chunk_rows(path, memory_mb, categorical)
+
+    acc, carry, seen = None, None, set()
+
+    def fold(acc, chunk):
+        matches = chunk['match_id'].unique()
+        if seen.intersection(matches.tolist()):
+            raise ValueError("Chunked loading needs the deliveries of each match to be contiguous in the file")
+        seen.update(matches.tolist())
+        chunk = optimize_dtypes(chunk)
+        if acc is None:
+            return ag.fold(None, chunk, chunk.iloc[:0].copy())
+        target, chunk = _align_categories(acc, chunk)
+        return ag.fold(acc, chunk, target)
+
+    with open(path, 'rb') as f:
+        reader = _HashingReader(f)
+        for chunk in pd.read_csv(reader, chunksize=chunk_rows, dtype=categorical):
+            if carry is not None:
+                chunk = pd.concat([carry, chunk], ignore_index=True)
+            last = chunk['match_id'].iloc[-1]
+            tail = chunk['match_id'].eq(last).to_numpy()
+            carry = chunk[tail]
+            if not tail.all():
+                acc = fold(acc, chunk[~tail].reset_index(drop=True))
+        if carry is not None and len(carry):
+            acc = fold(acc, carry.reset_index(drop=True))
+        reader.read()  # hash anything the parser left unread
+    return ag.set_version(acc, reader.digest.hexdigest()[:16])
+
+
+def load_with_tables(path=DATA_PATH):
+    """
+    The dataset with every aggregate table built, for processes that serve
+    many queries: streamed with ``load_ipl_chunked`` when ``IPL_CHUNKED=1``,
+    else ``load_ipl``.
+    """
+    if os.getenv('IPL_CHUNKED') == '1':
+        return load_ipl_chunked(path)
+    return ag.build_all(load_ipl(path))
+
+
+MATCHES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datasets', 'matches.csv')
+
+
+def load_matches(path=MATCHES_PATH):
     return pd.read_csv(path)
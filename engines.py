@@ -0,0 +1,248 @@
+"""
+DuckDB and Polars builders for the deliveries-level aggregate tables.
+
+Selected with IPL_ENGINE=duckdb or IPL_ENGINE=polars (or
+``aggregates.set_engine``). The per-ball grouping behind the batting,
+bowling and innings tables runs on the engine's multi-threaded columnar
+executor over a numeric view of the deliveries frame: categorical columns
+are handed over as their integer codes, so no strings are copied. The small
+grouped result comes back to pandas and is finished by the same code as the
+pandas build, so every engine produces the same tables
+(``bench.py --engines`` checks this and times each one).
+"""
+import importlib.util
+
+import numpy as np
+import pandas as pd
+
+import aggregates as ag
+
+
+def available(engine):
+    """True if ``engine``'s package is installed."""
+    return engine == 'pandas' or importlib.util.find_spec(engine) is not None
+
+
+class _Codes:
+    """
+    ``cols`` of a deliveries frame as plain numbers: categorical and string
+    columns become integer codes (-1 where missing), numeric columns are
+    passed through. A column the frame lacks reads as all missing, which is
+    how the pandas builders treat it too.
+    """
+
+    def __init__(self, df, cols):
+        self.df = df
+        self.categories = {}
+        data = {}
+        for col in cols:
+            if col not in df.columns:
+                data[col] = np.full(len(df), -1, dtype='int8')
+                self.categories[col] = pd.Index([])
+                continue
+            values = df[col]
+            if not isinstance(values.dtype, pd.CategoricalDtype) and not pd.api.types.is_numeric_dtype(values.dtype):
+                values = values.astype('category')
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                self.categories[col] = values.cat.categories
+                values = values.cat.codes
+            data[col] = values.to_numpy()
+        self.frame = pd.DataFrame(data, copy=False)
+
+    def codes(self, col, values):
+        """Codes of those ``values`` that occur in ``col``'s categories."""
+        categories = self.categories[col]
+        return [int(categories.get_loc(v)) for v in values if v in categories]
+
+    def keys(self, cols):
+        """The coded columns among ``cols``: rows where any of them is -1 are dropped from a grouping."""
+        return [col for col in cols if col in self.categories]
+
+    def decode(self, table, cols):
+        """Put ``df``'s values and dtypes back into the ``cols`` of an engine result."""
+        for col in cols:
+            dtype = self.df[col].dtype
+            if col not in self.categories:
+                table[col] = table[col].astype(dtype)
+            elif isinstance(dtype, pd.CategoricalDtype):
+                table[col] = pd.Categorical.from_codes(table[col].astype('int64'), dtype=dtype)
+            else:
+                codes = table[col].astype('int64').to_numpy()
+                table[col] = pd.Series(self.categories[col].take(codes), index=table.index).where(codes >= 0)
+                table[col] = table[col].astype(dtype)
+        return table
+
+
+# ---------------- DuckDB ----------------
+def _in(col, codes):
+    return f"{col} IN ({', '.join(map(str, codes))})" if codes else "FALSE"
+
+
+def _known(cols):
+    return " AND ".join(f"{col} >= 0" for col in cols) or "TRUE"
+
+
+def _duckdb(frame, sql):
+    import duckdb
+    con = duckdb.connect()
+    try:
+        con.register('d', frame)
+        return con.execute(sql).df()
+    finally:
+        con.close()
+
+
+BATTING_COLS = ['batter', 'season', 'bowling_team', 'match_id', 'batsman_runs', 'extras_type', 'player_dismissed']
+BOWLING_COLS = ['bowler', 'season', 'batting_team', 'bowling_team', 'match_id',
+                'batsman_runs', 'total_runs', 'extras_type', 'is_wicket', 'dismissal_kind']
+INNINGS_COLS = ['match_id', 'inning', 'season', 'batting_team', 'bowling_team', 'total_runs', 'is_wicket', 'extras_type']
+FACT_COLS = ['match_id', 'inning', 'total', 'wickets', 'balls', 'season', 'batting_team', 'bowling_team']
+
+
+def _batting_table(codes, cube, dismissals):
+    keys = ag.BATTING_KEYS
+    cube = codes.decode(cube, keys).set_index(keys)
+    dismissals = codes.decode(dismissals, ['player_dismissed', 'season', 'bowling_team'])
+    dismissals = dismissals.rename(columns={'player_dismissed': 'batter'}).set_index(keys)['dismissals']
+    return ag._batting_table(cube, dismissals)
+
+
+@ag.register_engine('duckdb', 'batting')
+def duckdb_batting(df):
+    codes = _Codes(df, BATTING_COLS)
+    keys = ', '.join(ag.BATTING_KEYS)
+    wides = codes.codes('extras_type', ['wides'])
+    cube = _duckdb(codes.frame, f"""
+        WITH innings AS (
+            SELECT {keys}, match_id,
+                   sum(batsman_runs)::INTEGER AS runs,
+                   sum((NOT {_in('extras_type', wides)})::INTEGER) AS balls,
+                   sum((batsman_runs = 4)::INTEGER) AS fours,
+                   sum((batsman_runs = 6)::INTEGER) AS sixes
+            FROM d WHERE {_known(codes.keys(ag.BATTING_KEYS))}
+            GROUP BY {keys}, match_id)
+        SELECT {keys}, sum(runs) AS runs, sum(balls) AS balls, sum(fours) AS fours, sum(sixes) AS sixes,
+               count(*) AS innings, sum((runs >= 50 AND runs < 100)::INTEGER) AS fifties,
+               sum((runs >= 100)::INTEGER) AS hundreds, max(runs) AS high_score
+        FROM innings GROUP BY {keys}""")
+    dismissals = _duckdb(codes.frame, f"""
+        SELECT player_dismissed, season, bowling_team, count(*) AS dismissals
+        FROM d WHERE {_known(codes.keys(['player_dismissed', 'season', 'bowling_team']))}
+        GROUP BY player_dismissed, season, bowling_team""")
+    return _batting_table(codes, cube, dismissals)
+
+
+def _bowling_table(codes, cube):
+    cube = codes.decode(cube, ag.BOWLING_KEYS).set_index(ag.BOWLING_KEYS)
+    return cube[['balls', 'runs', 'dots', 'wickets', 'innings']].astype('int32').sort_index()
+
+
+@ag.register_engine('duckdb', 'bowling')
+def duckdb_bowling(df):
+    codes = _Codes(df, BOWLING_COLS)
+    keys = ', '.join(ag.BOWLING_KEYS)
+    legal = f"NOT {_in('extras_type', codes.codes('extras_type', ['wides', 'noballs']))}"
+    byes = _in('extras_type', codes.codes('extras_type', ['byes', 'legbyes']))
+    credited = f"NOT {_in('dismissal_kind', codes.codes('dismissal_kind', ag.NON_BOWLER_DISMISSALS))}"
+    cube = _duckdb(codes.frame, f"""
+        WITH innings AS (
+            SELECT {keys}, match_id,
+                   sum(({legal})::INTEGER) AS balls,
+                   sum(CASE WHEN {byes} THEN batsman_runs ELSE total_runs END)::INTEGER AS runs,
+                   sum(({legal} AND total_runs = 0)::INTEGER) AS dots,
+                   sum((is_wicket <> 0 AND {credited})::INTEGER) AS wickets
+            FROM d WHERE {_known(codes.keys(ag.BOWLING_KEYS))}
+            GROUP BY {keys}, match_id)
+        SELECT {keys}, sum(balls) AS balls, sum(runs) AS runs, sum(dots) AS dots,
+               sum(wickets) AS wickets, count(*) AS innings
+        FROM innings GROUP BY {keys}""")
+    return _bowling_table(codes, cube)
+
+
+def _innings_table(codes, facts):
+    # Season and teams are constant within an innings; max() skips missing (-1) codes.
+    facts = codes.decode(facts[FACT_COLS], ['match_id', 'inning', 'season', 'batting_team', 'bowling_team'])
+    facts[['total', 'wickets', 'balls']] = facts[['total', 'wickets', 'balls']].astype('int32')
+    return ag._innings_table(codes.df, facts.reset_index(drop=True))
+
+
+@ag.register_engine('duckdb', 'innings')
+def duckdb_innings(df):
+    codes = _Codes(df, INNINGS_COLS)
+    legal = f"NOT {_in('extras_type', codes.codes('extras_type', ['wides', 'noballs']))}"
+    facts = _duckdb(codes.frame, f"""
+        SELECT match_id, inning, sum(total_runs) AS total, sum(is_wicket) AS wickets,
+               sum(({legal})::INTEGER) AS balls,
+               max(season) AS season, max(batting_team) AS batting_team, max(bowling_team) AS bowling_team
+        FROM d WHERE inning <= 2
+        GROUP BY match_id, inning ORDER BY match_id, inning""")
+    return _innings_table(codes, facts)
+
+
+# ---------------- Polars ----------------
+def _polars(codes, cols):
+    import polars as pl
+    return pl.from_pandas(codes.frame[cols])
+
+
+def _known_pl(cols):
+    import polars as pl
+    return pl.all_horizontal([pl.col(col) >= 0 for col in cols]) if cols else pl.lit(True)
+
+
+@ag.register_engine('polars', 'batting')
+def polars_batting(df):
+    import polars as pl
+    codes = _Codes(df, BATTING_COLS)
+    d = _polars(codes, BATTING_COLS)
+    runs = pl.col('batsman_runs').cast(pl.Int32)
+    legal = ~pl.col('extras_type').is_in(codes.codes('extras_type', ['wides']))
+    innings = (d.filter(_known_pl(codes.keys(ag.BATTING_KEYS)))
+               .group_by(ag.BATTING_KEYS + ['match_id'])
+               .agg(runs.sum().alias('runs'), legal.cast(pl.Int32).sum().alias('balls'),
+                    (runs == 4).cast(pl.Int32).sum().alias('fours'), (runs == 6).cast(pl.Int32).sum().alias('sixes')))
+    score = pl.col('runs')
+    cube = (innings.group_by(ag.BATTING_KEYS)
+            .agg(score.sum().alias('runs'), pl.col('balls').sum(), pl.col('fours').sum(), pl.col('sixes').sum(),
+                 pl.len().alias('innings'), ((score >= 50) & (score < 100)).cast(pl.Int32).sum().alias('fifties'),
+                 (score >= 100).cast(pl.Int32).sum().alias('hundreds'), score.max().alias('high_score')))
+    dismissals = (d.filter(_known_pl(codes.keys(['player_dismissed', 'season', 'bowling_team'])))
+                  .group_by(['player_dismissed', 'season', 'bowling_team'])
+                  .agg(pl.len().alias('dismissals')))
+    return _batting_table(codes, cube.to_pandas(), dismissals.to_pandas())
+
+
+@ag.register_engine('polars', 'bowling')
+def polars_bowling(df):
+    import polars as pl
+    codes = _Codes(df, BOWLING_COLS)
+    d = _polars(codes, BOWLING_COLS)
+    legal = ~pl.col('extras_type').is_in(codes.codes('extras_type', ['wides', 'noballs']))
+    byes = pl.col('extras_type').is_in(codes.codes('extras_type', ['byes', 'legbyes']))
+    credited = ~pl.col('dismissal_kind').is_in(codes.codes('dismissal_kind', ag.NON_BOWLER_DISMISSALS))
+    runs = pl.when(byes).then(pl.col('batsman_runs')).otherwise(pl.col('total_runs')).cast(pl.Int32)
+    innings = (d.filter(_known_pl(codes.keys(ag.BOWLING_KEYS)))
+               .group_by(ag.BOWLING_KEYS + ['match_id'])
+               .agg(legal.cast(pl.Int32).sum().alias('balls'), runs.sum().alias('runs'),
+                    (legal & (pl.col('total_runs') == 0)).cast(pl.Int32).sum().alias('dots'),
+                    ((pl.col('is_wicket') != 0) & credited).cast(pl.Int32).sum().alias('wickets')))
+    cube = (innings.group_by(ag.BOWLING_KEYS)
+            .agg(pl.col('balls').sum(), pl.col('runs').sum(), pl.col('dots').sum(), pl.col('wickets').sum(),
+                 pl.len().alias('innings')))
+    return _bowling_table(codes, cube.to_pandas())
+
+
+@ag.register_engine('polars', 'innings')
+def polars_innings(df):
+    import polars as pl
+    codes = _Codes(df, INNINGS_COLS)
+    d = _polars(codes, INNINGS_COLS)
+    legal = ~pl.col('extras_type').is_in(codes.codes('extras_type', ['wides', 'noballs']))
+    facts = (d.filter(pl.col('inning') <= 2)
+             .group_by(['match_id', 'inning'])
+             .agg(pl.col('total_runs').cast(pl.Int32).sum().alias('total'),
+                  pl.col('is_wicket').cast(pl.Int32).sum().alias('wickets'),
+                  legal.cast(pl.Int32).sum().alias('balls'),
+                  pl.col('season').max(), pl.col('batting_team').max(), pl.col('bowling_team').max())
+             .sort(['match_id', 'inning']))
+    return _innings_table(codes, facts.to_pandas())
@@ -0,0 +1,215 @@
+"""
+Opt-in call tracing for analysis, visualize and llmutil.
+
+Enable with ``IPL_PROFILE=1`` (or ``IPL_PROFILE=alloc`` to also record
+allocation deltas through tracemalloc), or call ``enable()`` at runtime.
+When disabled, a traced function costs one flag check on top of the call.
+"""
+import collections
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+_enabled = False
+_spans = collections.deque(maxlen=int(os.getenv('IPL_PROFILE_SPANS', '20000')))
+_local = threading.local()
+_origin_ns = time.perf_counter_ns()
+_pid = os.getpid()
+
+
+def enable(allocations=False):
+    global _enabled
+    if allocations and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def is_enabled():
+    return _enabled
+
+
+def clear():
+    _spans.clear()
+
+
+def _stack():
+    stack = getattr(_local, 'stack', None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def note(**counters):
+    """Add counters (rows, cache_hits, cache_misses, ...) to the innermost active call on this thread."""
+    if not _enabled:
+        return
+    stack = _stack()
+    if stack:
+        span = stack[-1]
+        for key, value in counters.items():
+            span[key] = span.get(key, 0) + value
+
+
+class _Span(dict):
+    def __init__(self, name):
+        super().__init__(name=name, tid=threading.get_ident(), depth=len(_stack()))
+        self._wall = self._cpu = 0
+        self._alloc = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+
+    def resume(self):
+        _stack().append(self)
+        self._wall_start = time.perf_counter_ns()
+        self._cpu_start = time.thread_time_ns()
+        self.setdefault('start_us', (self._wall_start - _origin_ns) / 1000)
+
+    def pause(self):
+        self._wall += time.perf_counter_ns() - self._wall_start
+        self._cpu += time.thread_time_ns() - self._cpu_start
+        stack = _stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+
+    def finish(self, error=None):
+        self['wall_us'] = self._wall / 1000
+        self['cpu_us'] = self._cpu / 1000
+        if self._alloc is not None and tracemalloc.is_tracing():
+            self['alloc_bytes'] = tracemalloc.get_traced_memory()[0] - self._alloc
+        if error is not None:
+            self['error'] = type(error).__name__
+        _spans.append(dict(self))
+
+
+def traced(fn):
+    """Record a span for every call of ``fn`` while tracing is enabled (generators and coroutines included)."""
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    if inspect.isgeneratorfunction(fn):
+        @functools.wraps(fn)
+        def gen_wrapper(*args, **kwargs):
+            if not _enabled:
+                return (yield from fn(*args, **kwargs))
+            span = _Span(name)
+            gen = fn(*args, **kwargs)
+            error = None
+            try:
+                while True:
+                    span.resume()
+                    try:
+                        item = next(gen)
+                    finally:
+                        span.pause()
+                    yield item
+            except StopIteration as stop:
+                return stop.value
+            except GeneratorExit:
+                raise
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                gen.close()
+                span.finish(error)
+        return gen_wrapper
+
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            if not _enabled:
+                return await fn(*args, **kwargs)
+            # Wall time only: the awaited work runs on other threads or the event loop.
+            span = _Span(name)
+            start = time.perf_counter_ns()
+            span['start_us'] = (start - _origin_ns) / 1000
+            error = None
+            try:
+                return await fn(*args, **kwargs)
+            except BaseException as e:
+                error = e
+                raise
+            finally:
+                span._wall = time.perf_counter_ns() - start
+                span.finish(error)
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return fn(*args, **kwargs)
+        span = _Span(name)
+        span.resume()
+        error = None
+        try:
+            return fn(*args, **kwargs)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            span.pause()
+            span.finish(error)
+    return wrapper
+
+
+# ---------------- Reporting ----------------
+def spans():
+    return list(_spans)
+
+
+def summary():
+    """Per-function totals over the recorded spans."""
+    frame = pd.DataFrame(spans())
+    if frame.empty:
+        return frame
+    for col in ('rows', 'cache_hits', 'cache_misses', 'alloc_bytes'):
+        frame[col] = frame[col].fillna(0).astype('int64') if col in frame.columns else 0
+    table = frame.groupby('name').agg(
+        calls=('wall_us', 'size'),
+        wall_ms=('wall_us', lambda s: s.sum() / 1000),
+        mean_ms=('wall_us', lambda s: s.mean() / 1000),
+        max_ms=('wall_us', lambda s: s.max() / 1000),
+        cpu_ms=('cpu_us', lambda s: s.sum() / 1000),
+        rows=('rows', 'sum'),
+        cache_hits=('cache_hits', 'sum'),
+        cache_misses=('cache_misses', 'sum'),
+        alloc_bytes=('alloc_bytes', 'sum'),
+    )
+    return table.sort_values('wall_ms', ascending=False)
+
+
+def to_json():
+    return json.dumps(spans(), default=float)
+
+
+def to_chrome_trace():
+    """Spans in Chrome trace-event format (load in chrome://tracing or Perfetto)."""
+    events = []
+    for span in spans():
+        args = {k: v for k, v in span.items() if k not in ('name', 'tid', 'start_us', 'wall_us', 'depth')}
+        events.append({
+            'name': span['name'].rsplit('.', 1)[-1],
+            'cat': span['name'].split('.', 1)[0],
+            'ph': 'X',
+            'ts': span['start_us'],
+            'dur': span['wall_us'],
+            'pid': _pid,
+            'tid': span['tid'],
+            'args': args,
+        })
+    return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'}, default=float)
+
+
+_mode = os.getenv('IPL_PROFILE', '')
+if _mode:
+    enable(allocations=_mode == 'alloc')
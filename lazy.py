@@ -0,0 +1,28 @@
+"""Deferred imports for modules the app only needs once a chart or summary is requested."""
+import importlib
+import importlib.util
+import sys
+import threading
+
+_lock = threading.Lock()
+
+
+def module(name):
+    """
+    Return ``name`` as a module object that is only executed on first attribute access.
+
+    Already imported modules are returned as they are. ``name`` must be a
+    top-level module: looking up a submodule imports its parent package.
+    """
+    with _lock:
+        if name in sys.modules:
+            return sys.modules[name]
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ImportError(f"No module named {name!r}", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        mod = importlib.util.module_from_spec(spec)
+        sys.modules[name] = mod
+        loader.exec_module(mod)
+        return mod
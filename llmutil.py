@@ -1,22 +1,275 @@
-import google.generativeai as genai
+import asyncio
+import functools
+import hashlib
 import os
+import queue
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dotenv import load_dotenv
 
+import instrument
+from instrument import traced
+
 # Load .env if not running inside Streamlit
 load_dotenv()
 
+MODEL_NAME = "gemini-1.5-pro"
+CACHE_PATH = os.getenv("IPL_LLM_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "llm_responses.sqlite3"))
+CACHE_TTL = float(os.getenv("IPL_LLM_CACHE_TTL", 7 * 24 * 3600))  # seconds
+CACHE_MAX_BYTES = int(float(os.getenv("IPL_LLM_CACHE_MB", "50")) * 2**20)
+LLM_TIMEOUT = float(os.getenv("IPL_LLM_TIMEOUT", "30"))  # seconds per request
+LLM_RETRIES = int(os.getenv("IPL_LLM_RETRIES", "2"))
+LLM_CONCURRENCY = int(os.getenv("IPL_LLM_CONCURRENCY", "4"))
+
+# The Gemini SDK takes seconds to import, so it is loaded on the first real request.
+_api_key = None
+_genai = None
+_genai_lock = threading.Lock()
+
 def setup_gemini(api_key=None):
+    global _api_key
     if api_key is None:
         api_key = os.getenv("API_KEY")  # fallback for CLI/local
-    genai.configure(api_key=api_key)
+    with _genai_lock:
+        _api_key = api_key
+        if _genai is not None:
+            _genai.configure(api_key=api_key)
+
+def _client():
+    global _genai
+    with _genai_lock:
+        if _genai is None:
+            import google.generativeai as genai
+            genai.configure(api_key=_api_key)
+            _genai = genai
+        return _genai
+
+def _gemini_stream(prompt, model_name, timeout):
+    model = _client().GenerativeModel(model_name)
+    response = model.generate_content(prompt, stream=True, request_options={"timeout": timeout})
+    for chunk in response:
+        if chunk.text:
+            yield chunk.text
+
+def fake_backend(reply=None, delay=0.05):
+    """
+    Stand-in model for local runs and tests: streams ``reply`` (or an echo of
+    the prompt) word by word with ``delay`` seconds between words.
+    """
+    def stream(prompt, model_name, timeout):
+        text = reply if reply is not None else f"[{model_name}] {prompt}"
+        for word in text.split(" "):
+            time.sleep(delay)
+            yield word + " "
+    return stream
+
+_backend = fake_backend() if os.getenv("IPL_LLM_BACKEND") == "fake" else _gemini_stream
+
+def set_backend(stream_fn=None):
+    """
+    Replace the model call with ``stream_fn(prompt, model_name, timeout)``,
+    an iterable of text chunks (e.g. a client for a local fake server).
+    Passing None restores Gemini. Returns the previous backend.
+    """
+    global _backend
+    previous = _backend
+    _backend = stream_fn or _gemini_stream
+    return previous
+
+
+# ---------------- Response cache ----------------
+class ResponseCache:
+    """
+    On-disk cache of model responses keyed by sha256(model, prompt).
+
+    Backed by SQLite so several app or report processes can share it. Entries
+    expire after ``ttl`` seconds; once the stored text exceeds ``max_bytes``
+    the least recently read entries are dropped. Recent entries are also kept
+    in memory so a repeat question in the same process skips SQLite.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, memory_entries=512):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._memory_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _remember(self, key, created, text):
+        with self._memory_lock:
+            self._memory[key] = (created, text)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, created REAL, accessed REAL, size INTEGER, text TEXT)"
+            )
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(model_name, prompt):
+        return hashlib.sha256(f"{model_name}\0{prompt}".encode("utf-8")).hexdigest()
 
-def _gemini_summary(prompt):
+    def get(self, key):
+        text = self._lookup(key)
+        instrument.note(cache_hits=text is not None, cache_misses=text is None)
+        return text
+
+    def _lookup(self, key):
+        now = time.time()
+        with self._memory_lock:
+            hit = self._memory.get(key)
+        if hit is not None and now - hit[0] <= self.ttl:
+            return hit[1]
+        conn = self._conn()
+        row = conn.execute("SELECT created, text FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        if now - row[0] > self.ttl:
+            with conn:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        with conn:
+            conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        self._remember(key, row[0], row[1])
+        return row[1]
+
+    def put(self, key, model_name, text):
+        conn = self._conn()
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, now, now, size, text),
+            )
+            conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk entries from least recently read and drop until under the cap.
+                for old_key, old_size in conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM responses WHERE key = ?", (old_key,))
+                    total -= old_size
+        self._remember(key, now, text)
+
+    def clear(self):
+        with self._memory_lock:
+            self._memory.clear()
+        with self._conn() as conn:
+            conn.execute("DELETE FROM responses")
+
+
+response_cache = ResponseCache()
+
+# The pool size is the concurrency limit: extra summaries queue for a free worker.
+_executor = ThreadPoolExecutor(max_workers=LLM_CONCURRENCY, thread_name_prefix="llm")
+_DONE = object()
+
+# Requests currently waiting on the model, so identical concurrent prompts share one call.
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+def _pump(prompt, model_name, timeout, retries, backoff, out):
+    """Worker: run the backend, pushing chunks to ``out``. Retries stop once any text was sent."""
+    attempt = 0
+    while True:
+        sent = False
+        try:
+            for chunk in _backend(prompt, model_name, timeout):
+                sent = True
+                out.put(chunk)
+            out.put(_DONE)
+            return
+        except Exception as e:
+            if sent or attempt >= retries:
+                out.put(e)
+                return
+            time.sleep(backoff * 2 ** attempt * (0.5 + random.random()))
+            attempt += 1
+
+def _stream(prompt, model_name, timeout, retries, backoff):
+    key = ResponseCache.key(model_name, prompt)
+    text = response_cache.get(key)
+    if text is not None:
+        yield text
+        return
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        yield future.result(timeout=timeout * (retries + 1))
+        return
+
+    parts = []
     try:
-        model = genai.GenerativeModel("gemini-1.5-pro")
-        response = model.generate_content(prompt)
-        return response.text
+        out = queue.Queue()
+        _executor.submit(_pump, prompt, model_name, timeout, retries, backoff, out)
+        deadline = time.monotonic() + timeout * (retries + 1) + backoff * 2 ** (retries + 1)
+        while True:
+            try:
+                item = out.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                raise TimeoutError(f"No response from {model_name} within the time limit") from None
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                raise item
+            parts.append(item)
+            deadline = time.monotonic() + timeout  # after the first chunk, only a stall times out
+            yield item
+        text = "".join(parts)
+        response_cache.put(key, model_name, text)
+        future.set_result(text)
+    except GeneratorExit:
+        future.set_exception(RuntimeError("Summary request was cancelled"))
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+@traced
+def stream_summary(prompt, model_name=MODEL_NAME, timeout=LLM_TIMEOUT, retries=LLM_RETRIES, backoff=0.5):
+    """
+    Yield the summary for ``prompt`` chunk by chunk as the model produces it.
+
+    Cached answers come back as a single chunk. The call runs on the LLM
+    worker pool with a per-request ``timeout`` (seconds) and up to ``retries``
+    retries with jittered exponential backoff. Failures are yielded as a
+    "Gemini Error" message, never cached.
+    """
+    try:
+        yield from _stream(prompt, model_name, timeout, retries, backoff)
     except Exception as e:
-        return f"Gemini Error: {str(e)}"
+        yield f"Gemini Error: {str(e)}"
+
+@traced
+def summarize_stats(prompt, **kwargs):
+    return "".join(stream_summary(prompt, **kwargs))
 
-def summarize_stats(prompt):
-    return _gemini_summary(prompt)
+@traced
+async def summarize_async(prompt, **kwargs):
+    """Awaitable summarize_stats for async callers; the wait happens off the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(summarize_stats, prompt, **kwargs))
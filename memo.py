@@ -0,0 +1,119 @@
+import functools
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import aggregates as ag
+import instrument
+
+
+def sizeof(obj):
+    """Approximate in-memory size of a cached result in bytes."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True, index=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(sizeof(item) for item in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sizeof(k) + sizeof(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+class ResultCache:
+    """
+    Process-wide LRU cache bounded by the total size of the stored results.
+
+    Every Streamlit session runs in the same process, so one entry serves all
+    of them. Results are shared objects: callers must not modify them in place.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        instrument.note(cache_hits=entry is not None, cache_misses=entry is None)
+        return entry
+
+    def put(self, key, value):
+        size = sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+results = ResultCache(int(float(os.getenv('IPL_RESULT_CACHE_MB', '256')) * 2**20))
+
+
+def cached(fn):
+    """
+    Memoize ``fn(df, *args, **kwargs)`` in the shared result cache.
+
+    The key is the function, the dataset version of ``df`` and the remaining
+    arguments, so a new or re-ingested dataset never sees stale results.
+    Calls with unhashable arguments go straight through.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(df, *args, **kwargs):
+        key = (name, ag.version(df), args, tuple(sorted(kwargs.items())))
+        try:
+            entry = results.get(key)
+        except TypeError:
+            return fn(df, *args, **kwargs)
+        if entry is not None:
+            return entry[0]
+        value = fn(df, *args, **kwargs)
+        results.put(key, value)
+        return value
+
+    wrapper.uncached = fn
+    return wrapper
+
+
+def stats():
+    return results.stats()
@@ -1,15 +1,3 @@
-import  streamlit as st
-import data_loader as dl
-import analysis as an
-import visualize as vv
-import pandas as pd
-import llmutil as ai
-def load_data():
-    return dl.load_ipl()
-
-df = load_data()
-
-
 # Player Summary Prompt
 
 # ---------------- Player Prompts ----------------
@@ -0,0 +1,86 @@
+"""
+Render visualize.py plots to PNG/SVG bytes on the headless Agg backend.
+
+Rendered images are cached by plot function, arguments, output format and
+dataset version, and every figure is closed as soon as it is saved. Drawing
+happens on a bounded worker pool: identical requests in flight share one
+render, and a slow chart only ties up its own worker.
+"""
+import io
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+import aggregates as ag  # noqa: E402
+import memo  # noqa: E402
+import visualize as vv  # noqa: E402
+
+RENDER_WORKERS = int(os.getenv('IPL_RENDER_WORKERS', '4'))
+RENDER_TIMEOUT = float(os.getenv('IPL_RENDER_TIMEOUT', '120'))  # seconds
+images = memo.ResultCache(int(float(os.getenv('IPL_FIGURE_CACHE_MB', '64')) * 2**20))
+
+_executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix="render")
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def figure_bytes(fig, fmt='png', dpi=100):
+    """Save a matplotlib Figure or seaborn grid to bytes and close it."""
+    fig = getattr(fig, 'figure', fig)  # FacetGrid and friends wrap a Figure
+    try:
+        buf = io.BytesIO()
+        fig.savefig(buf, format=fmt, dpi=dpi, bbox_inches='tight')
+        return buf.getvalue()
+    finally:
+        plt.close(fig)
+
+
+def _draw(name, df, args, kwargs, fmt, dpi):
+    fig = getattr(vv, name)(df, *args, **kwargs)
+    if fig is None:
+        raise TypeError(f"visualize.{name} did not return a figure")
+    return figure_bytes(fig, fmt, dpi)
+
+
+def render(name, df, *args, fmt='png', dpi=100, **kwargs):
+    """
+    Return ``visualize.<name>(df, *args, **kwargs)`` rendered as ``fmt`` bytes.
+
+    Only matplotlib/seaborn plots can be rendered; Plotly figures are passed
+    to the page as they are.
+    """
+    key = (name, ag.version(df), args, tuple(sorted(kwargs.items())), fmt, dpi)
+    try:
+        entry = images.get(key)
+    except TypeError:
+        return _executor.submit(_draw, name, df, args, kwargs, fmt, dpi).result(timeout=RENDER_TIMEOUT)
+    if entry is not None:
+        return entry[0]
+
+    with _inflight_lock:
+        future = _inflight.get(key)
+        leader = future is None
+        if leader:
+            future = _inflight[key] = Future()
+    if not leader:
+        return future.result(timeout=RENDER_TIMEOUT)
+
+    try:
+        data = _executor.submit(_draw, name, df, args, kwargs, fmt, dpi).result(timeout=RENDER_TIMEOUT)
+        images.put(key, data)
+        future.set_result(data)
+        return data
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def stats():
+    return images.stats()
@@ -0,0 +1,325 @@
+"""
+Pre-match briefing packs without Streamlit.
+
+Usage:
+    python report.py --all-teams --from 2018 --to 2023
+    python report.py --teams "Mumbai Indians" "Chennai Super Kings" --key-players 3 --format pdf
+    python report.py --players "V Kohli" "JJ Bumrah" --summaries
+
+A team pack holds the team's record (overall, by season, against each
+opponent), its phase splits, highest totals and chases, and a page for each
+of its top run scorers and wicket takers in the season range. ``--players``
+writes one pack per named player. ``--summaries`` adds the Gemini summaries
+the app shows (see llmutil; ``IPL_LLM_BACKEND=fake`` works offline).
+
+Packs are built and written in a process pool of ``--workers`` processes,
+one whole pack per task, so charts go straight from the figure to the file
+and a ten-team run keeps ten cores busy. The dataset is loaded and its
+aggregate tables built once, in this process, before the pool starts:
+forked workers share them copy-on-write. Where processes are spawned rather
+than forked, each worker memory-maps the Arrow cache written by the first
+load instead of re-parsing the CSV.
+"""
+import argparse
+import base64
+import html
+import multiprocessing
+import os
+import re
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+import analysis as an
+import data_loader as dl
+import llmutil as ai
+import prompts as pm
+import render
+import visualize as vv
+
+# The frame workers build pages from: set here before forking, or loaded by _init_worker.
+_df = None
+_summaries = False
+
+_CSS = """
+body { font-family: sans-serif; margin: 2em auto; max-width: 1100px; color: #222; }
+h2 { border-bottom: 2px solid #1f4e79; padding-top: 1em; }
+table { border-collapse: collapse; font-size: 0.85em; }
+th, td { padding: 3px 8px; border-bottom: 1px solid #ddd; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+img { max-width: 100%; }
+"""
+
+
+def _chart(name, df, *args):
+    fig = getattr(vv, name)(df, *args)
+    return getattr(fig, 'figure', fig)  # FacetGrid and friends wrap a Figure
+
+
+def _summary(prompt):
+    return ('text', 'Summary', ai.summarize_stats(prompt)) if prompt else None
+
+
+def _in_range(table, column, start=None, end=None):
+    seasons = table[column]
+    mask = pd.Series(True, index=table.index)
+    if start is not None:
+        mask &= seasons >= start
+    if end is not None:
+        mask &= seasons <= end
+    return table[mask]
+
+
+def team_section(df, team, start=None, end=None, summaries=False):
+    """The team page of a pack: a title and a list of (kind, caption, payload) blocks."""
+    solo, vs_opponent = an.team_record(df, team)
+    seasons = _in_range(an.team_season_performance(df, team), 'season', start, end)
+    scores = an.highest_scores_by_team(df, team)
+    chases = an.highest_chase_by_team(df, team)
+    batters, bowlers = an.key_players(df, team, start, end)
+    blocks = [
+        ('table', 'Overall record', solo),
+        ('table', 'Season by season', seasons),
+        ('table', 'Against each opponent', vs_opponent),
+        ('table', 'Phase splits', an.team_phase_stats(df, team, start, end)),
+        ('chart', 'Batting strike rate by phase', _chart('plot_team_phases_by_season', df, team, 'batting')),
+        ('chart', 'Economy by phase', _chart('plot_team_phases_by_season', df, team, 'bowling')),
+        ('table', 'Top run scorers', batters),
+        ('table', 'Top wicket takers', bowlers),
+        ('table', 'Best bowling economy', an.economy_rate(df, team).rename('Economy').rename_axis('Bowler').reset_index()),
+        ('table', 'Highest totals', scores),
+        ('table', 'Highest chases', chases),
+    ]
+    if not seasons.empty:
+        blocks.insert(2, ('chart', 'Win % by season', _chart('plot_team_season_performance', df, team)))
+    if summaries:
+        blocks += [
+            _summary(pm.genrate_team_season_summary_prompt(team, seasons)),
+            _summary(pm.genrate_team_record_summary_prompt(team, vs_opponent)),
+            _summary(pm.genrate_highest_scores_prompt(team, scores)),
+            _summary(pm.genrate_highest_chases_prompt(team, chases)),
+        ]
+    return {'title': team, 'blocks': [block for block in blocks if block]}
+
+
+def player_section(df, player, start=None, end=None, summaries=False):
+    """The page of one player: batting blocks if they batted in the range, bowling blocks if they bowled."""
+    blocks = []
+    batting = an.player_analysis(df, player, start, end)
+    if not batting.empty:
+        blocks += [
+            ('table', 'Batting', batting),
+            ('table', 'Batting by phase', an.batting_by_phase(df, player, start, end)),
+            ('chart', 'Batting by phase', _chart('plot_batting_by_phase', df, player, start, end)),
+            ('chart', 'Runs and strike rate by season', _chart('plot_growth_of_batsman_overtime', df, player)),
+            ('table', 'Toughest bowlers', an.toughest_bowlers(df, player)),
+        ]
+        if summaries:
+            blocks.append(_summary(pm.generate_player_summary_prompt(df, player, start, end)))
+    try:
+        bowling = an.bowler_record(df, player, start, end)
+    except ValueError:
+        bowling = None
+    if bowling is not None:
+        blocks += [
+            ('table', 'Bowling', bowling),
+            ('table', 'Bowling by phase', an.bowling_by_phase(df, player, start, end)),
+            ('chart', 'Bowling by phase', _chart('plot_bowling_by_phase', df, player, start, end)),
+        ]
+        if summaries:
+            blocks.append(_summary(pm.genrate_bowler(player, start, end)))
+    return {'title': player, 'blocks': [block for block in blocks if block]}
+
+
+_SECTIONS = {'team': team_section, 'player': player_section}
+
+
+def _init_worker(path, summaries):
+    global _df, _summaries
+    _summaries = summaries
+    if _df is None:  # spawned rather than forked
+        _df = dl.load_with_tables(path)
+    if summaries:
+        ai.setup_gemini()
+
+
+def write_pack(df, path, title, tasks, summaries=False):
+    """Build the (kind, name, start, end) pages in ``tasks`` and write them to ``path`` (.html or .pdf)."""
+    sections = [_SECTIONS[kind](df, name, start, end, summaries) for kind, name, start, end in tasks]
+    WRITERS[os.path.splitext(path)[1][1:]](path, title, sections)
+    return path
+
+
+def _write_pack(path, title, tasks):
+    return write_pack(_df, path, title, tasks, _summaries)
+
+
+def write_packs(df, data_path, packs, workers=None, summaries=False):
+    """
+    Write every (path, title, tasks) pack, each built and written whole by
+    one of ``workers`` processes (all cores by default; 1 writes them in
+    this process). Yields the paths as they are written.
+    """
+    global _df, _summaries
+    _df, _summaries = df, summaries
+    workers = min(workers or os.cpu_count() or 1, len(packs))
+    if workers <= 1:
+        if summaries:
+            ai.setup_gemini()
+        for pack in packs:
+            yield _write_pack(*pack)
+        return
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('fork' if 'fork' in methods else None)
+    with ProcessPoolExecutor(workers, mp_context=context,
+                             initializer=_init_worker, initargs=(data_path, summaries)) as pool:
+        # Biggest packs first, so no worker is left with a long one at the end.
+        futures = [pool.submit(_write_pack, *pack) for pack in sorted(packs, key=lambda pack: -len(pack[2]))]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+# ---------------- Output ----------------
+def _frame(payload):
+    return payload if isinstance(payload, pd.DataFrame) else payload.to_frame()
+
+
+def write_html(path, title, sections):
+    """One self-contained HTML file: tables inline, charts as embedded PNGs."""
+    parts = [f"<!doctype html><html><head><meta charset='utf-8'><title>{html.escape(title)}</title>"
+             f"<style>{_CSS}</style></head><body><h1>{html.escape(title)}</h1>"]
+    for section in sections:
+        parts.append(f"<h2>{html.escape(section['title'])}</h2>")
+        for kind, caption, payload in section['blocks']:
+            parts.append(f"<h3>{html.escape(caption)}</h3>")
+            if kind == 'table':
+                parts.append(_frame(payload).to_html(index=False, na_rep='', border=0))
+            elif kind == 'chart':
+                png = base64.b64encode(render.figure_bytes(payload)).decode()
+                parts.append(f"<img alt='{html.escape(caption)}' src='data:image/png;base64,{png}'>")
+            else:
+                parts.append(f"<p>{html.escape(payload)}</p>")
+    parts.append("</body></html>")
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(parts))
+
+
+# Lines of monospaced text that fit on one landscape A4 page at 8 pt.
+_PDF_LINES = 54
+
+
+def _text_lines(kind, caption, payload):
+    if kind == 'text':
+        body = textwrap.fill(payload, 150).splitlines()
+    elif _frame(payload).empty:
+        body = ['No data for this range.']
+    else:
+        body = _frame(payload).to_string(index=False, na_rep='').splitlines()
+    return [caption.upper(), *body, '']
+
+
+def write_pdf(path, title, sections):
+    """
+    A landscape A4 PDF: each section's tables and summaries set as
+    monospaced text, as many to a page as fit, and each chart on a page of
+    its own.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
+    def text_page(heading, lines):
+        fig = Figure(figsize=(11.69, 8.27))
+        fig.text(0.04, 0.95, heading, fontsize=14, weight='bold')
+        fig.text(0.04, 0.91, '\n'.join(lines), va='top', family='monospace', fontsize=8)
+        pdf.savefig(fig)
+
+    with PdfPages(path, metadata={'Title': title}) as pdf:
+        for section in sections:
+            lines = []
+            for kind, caption, payload in section['blocks']:
+                if kind == 'chart':
+                    payload.suptitle(f"{section['title']}: {caption}", x=0.01, ha='left')
+                    pdf.savefig(payload)
+                    plt.close(payload)
+                    continue
+                block = _text_lines(kind, caption, payload)
+                if lines and len(lines) + len(block) > _PDF_LINES:
+                    text_page(section['title'], lines)
+                    lines = []
+                lines += block[:_PDF_LINES]
+            if lines:
+                text_page(section['title'], lines)
+
+
+WRITERS = {'html': write_html, 'pdf': write_pdf}
+
+
+def _slug(name):
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def _season(value, years):
+    if value is None:
+        return None
+    for year in years:
+        if str(year) == value:
+            return year
+    raise SystemExit(f"Unknown season {value!r}; the data covers {years[0]} to {years[-1]}")
+
+
+def _check(df, names, known, kind):
+    for name in names:
+        if name not in known:
+            close = an.search_names(df, name, kind, 3)
+            hint = f"; did you mean {', '.join(close)}?" if close else ""
+            raise SystemExit(f"Unknown {kind[:-1]} {name!r}{hint}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', default=dl.DATA_PATH, help='ball-by-ball CSV')
+    parser.add_argument('--teams', nargs='+', default=[])
+    parser.add_argument('--all-teams', action='store_true')
+    parser.add_argument('--players', nargs='+', default=[])
+    parser.add_argument('--from', dest='start', help='first season (default: the first in the data)')
+    parser.add_argument('--to', dest='end', help='last season (default: the last in the data)')
+    parser.add_argument('--key-players', type=int, default=5, help='top run scorers and wicket takers per team')
+    parser.add_argument('--format', choices=sorted(WRITERS), default='html')
+    parser.add_argument('--out', default='reports')
+    parser.add_argument('--workers', type=int, default=None, help='processes (default: all cores)')
+    parser.add_argument('--summaries', action='store_true', help='add Gemini summaries')
+    args = parser.parse_args()
+
+    began = time.perf_counter()
+    df = dl.load_with_tables(args.data)
+    years = an.seasons(df)
+    start, end = _season(args.start, years), _season(args.end, years)
+    teams = an.teams(df) if args.all_teams else args.teams
+    _check(df, teams, set(an.teams(df)), 'teams')
+    _check(df, args.players, set(an.players(df)), 'players')
+    if not teams and not args.players:
+        parser.error('name at least one team (--teams, --all-teams) or player (--players)')
+    loaded = time.perf_counter()
+
+    os.makedirs(args.out, exist_ok=True)
+    span = f"{start or years[0]}-{end or years[-1]}"
+    packs = []  # (path, title, pages)
+    for team in teams:
+        batters, bowlers = an.key_players(df, team, start, end, args.key_players)
+        squad = list(dict.fromkeys([*batters['Player'], *bowlers['Player']]))
+        tasks = [('team', team, start, end)] + [('player', player, start, end) for player in squad]
+        packs.append((os.path.join(args.out, f"{_slug(team)}.{args.format}"), f"{team} briefing, {span}", tasks))
+    for player in args.players:
+        packs.append((os.path.join(args.out, f"{_slug(player)}.{args.format}"), f"{player} briefing, {span}",
+                      [('player', player, start, end)]))
+    for path in write_packs(df, args.data, packs, args.workers, args.summaries):
+        print(f"wrote {path}")
+    pages = sum(len(tasks) for _, _, tasks in packs)
+    print(f"{len(packs)} packs, {pages} pages: load {loaded - began:.1f} s, "
+          f"build and write {time.perf_counter() - loaded:.1f} s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Autocomplete over player and team names.
+
+Matches are ranked exact, then whole-name prefix, then every typed word
+being or starting a word of the name ("Kohli" finds "V Kohli", "de vil"
+finds "AB de Villiers"), then substring, then typo-tolerant word matches
+("kholi", "butler"). Prefixes are found by binary search over sorted names
+and words. Typo candidates are filtered by initial letter and shared bigrams
+before any edit distance is computed, and only the ``TYPO_CANDIDATES`` best of
+them are compared. That pass is skipped for a typed word that already starts
+a word of some name, and altogether when the cheaper matches fill the list.
+"""
+import bisect
+import heapq
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+_WORD = re.compile(r"[a-z0-9]+")
+# Edit distances computed per typed word, for the candidates sharing the most bigrams with it.
+TYPO_CANDIDATES = 24
+
+
+def normalize(text):
+    """Lowercase ASCII words of ``text`` joined by single spaces ("M.S. Dhoni" -> "m s dhoni")."""
+    text = unicodedata.normalize('NFKD', str(text)).encode('ascii', 'ignore').decode().lower()
+    return ' '.join(_WORD.findall(text))
+
+
+def _bigrams(word):
+    padded = f"^{word}$"
+    return {padded[i:i + 2] for i in range(len(padded) - 1)}
+
+
+def _allowed_edits(word):
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+def _words(key):
+    """Words of a normalized name, plus runs of initials joined up ("m s dhoni" also gives "ms")."""
+    words = key.split()
+    initials = ''.join(word for word in words if len(word) == 1)
+    return words + [initials] if len(initials) > 1 else words
+
+
+def _edits(a, b, limit):
+    """Optimal-string-alignment distance between ``a`` and ``b`` (adjacent swaps count once), or ``limit + 1`` if over ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        if min(row) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+class NameIndex:
+    """
+    Search index over ``names``. ``names`` is expected most relevant first
+    (e.g. by balls played): that order breaks ties between equally good
+    matches and is the shortlist shown before anything is typed.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self._keys = [normalize(name) for name in self.names]
+        order = sorted(range(len(self._keys)), key=self._keys.__getitem__)
+        self._sorted_keys = [self._keys[i] for i in order]
+        self._sorted_ids = order
+        self._words = defaultdict(set)  # word -> ids of the names containing it
+        for i, key in enumerate(self._keys):
+            for word in _words(key):
+                self._words[word].add(i)
+        self._word_list = sorted(self._words)
+        # Typo candidates: words by first letter, with their bigrams.
+        self._by_initial = defaultdict(list)
+        for word in self._word_list:
+            self._by_initial[word[0]].append((word, _bigrams(word)))
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def _prefixed(sorted_keys, prefix):
+        """Positions in ``sorted_keys`` of the keys starting with ``prefix`` (keys only hold [a-z0-9 ], all below '~')."""
+        return range(bisect.bisect_left(sorted_keys, prefix), bisect.bisect_left(sorted_keys, prefix + '~'))
+
+    def _word_matches(self, typed, fuzzy, initial=False):
+        """
+        Words of the index matching one typed word, as {word: cost}: 0 for
+        the same word, 0.5 for a word it starts, else the number of edits.
+        With ``initial``, the typed word's first letter also matches at 1.5
+        (names are usually stored as "V Kohli", not "Virat Kohli").
+        """
+        found = {self._word_list[j]: 0.5 for j in self._prefixed(self._word_list, typed)}
+        if typed in found:
+            found[typed] = 0
+        if initial and fuzzy and len(typed) > 1 and typed[0] in self._words:
+            found.setdefault(typed[0], 1.5)
+        limit = _allowed_edits(typed)
+        # A word that is typed correctly so far is not treated as a typo.
+        if not (fuzzy and limit) or any(cost < 1 for cost in found.values()):
+            return found
+        grams = _bigrams(typed)
+        # Every edit breaks at most three of the typed word's bigrams. Typos in
+        # the first letter are only caught as a swap with the second.
+        need = max(1, len(grams) - 1 - 3 * limit)
+        initials = {typed[0], typed[1]}
+        shared = ((len(grams & word_grams), -abs(len(word) - len(typed)), word) for initial in initials
+                  for word, word_grams in self._by_initial.get(initial, ()))
+        # Names with a long common word ("Player 12", "Player 13", ...) all pass the bigram
+        # filter, so only the closest few get an edit distance.
+        for _, _, word in heapq.nlargest(TYPO_CANDIDATES, (item for item in shared if item[0] >= need)):
+            # A typo in the full word, or in the part typed so far.
+            edits = _edits(typed, word, limit)
+            if len(word) > len(typed):
+                edits = min(edits, _edits(typed, word[:len(typed)], limit))
+            if edits <= limit:
+                found[word] = edits
+        return found
+
+    def search(self, query, limit=20, within=None):
+        """
+        Up to ``limit`` names matching ``query``, best first. ``within``
+        (a set of names) restricts the results, e.g. to profiled players.
+        """
+        key = normalize(query)
+        if not key:
+            return [name for name in self.names if within is None or name in within][:limit]
+        ranks = {}  # id -> (tier, cost)
+
+        def offer(i, rank):
+            if (within is None or self.names[i] in within) and (i not in ranks or rank < ranks[i]):
+                ranks[i] = rank
+
+        for j in self._prefixed(self._sorted_keys, key):
+            offer(self._sorted_ids[j], (0 if self._sorted_keys[j] == key else 1, 0))
+        for i, name_key in enumerate(self._keys):
+            if key in name_key:
+                offer(i, (3, 0))
+        # Typo matching is the expensive part: skip it once better matches fill the list.
+        for fuzzy in (False, True):
+            for i, cost in self._all_words(key, fuzzy).items():
+                offer(i, (2 if cost < 1 else 4, cost))
+            if len(ranks) >= limit:
+                break
+
+        order = sorted(ranks, key=lambda i: (ranks[i], i))
+        return [self.names[i] for i in order[:limit]]
+
+    def _all_words(self, key, fuzzy):
+        """Names in which every typed word matches a word, as {id: summed cost}."""
+        costs = None
+        typed_words = key.split()
+        for n, typed in enumerate(typed_words):
+            per_name = {}
+            # Only a word followed by more words can be a first name given as an initial.
+            for word, cost in self._word_matches(typed, fuzzy, initial=n < len(typed_words) - 1).items():
+                for i in self._words[word]:
+                    if cost < per_name.get(i, cost + 1):
+                        per_name[i] = cost
+            costs = per_name if costs is None else {i: costs[i] + c for i, c in per_name.items() if i in costs}
+        return costs or {}
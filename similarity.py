@@ -0,0 +1,49 @@
+"""
+Nearest-neighbour search over player career profiles.
+
+A profile is one row of features per player (strike rate, average, phase
+splits, ...). The index standardizes every feature once, over all players,
+into a contiguous float32 matrix; a query is a single vectorized distance
+computation against that matrix plus a partial sort, so finding the k most
+similar players never loops over players in Python.
+"""
+import numpy as np
+import pandas as pd
+
+
+class ProfileIndex:
+    """Exact k-nearest-neighbour index over the rows of a player x feature frame."""
+
+    def __init__(self, features):
+        self.features = features
+        values = features.to_numpy(dtype='float64')
+        if len(values):
+            mean = values.mean(axis=0)
+            std = values.std(axis=0)
+        else:
+            mean = std = np.zeros(values.shape[1])
+        std[std == 0] = 1
+        self.vectors = np.ascontiguousarray((values - mean) / std, dtype='float32')
+        self._squared = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        self._positions = {name: i for i, name in enumerate(features.index)}
+        # Share of players at or below each value, for radar charts on a 0-1 scale.
+        self.percentiles = features.rank(pct=True)
+
+    def __len__(self):
+        return len(self.features)
+
+    def __contains__(self, name):
+        return name in self._positions
+
+    def query(self, name, k=10):
+        """The ``k`` players closest to ``name`` (itself excluded) and their Euclidean distances."""
+        i = self._positions[name]
+        k = min(k, len(self) - 1)
+        if k <= 0:
+            return pd.Series(dtype='float32', name='distance')
+        # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b, with every |b|^2 precomputed.
+        dist = self._squared + self._squared[i] - 2 * (self.vectors @ self.vectors[i])
+        dist[i] = np.inf
+        nearest = np.argpartition(dist, k - 1)[:k]
+        nearest = nearest[np.argsort(dist[nearest], kind='stable')]
+        return pd.Series(np.sqrt(np.maximum(dist[nearest], 0)), index=self.features.index[nearest], name='distance')
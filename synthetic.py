@@ -0,0 +1,157 @@
+"""
+Synthetic ball-by-ball data with the column schema analysis.py relies on.
+
+Usage:
+    python synthetic.py --rows 1000000 --out datasets/synthetic_1m.csv
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+TEAMS = [
+    ('Chennai Super Kings', 'MA Chidambaram Stadium'),
+    ('Mumbai Indians', 'Wankhede Stadium'),
+    ('Royal Challengers Bangalore', 'M Chinnaswamy Stadium'),
+    ('Kolkata Knight Riders', 'Eden Gardens'),
+    ('Rajasthan Royals', 'Sawai Mansingh Stadium'),
+    ('Delhi Capitals', 'Arun Jaitley Stadium'),
+    ('Punjab Kings', 'Punjab Cricket Association Stadium'),
+    ('Sunrisers Hyderabad', 'Rajiv Gandhi International Stadium'),
+    ('Gujarat Titans', 'Narendra Modi Stadium'),
+    ('Lucknow Super Giants', 'Ekana Cricket Stadium'),
+]
+SQUAD = 25           # players per team per season
+SQUAD_CHURN = 4      # players replaced per team each season
+BALLS_PER_INNINGS = 127  # 120 legal balls plus typical extras
+
+# Off-the-bat outcomes for a legal delivery, roughly matching IPL frequencies.
+RUNS = np.array([0, 1, 2, 3, 4, 6])
+RUNS_P = np.array([0.37, 0.36, 0.07, 0.005, 0.125, 0.07])
+RUNS_P = RUNS_P / RUNS_P.sum()
+EXTRAS = np.array(['', 'wides', 'noballs', 'legbyes', 'byes'], dtype=object)
+EXTRAS_P = np.array([0.945, 0.03, 0.005, 0.015, 0.005])
+WICKET_P = 0.048
+DISMISSALS = np.array(['caught', 'bowled', 'lbw', 'run out', 'stumped', 'caught and bowled'], dtype=object)
+DISMISSALS_P = np.array([0.6, 0.17, 0.09, 0.09, 0.03, 0.02])
+
+
+def _player_name(team, index):
+    initials = ''.join(word[0] for word in team.split())
+    return f"{initials} Player{index:03d}"
+
+
+def generate(rows=100_000, seasons=17, first_season=2008, seed=0):
+    """
+    Return a deliveries DataFrame of about ``rows`` balls.
+
+    Matches are spread evenly over ``seasons``; every match has two innings of
+    120 legal balls with wides, no-balls, byes and leg-byes mixed in. Batters
+    come in as wickets fall, six bowlers share the overs, and the winner is
+    the side with the higher total. Team, player and venue columns are
+    categoricals.
+    """
+    rng = np.random.default_rng(seed)
+    n_matches = max(1, rows // (2 * BALLS_PER_INNINGS))
+    n_innings = 2 * n_matches
+    n_teams = len(TEAMS)
+
+    # ---- match level ----
+    match_id = np.arange(1, n_matches + 1, dtype=np.int32)
+    season = (first_season + np.arange(n_matches) * seasons // n_matches).astype(np.int16)
+    home = rng.integers(0, n_teams, n_matches)
+    away = (home + rng.integers(1, n_teams, n_matches)) % n_teams
+    bat_first_home = rng.random(n_matches) < 0.5
+    first = np.where(bat_first_home, home, away)
+    second = np.where(bat_first_home, away, home)
+
+    # ---- ball level ----
+    extras_code = rng.choice(len(EXTRAS), size=n_innings * BALLS_PER_INNINGS, p=EXTRAS_P)
+    innings_of_ball = np.repeat(np.arange(n_innings), BALLS_PER_INNINGS)
+    legal = (extras_code != 1) & (extras_code != 2)
+    # Legal balls bowled before each delivery within its innings.
+    legal_cum = np.cumsum(legal)
+    start = np.repeat(legal_cum[::BALLS_PER_INNINGS] - legal[::BALLS_PER_INNINGS], BALLS_PER_INNINGS)
+    legal_before = legal_cum - legal - start
+    keep = legal_before < 120
+    extras_code, innings_of_ball, legal, legal_before = (
+        extras_code[keep], innings_of_ball[keep], legal[keep], legal_before[keep])
+    n = len(extras_code)
+
+    over = (legal_before // 6).astype(np.int8)
+    ball = (legal_before % 6 + 1).astype(np.int8)
+    off_bat = (extras_code == 0) | (extras_code == 2)  # legal balls and no-balls
+    batsman_runs = np.where(off_bat, rng.choice(RUNS, size=n, p=RUNS_P), 0).astype(np.int8)
+    extra_runs = np.select(
+        [(extras_code == 1) | (extras_code == 2), (extras_code == 3) | (extras_code == 4)],
+        [1, rng.integers(1, 5, n)], 0).astype(np.int8)
+    is_wicket = ((extras_code == 0) & (rng.random(n) < WICKET_P)).astype(np.int8)
+
+    # Wickets fallen before each ball decide who is batting (capped at the last pair).
+    wk_cum = np.cumsum(is_wicket)
+    first_ball = np.r_[0, np.flatnonzero(np.diff(innings_of_ball)) + 1]
+    wk_start = np.repeat(wk_cum[first_ball] - is_wicket[first_ball], np.diff(np.r_[first_ball, n]))
+    wickets_before = np.minimum(wk_cum - is_wicket - wk_start, 9)
+    on_strike = rng.random(n) < 0.5
+    bat_slot = wickets_before + np.where(on_strike, 0, 1)
+    non_slot = wickets_before + np.where(on_strike, 1, 0)
+
+    match_of_ball = innings_of_ball // 2
+    inning = (innings_of_ball % 2 + 1).astype(np.int8)
+    bat_team = np.where(inning == 1, first[match_of_ball], second[match_of_ball])
+    bowl_team = np.where(inning == 1, second[match_of_ball], first[match_of_ball])
+    ball_season = season[match_of_ball]
+
+    # Squads rotate a few players each season so careers span several years.
+    shift = (ball_season - first_season) * SQUAD_CHURN
+    bowler_slot = 13 + (over + match_of_ball) % 6
+    names = [_player_name(team, i) for team, _ in TEAMS for i in range(SQUAD + seasons * SQUAD_CHURN)]
+    per_team = SQUAD + seasons * SQUAD_CHURN
+
+    def player(team, slot):
+        return pd.Categorical.from_codes(team * per_team + shift + slot, categories=names)
+
+    team_names = [team for team, _ in TEAMS]
+    batter = player(bat_team, bat_slot)
+    df = pd.DataFrame({
+        'match_id': match_id[match_of_ball],
+        'season': ball_season,
+        'inning': inning,
+        'batting_team': pd.Categorical.from_codes(bat_team, categories=team_names),
+        'bowling_team': pd.Categorical.from_codes(bowl_team, categories=team_names),
+        'over': over,
+        'ball': ball,
+        'batter': batter,
+        'non_striker': player(bat_team, non_slot),
+        'bowler': player(bowl_team, bowler_slot),
+        'batsman_runs': batsman_runs,
+        'extras': extra_runs,
+        'total_runs': (batsman_runs + extra_runs).astype(np.int8),
+        'extras_type': pd.Categorical.from_codes(np.where(extras_code == 0, -1, extras_code - 1), categories=EXTRAS[1:]),
+        'is_wicket': is_wicket,
+        'dismissal_kind': pd.Categorical.from_codes(
+            np.where(is_wicket == 1, rng.choice(len(DISMISSALS), size=n, p=DISMISSALS_P), -1), categories=DISMISSALS),
+    })
+
+    df.insert(df.columns.get_loc('dismissal_kind'), 'player_dismissed', df['batter'].where(df['is_wicket'] == 1))
+
+    totals = df.groupby(['match_id', 'inning'], sort=True)['total_runs'].sum().unstack()
+    first_wins = (totals[1] > totals[2]).to_numpy()
+    winner = np.where(first_wins, first, second)
+    winner = np.where((totals[1] == totals[2]).to_numpy(), -1, winner)
+    df['winner'] = pd.Categorical.from_codes(winner[match_of_ball], categories=team_names)
+    df['venue'] = pd.Categorical.from_codes(home[match_of_ball], categories=[venue for _, venue in TEAMS])
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    generate(args.rows, seed=args.seed).to_csv(args.out, index=False)
+
+
+if __name__ == '__main__':
+    main()
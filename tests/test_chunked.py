@@ -0,0 +1,37 @@
+import pytest
+
+import aggregates as ag
+import analysis as an
+import data_loader as dl
+import synthetic
+from bench import _same, bind, public_functions, sample_arguments
+
+
+@pytest.fixture(scope="module")
+def frames(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("chunked") / "deliveries.csv")
+    synthetic.generate(30000).to_csv(path, index=False)
+    return path, ag.build_all(dl.load_ipl(path, use_cache=False))
+
+
+@pytest.mark.parametrize("chunk_rows", [3000, 7000])
+def test_chunked_load_matches_in_memory(frames, chunk_rows):
+    path, whole = frames
+    streamed = dl.load_ipl_chunked(path, chunk_rows=chunk_rows)
+    differ = [table for table in ag._builders if not _same(ag.get(whole, table), ag.get(streamed, table))]
+    assert not differ
+
+
+def test_analysis_results_match_in_memory(frames):
+    path, whole = frames
+    streamed = dl.load_ipl_chunked(path, chunk_rows=3000)
+    # Arguments come from the in-memory frame: the streamed one has no delivery rows to pick them from.
+    args = sample_arguments(whole)
+    differ = []
+    for name, fn in public_functions(an):
+        kwargs = bind(an, name, fn, whole, args)
+        assert kwargs is not None, f"no sample arguments for analysis.{name}"
+        fn = getattr(fn, 'uncached', fn)  # both frames may share a dataset version
+        if not _same(fn(**kwargs), fn(**dict(kwargs, df=streamed))):
+            differ.append(name)
+    assert not differ
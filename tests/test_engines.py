@@ -0,0 +1,24 @@
+import pytest
+
+import aggregates as ag
+import engines as eng
+import synthetic
+from bench import _same
+
+
+@pytest.fixture
+def deliveries():
+    df = synthetic.generate(30000)
+    yield df
+    ag.set_engine('pandas')
+
+
+@pytest.mark.parametrize("engine", [name for name in ag.ENGINES if name != 'pandas'])
+def test_engine_tables_match_pandas(deliveries, engine):
+    if not eng.available(engine):
+        pytest.skip(f"{engine} is not installed")
+    reference = ag.build_all(deliveries.copy(deep=False))
+    ag.set_engine(engine)
+    built = ag.build_all(deliveries.copy(deep=False))  # a new frame gets its own tables
+    differ = [table for table in ag._builders if not _same(ag.get(reference, table), ag.get(built, table))]
+    assert not differ
@@ -0,0 +1,22 @@
+import aggregates as ag
+import data_loader as dl
+import synthetic
+from bench import _same
+
+
+def test_ingest_matches_full_rebuild(tmp_path):
+    full = synthetic.generate(30000)
+    cut = full['match_id'].max() - 4
+    path = str(tmp_path / "deliveries.csv")
+    full[full['match_id'] <= cut].to_csv(path, index=False)
+    new = full[full['match_id'] > cut].astype({c: object for c in full.select_dtypes('category').columns})
+    new['batter'] = new['batter'].replace({new['batter'].iloc[0]: 'Brand New Batter'})
+
+    df = ag.build_all(dl.load_ipl(path, cache_dir=str(tmp_path / "cache")))
+    updated = dl.ingest(df, new)
+    assert len(updated) == len(full)
+    assert ag.version(updated) != ag.version(df)
+
+    rebuilt = ag.build_all(dl.load_ipl(path, use_cache=False))
+    differ = [table for table in ag._builders if not _same(ag.get(updated, table), ag.get(rebuilt, table))]
+    assert not differ
@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import llmutil
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(llmutil, "response_cache", llmutil.ResponseCache(path=str(tmp_path / "llm.sqlite3")))
+    previous = llmutil.set_backend(llmutil.fake_backend(delay=0))
+    yield
+    llmutil.set_backend(previous)
+
+
+def counting(stream_fn):
+    calls = []
+    def stream(prompt, model_name, timeout):
+        calls.append(prompt)
+        yield from stream_fn(prompt, model_name, timeout)
+    return stream, calls
+
+
+def test_streams_fake_reply_word_by_word():
+    llmutil.set_backend(llmutil.fake_backend("Kohli top scores", delay=0))
+    chunks = list(llmutil.stream_summary("prompt"))
+    assert chunks == ["Kohli ", "top ", "scores "]
+
+
+def test_repeat_prompt_served_from_cache():
+    backend, calls = counting(llmutil.fake_backend("cached answer", delay=0))
+    llmutil.set_backend(backend)
+    first = llmutil.summarize_stats("prompt")
+    assert list(llmutil.stream_summary("prompt")) == [first]
+    assert calls == ["prompt"]
+
+
+def test_retries_after_failure_before_first_chunk():
+    attempts = []
+    def flaky(prompt, model_name, timeout):
+        attempts.append(prompt)
+        if len(attempts) == 1:
+            raise ConnectionError("reset")
+        yield "ok"
+    llmutil.set_backend(flaky)
+    assert llmutil.summarize_stats("prompt", retries=1, backoff=0) == "ok"
+    assert len(attempts) == 2
+
+
+def test_timeout_is_reported_and_not_cached():
+    llmutil.set_backend(llmutil.fake_backend("too slow", delay=0.5))
+    text = llmutil.summarize_stats("prompt", timeout=0.1, retries=0, backoff=0)
+    assert text.startswith("Gemini Error")
+    key = llmutil.ResponseCache.key(llmutil.MODEL_NAME, "prompt")
+    assert llmutil.response_cache.get(key) is None
+
+
+def test_concurrent_identical_prompts_share_one_call():
+    backend, calls = counting(llmutil.fake_backend("shared", delay=0.05))
+    llmutil.set_backend(backend)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(llmutil.summarize_stats("prompt"))) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["shared "] * 4
+    assert calls == ["prompt"]
+
+
+def test_summarize_async_does_not_block_the_loop():
+    llmutil.set_backend(llmutil.fake_backend("async reply", delay=0.1))
+
+    async def run():
+        ticks = 0
+        task = asyncio.ensure_future(llmutil.summarize_async("prompt"))
+        while not task.done():
+            ticks += 1
+            await asyncio.sleep(0.01)
+        return task.result(), ticks
+
+    start = time.perf_counter()
+    text, ticks = asyncio.run(run())
+    assert text == "async reply "
+    assert ticks > 5 and time.perf_counter() - start < 5
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+from bench import DEFERRED_MODULES, STARTUP_IMPORTS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUDGET = float(os.getenv("IPL_STARTUP_BUDGET", "1.0"))  # seconds
+
+
+def _import_times():
+    """(module, cumulative seconds, nesting depth) for every import the startup modules trigger after streamlit."""
+    env = dict(os.environ, IPL_LLM_BACKEND="fake")
+    err = subprocess.run([sys.executable, "-X", "importtime", "-W", "ignore", "-c", "import streamlit; " + STARTUP_IMPORTS],
+                         cwd=ROOT, env=env, capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(cumulative) / 1e6, depth))
+    start = max(i for i, (name, _, depth) in enumerate(rows) if name == "streamlit" and depth == 0)
+    return rows[start + 1:]
+
+
+def test_startup_imports_within_budget():
+    best = min(sum(seconds for _, seconds, depth in _import_times() if depth == 0) for _ in range(3))
+    assert best < BUDGET, f"startup imports took {best:.3f} s (budget {BUDGET:.3f} s)"
+
+
+def test_plotting_and_llm_imports_deferred():
+    loaded = {name for name, _, _ in _import_times()}
+    assert not loaded & set(DEFERRED_MODULES)
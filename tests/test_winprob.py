@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import aggregates as ag
+import analysis as an
+import synthetic
+from winprob import MAX_BALLS, MAX_RUNS, WICKETS, WinProbability
+
+
+@pytest.fixture(scope="module")
+def df():
+    return ag.build_all(synthetic.generate(100000))
+
+
+def _states(cells):
+    """A chase_states frame from {(runs_needed, balls_left, wickets): (states, wins)}."""
+    index = pd.MultiIndex.from_tuples(list(cells), names=ag.CHASE_KEYS)
+    return pd.DataFrame(list(cells.values()), index=index, columns=['states', 'wins'])
+
+
+def _block(states=100, wins=30):
+    """Chases needing 2-12 runs off 1-8 balls with 1-3 wickets in hand, won ``wins`` times in ``states``."""
+    return {(r, b, w): (states, wins) for r in range(2, 13) for b in range(1, 9) for w in range(1, 4)}
+
+
+def test_grid_is_monotone(df):
+    grid = ag.get(df, 'win_model').grid
+    assert (np.diff(grid, axis=0) <= 0).all()  # more runs needed never helps
+    assert (np.diff(grid, axis=1) >= 0).all()  # nor do fewer balls left
+    assert (np.diff(grid, axis=2) >= 0).all()  # nor fewer wickets in hand
+
+
+def test_decided_states(df):
+    model = ag.get(df, 'win_model')
+    assert (model.grid[0] == 1).all()
+    assert (model.grid[1:, 0, :] == 0).all()
+    assert (model.grid[1:, :, 0] == 0).all()
+    assert model(MAX_RUNS + 50, MAX_BALLS + 50, WICKETS + 5) == model(MAX_RUNS, MAX_BALLS, WICKETS)
+
+
+# With one ball and one wicket left, the neighbours with fewer balls or wickets are
+# decided losses, so the monotone passes cannot lift the cell: only smoothing does.
+def test_sparse_state_is_smoothed_towards_neighbours():
+    cells = _block()
+    cells[(4, 1, 1)] = (1, 0)  # one lost chase among states won 30% of the time
+    assert WinProbability(_states(cells))(4, 1, 1) == pytest.approx(0.3, abs=0.02)
+
+
+def test_unseen_state_takes_neighbours_rate():
+    cells = _block()
+    del cells[(4, 1, 1)]
+    assert WinProbability(_states(cells))(4, 1, 1) == pytest.approx(0.3, abs=0.02)
+
+
+def test_batched_lookup_matches_scalar_lookups(df):
+    model = ag.get(df, 'win_model')
+    rng = np.random.default_rng(0)
+    runs, balls, wickets = rng.integers(0, 200, 500), rng.integers(0, 121, 500), rng.integers(0, 11, 500)
+    batched = model(runs, balls, wickets)
+    assert [float(p) for p in batched] == [float(model(r, b, w)) for r, b, w in zip(runs, balls, wickets)]
+
+
+def test_chase_curves_match_per_match_lookups(df):
+    season = an.seasons(df)[-1]
+    chases = an.season_chase_list(df, season)
+    curves = an.chase_curves(df, season)
+    summary = an.season_chases(df, season).set_index('Match')
+    assert list(summary.index) == list(chases['Match'])
+    for match_id in chases['Match'].iloc[:10]:
+        curve = an.chase_curve(df, match_id)
+        assert len(curve) > 0
+        expected = [an.win_probability(df, int(row['Runs Needed']), int(row['Balls Left']), int(row['Wickets In Hand']))
+                    for _, row in curve.iterrows()]
+        assert curve['Win %'].tolist() == expected
+        assert curves.loc[curves['Match'] == match_id, 'Win %'].tolist() == expected
+        assert summary.loc[match_id, 'Lowest Win %'] == min(expected)
+        assert summary.loc[match_id, 'Highest Win %'] == max(expected)
@@ -4,6 +4,19 @@ import analysis as an
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
+import threading
+from matplotlib.figure import Figure
+from instrument import traced
+
+# seaborn grids still create their figure through pyplot, whose global state is not thread-safe.
+_pyplot_lock = threading.Lock()
+
+def _subplots(figsize, ncols=1):
+    """A figure kept out of pyplot's global state, so plots can be built from several threads."""
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots(1, ncols)
+
+@traced
 def normalize_dataframe(df, exclude_cols=None):
     """
     Normalize numeric columns in the DataFrame between 0 and 1.
@@ -19,7 +32,7 @@ def normalize_dataframe(df, exclude_cols=None):
     exclude_cols = exclude_cols if exclude_cols else []
 
     for col in df.columns:
-        if col in exclude_cols or df[col].dtype == 'object':
+        if col in exclude_cols or not pd.api.types.is_numeric_dtype(df[col]):
             continue
 
         col_min = df[col].min()
@@ -30,20 +43,17 @@ def normalize_dataframe(df, exclude_cols=None):
             df_norm[col] = 0  # or 1, if you prefer to indicate full scale
 
     return df_norm
+@traced
 def top_batsmen_by_season(df,season='all',n=10):
     """
     Plots top batsmen for either a single season or all seasons.
     """
-    # Clean column names
-    df.columns = df.columns.str.strip().str.lower()
-
-    # Get data
-    top_batsmen = an.top_batsmen_by_season(df, season)
+    top_batsmen = an.top_batsmen_by_season(df, season, n)
 
     if season != 'all':
         # Plot for single season
-        fig ,ax = plt.subplots(figsize=(12,8))
-        sns.barplot(data=top_batsmen, x='batter', y='batsman_runs', palette='Blues_d')
+        fig ,ax = _subplots(figsize=(12,8))
+        sns.barplot(data=top_batsmen, x='batter', y='batsman_runs', palette='Blues_d', ax=ax)
         ax.set_title(f"Top {n} Batsmen in Season {season}")
         ax.set_xlabel("Batsman")
         ax.set_ylabel("Runs")
@@ -52,7 +62,8 @@ def top_batsmen_by_season(df,season='all',n=10):
         return fig
     else:
         # Plot for all seasons using FacetGrid
-        g = sns.FacetGrid(top_batsmen, col="season", col_wrap=4, height=4, sharex=False, sharey=False)
+        with _pyplot_lock:
+            g = sns.FacetGrid(top_batsmen, col="season", col_wrap=4, height=4, sharex=False, sharey=False)
         g.map_dataframe(sns.barplot, x='batter', y='batsman_runs', hue='batter', palette='Blues_d', legend=False)
         g.set_titles("Season {col_name}")
         g.set_axis_labels("Batsman", "Runs")
@@ -63,10 +74,11 @@ def top_batsmen_by_season(df,season='all',n=10):
 
         g.tight_layout()
         return g
+@traced
 def plot_team_wins_season(df):
     win_mat = an.team_win_by_season(df)
 
-    fig, ax = plt.subplots(figsize=(12, 8))  # ✅ Corrected
+    fig, ax = _subplots(figsize=(12, 8))  # ✅ Corrected
 
     sns.heatmap(win_mat, annot=True, fmt=".0f", cmap="YlGnBu", linewidths=0.5, ax=ax)
 
@@ -78,39 +90,42 @@ def plot_team_wins_season(df):
 
     fig.tight_layout()
     return fig
+@traced
 def plot_team_vs_opponents(stats_dict,team_name):
     team_name = team_name.title()
     data = stats_dict[team_name]['Against Opponents']
     
     df = pd.DataFrame(data).T.reset_index().rename(columns={"index":'Opponent'})
-    plt.figure(figsize=(12,6))
+    fig, ax = _subplots(figsize=(12,6))
     
-    sns.barplot(data=df.melt(id_vars='Opponent',value_vars=['Wins','Losses']),x='Opponent',y='value',hue='variable')
-    plt.title(f"{team_name} - wins and losses Vs each opponent")
-    plt.ylabel('Count')
-    plt.xlabel('Opponent Teams')
-    plt.xticks(rotation = 90)
-    plt.tight_layout()
-    plt.show()  
+    sns.barplot(data=df.melt(id_vars='Opponent',value_vars=['Wins','Losses']),x='Opponent',y='value',hue='variable',ax=ax)
+    ax.set_title(f"{team_name} - wins and losses Vs each opponent")
+    ax.set_ylabel('Count')
+    ax.set_xlabel('Opponent Teams')
+    ax.tick_params(axis='x', rotation=90)
+    fig.tight_layout()
+    return fig
+@traced
 def plot_win_percentage_against_Opponents(stats_dict, team_name):
     team_name=team_name.title()
     data = stats_dict[team_name]['Against Opponents']
     df = pd.DataFrame(data).T.reset_index().rename(columns={'index':'Opponent'})
     
-    plt.figure(figsize=(10,5))
-    sns.lineplot(data=df,x='Opponent',y='Win %',markers='o',color='g')
-    plt.title(f"{team_name}-win percentage vs each opponent ")
-    plt.ylabel('Win %')
-    plt.xlabel('opponent teams')
-    plt.xticks(rotation=85)
-    plt.ylim(0,100)
-    plt.tight_layout()
-    plt.show()
+    fig, ax = _subplots(figsize=(10,5))
+    sns.lineplot(data=df,x='Opponent',y='Win %',marker='o',color='g',ax=ax)
+    ax.set_title(f"{team_name}-win percentage vs each opponent ")
+    ax.set_ylabel('Win %')
+    ax.set_xlabel('opponent teams')
+    ax.tick_params(axis='x', rotation=85)
+    ax.set_ylim(0,100)
+    fig.tight_layout()
+    return fig
+@traced
 def plot_highest_run_by_team(df,team_name,n=5):
     highest = an.highest_scores_by_team(df,team_name)
-    fig , ax =plt.subplots(figsize=(12,8))
+    fig , ax =_subplots(figsize=(12,8))
     
-    sns.barplot(data=highest,x='Against',y='score')
+    sns.barplot(data=highest,x='Against',y='score',ax=ax)
     ax.set_title(f"{team_name}- highest score against opponents")
     ax.set_xlabel('teams')
     ax.set_ylabel('scores')
@@ -118,22 +133,24 @@ def plot_highest_run_by_team(df,team_name,n=5):
 
     fig.tight_layout()
     return fig
+@traced
 def plot_highest_chase_by_team(df,team_name,n=5):
     highest = an.highest_chase_by_team(df,team_name)
-    plt.figure(figsize=(12,8))
+    fig, ax = _subplots(figsize=(12,8))
     
-    sns.barplot(data=highest,x='Against',y='score',palette='viridis')
-    plt.title(f"{team_name}- highest score chase against opponents")
-    plt.xlabel('teams')
-    plt.ylabel('scores')
-    plt.xticks(rotation =65)
-    plt.tight_layout()
-    plt.show()
+    sns.barplot(data=highest,x='Against',y='score',hue='Against',palette='viridis',legend=False,ax=ax)
+    ax.set_title(f"{team_name}- highest score chase against opponents")
+    ax.set_xlabel('teams')
+    ax.set_ylabel('scores')
+    ax.tick_params(axis='x', rotation=65)
+    fig.tight_layout()
+    return fig
+@traced
 def plot_growth_of_batsman_overtime(df, player_name):
     growth = an.batsman_growth_by_season(df,player_name)
-    fig ,ax= plt.subplots(figsize=(12,8))
-    sns.lineplot(data=growth,x='Season',y='Runs',markers='o',label='Runs')
-    sns.lineplot(data=growth,x='Season',y='Strike Rate',markers='s',label='Strike Rate')
+    fig ,ax= _subplots(figsize=(12,8))
+    sns.lineplot(data=growth,x='Season',y='Runs',marker='o',label='Runs',ax=ax)
+    sns.lineplot(data=growth,x='Season',y='Strike Rate',marker='s',label='Strike Rate',ax=ax)
     ax.set_title(f"player {player_name} growth over season")
     ax.set_xlabel('sesaon ')
     ax.set_ylabel('scores')
@@ -142,9 +159,10 @@ def plot_growth_of_batsman_overtime(df, player_name):
     return fig
 
 
+@traced
 def compare_growth(df, player1, player2):
     growth = an.compare_batsman_growth(df, player1, player2)
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(figsize=(12, 8))
     sns.lineplot(data=growth, x='Season', y='Runs', hue='player', marker='o', ax=ax)
     ax.set_title(f"{player1} vs {player2} - Runs over Seasons")
     ax.set_xlabel("Season")
@@ -153,23 +171,25 @@ def compare_growth(df, player1, player2):
     fig.tight_layout()
     return fig
 
+@traced
 def top_runs_by_player(df, n=10):
     runs = an.most_runs_by_IPL(df)
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(figsize=(12, 8))
     sns.barplot(x='player', y='player_runs', data=runs.head(n), ax=ax)
     ax.set_title('Most Runs by Player in IPL')
     ax.set_xlabel('Player Name')
     ax.set_ylabel('Runs')
-    plt.xticks(rotation=80)
+    ax.tick_params(axis='x', rotation=80)
     fig.tight_layout()
     return fig
 
+@traced
 def plot_player_against_team(df, player_name, team_name, season='all'):
     stats_df = an.player_against_teams(df, player_name, team_name)
     metrics = ['Total Runs', 'Balls Faced', 'Dismissals', 'Strike Rate', 'Fours', 'Sixes']
     values = [stats_df.at[0, metric] for metric in metrics]
 
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig, ax = _subplots(figsize=(10, 5))
     bars = ax.barh(metrics, values, color='skyblue')
     ax.set_xlabel('Value')
     ax.set_title(f"{stats_df.at[0, 'Player']} vs {stats_df.at[0, 'Against Team']} ({stats_df.at[0, 'Season']})")
@@ -180,6 +200,7 @@ def plot_player_against_team(df, player_name, team_name, season='all'):
     fig.tight_layout()
     return fig
 
+@traced
 def plot_player_head_to_head(df, player1, player2, start_year=None, end_year=None):
     df_summary = an.player_head_to_head(df, player1, player2)
     categories = ['Runs', 'Average', '6s', '4s', '50s', '100s', 'Strike Rate']
@@ -190,7 +211,7 @@ def plot_player_head_to_head(df, player1, player2, start_year=None, end_year=Non
     x = np.arange(len(categories))
     width = 0.35
 
-    fig, ax = plt.subplots(figsize=(10, 6))
+    fig, ax = _subplots(figsize=(10, 6))
     bars1 = ax.bar(x - width / 2, values1, width, label=player1, color='steelblue')
     bars2 = ax.bar(x + width / 2, values2, width, label=player2, color='orange')
 
@@ -207,17 +228,21 @@ def plot_player_head_to_head(df, player1, player2, start_year=None, end_year=Non
     ax.grid(axis='y', linestyle='--', alpha=0.7)
     fig.tight_layout()
     return fig
-def plot_most_Strike_rate_in_IPL(df,n=10):
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x="Player", y="Strike Rate", data=result_df, ax=ax, palette="viridis")
-    ax.set_title("Top Strike Rates in IPL")
+@traced
+def plot_most_Strike_rate_in_IPL(df,n=10,min_balls=100):
+    result_df = an.most_strikerate_by_players(df, n, min_balls)
+    fig, ax = _subplots(figsize=(10, 6))
+    sns.barplot(x="Player", y="Strike Rate", data=result_df, hue="Player", ax=ax, palette="viridis", legend=False)
+    ax.set_title(f"Top Strike Rates in IPL (min {min_balls} balls)")
     ax.set_ylabel("Strike Rate")
     ax.set_xlabel("Player")
-    plt.xticks(rotation=45)
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
     return fig
+@traced
 def plot_most_six_in_IPL(df, n=10):
     data = an.most_six_by_player(df, n)
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(figsize=(12, 8))
     sns.barplot(x='batter', y='sixes', data=data, ax=ax)
     ax.set_title('Most 6s by Player in IPL')
     ax.set_xlabel('Player Name')
@@ -226,9 +251,10 @@ def plot_most_six_in_IPL(df, n=10):
     fig.tight_layout()
     return fig
 
+@traced
 def plot_most_four_in_IPL(df, n=10):
     data = an.most_fours_by_player(df, n)
-    fig, ax = plt.subplots(figsize=(12, 8))
+    fig, ax = _subplots(figsize=(12, 8))
     sns.barplot(x='batter', y='fours', data=data, ax=ax)
     ax.set_title('Most 4s by Player in IPL')
     ax.set_xlabel('Player Name')
@@ -237,31 +263,44 @@ def plot_most_four_in_IPL(df, n=10):
     fig.tight_layout()
     return fig
 
-def plot_bowler_headtohead(df,player1,player2,start_year=None,end_year=None):
-    df=an.bowler_headtohead(df,player1,player2,start_year,end_year)
-    df_copy=df.copy()
+@traced
+def plot_bowler_headtohead(df, player1, player2, start_year=None, end_year=None):
+    df = an.bowler_headtohead(df, player1, player2, start_year, end_year)
+    df_copy = df.copy()
     df = normalize_dataframe(df)
-    metrices = [col for col in df.columns if col != 'Bowler' and df[col].dtype != 'object' ]
+    metrices = [col for col in df.columns if col != 'Bowler' and pd.api.types.is_numeric_dtype(df[col])]
+
     fig = go.Figure()
-    for _ , row in df.iterrows():
-        values = [row[m] for m  in metrices]
-        values.append(values[0])
+
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728']
+
+    for i, (_, row) in enumerate(df.iterrows()):
+        values = [row[m] for m in metrices]
+        values.append(values[0])  
+        color = colors[i % len(colors)]  
         fig.add_trace(go.Scatterpolar(
             r=values,
-            theta=metrices+[metrices[0]],
+            theta=metrices + [metrices[0]],
             fill='toself',
-            name=row['Bowler']))
-    
+            name=row['Bowler'],
+            line=dict(color=color),
+            fillcolor=color,
+            opacity=0.6
+        ))
+
     fig.update_layout(
-        title = 'Bowler vs Bowler – Normalized Radar Comparison',
-        polar = dict(radialaxis=dict(visible = True,range=[0,1])),
-        showlegend = True
+        title='Bowler vs Bowler – Normalized Radar Comparison',
+        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
+        showlegend=True
     )
-    fig.show()
+
+    return fig
+
+@traced
 def plot_team_season_performance(df,teamname):
     result_df=an.team_season_performance(df,teamname)
 
-    fig, ax = plt.subplots(figsize=(12, 8))  # Use plt.subplots to get fig & ax
+    fig, ax = _subplots(figsize=(12, 8))
     sns.lineplot(x='season', y='win %', data=result_df, ax=ax)
     ax.set_title("Team Performance Season-wise")
     ax.set_xlabel("Season / Years")
@@ -269,10 +308,11 @@ def plot_team_season_performance(df,teamname):
     fig.tight_layout()
 
     return fig 
+@traced
 def plot_team_head_to_head(df,team_name1,team_name2,start_year=None,end_year=None):
     result=an.head_to_head(df,team_name1,team_name2,start_year,end_year)
-    keys = [f'{team_name1.title()} Wins', f'{team_name2.title()} Wins']
-    values = [result.get(keys[0], 0), result.get(keys[1], 0)]
+    keys = [f'{team_name1} Wins', f'{team_name2} Wins']
+    values = [int(result[keys[0]].sum()), int(result[keys[1]].sum())]
 
     # Create DataFrame for plotting
     data = pd.DataFrame({
@@ -280,11 +320,221 @@ def plot_team_head_to_head(df,team_name1,team_name2,start_year=None,end_year=Non
         'Wins': values
     })
     
-    fig , ax= plt.subplots(figsize=(12,8))
+    fig , ax= _subplots(figsize=(12,8))
     sns.barplot(x='Team',y='Wins',data=data,ax=ax, palette='Set2')
     ax.set_title(f"{team_name1} Vs {team_name2} ")
     ax.set_xlabel("teams")
     ax.set_ylabel("Number of wins")
     ax.bar_label(ax.containers[0],fmt='%d')
     fig.tight_layout()
-    return fig 
\ No newline at end of file
+    return fig
+
+@traced
+def plot_matchup_heatmap(df, metric='strike_rate', n=15, min_balls=6):
+    grid = an.matchup_matrix(df, metric, n, min_balls)
+
+    fig, ax = _subplots(figsize=(14, 10))
+    sns.heatmap(grid, annot=True, fmt=".0f", cmap="YlOrRd", linewidths=0.5, ax=ax)
+    ax.set_title(f"Batter vs Bowler: {metric.replace('_', ' ').title()} (min {min_balls} balls)", fontsize=16)
+    ax.set_xlabel("Bowler")
+    ax.set_ylabel("Batter")
+    ax.tick_params(axis='x', rotation=45)
+    ax.tick_params(axis='y', rotation=0)
+    fig.tight_layout()
+    return fig
+
+def _phase_bars(ax, table, metrics, title):
+    data = table.melt(id_vars='Phase', value_vars=metrics, var_name='Metric', value_name='Value')
+    sns.barplot(x='Phase', y='Value', hue='Metric', data=data, ax=ax, palette='Set2')
+    for container in ax.containers:
+        ax.bar_label(container, fmt='%.1f')
+    if len(metrics) == 1:
+        ax.get_legend().remove()
+    ax.set_title(title)
+    ax.set_xlabel("Phase")
+    ax.set_ylabel("")
+
+@traced
+def plot_batting_by_phase(df, player_name, start_year=None, end_year=None):
+    table = an.batting_by_phase(df, player_name, start_year, end_year)
+    fig, (ax1, ax2) = _subplots(figsize=(14, 6), ncols=2)
+    _phase_bars(ax1, table, ['Strike Rate'], f"{player_name}: Strike Rate by Phase")
+    _phase_bars(ax2, table, ['Dot %', 'Boundary %'], f"{player_name}: Dot and Boundary % by Phase")
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_bowling_by_phase(df, bowler_name, start_year=None, end_year=None):
+    table = an.bowling_by_phase(df, bowler_name, start_year, end_year)
+    fig, (ax1, ax2) = _subplots(figsize=(14, 6), ncols=2)
+    _phase_bars(ax1, table, ['Economy'], f"{bowler_name}: Economy by Phase")
+    _phase_bars(ax2, table, ['Dot %', 'Boundary %'], f"{bowler_name}: Dot and Boundary % by Phase")
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_team_phases_by_season(df, team_name, side='batting'):
+    rates = an.team_phase_by_season(df, team_name, side)
+    data = rates.reset_index().melt(id_vars='season', var_name='Phase', value_name='Rate')
+
+    fig, ax = _subplots(figsize=(12, 6))
+    sns.lineplot(x='season', y='Rate', hue='Phase', data=data, marker='o', ax=ax)
+    metric = 'Strike Rate' if side == 'batting' else 'Economy'
+    ax.set_title(f"{team_name}: {side.title()} {metric} by Phase across Seasons")
+    ax.set_xlabel("Season")
+    ax.set_ylabel(metric)
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_similar_players_radar(df, player_name, k=3, role='batting'):
+    similar = an.similar_players(df, player_name, k, role)
+    players = (player_name,) + tuple(similar['Player'])
+    profiles = an.profile_percentiles(df, players, role)
+    metrics = [col for col in profiles.columns if col != 'Player']
+
+    fig = go.Figure()
+    colors = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b']
+    for i, (_, row) in enumerate(profiles.iterrows()):
+        values = [row[m] for m in metrics]
+        values.append(values[0])
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Scatterpolar(
+            r=values,
+            theta=metrics + [metrics[0]],
+            fill='toself' if i == 0 else 'none',
+            name=row['Player'],
+            line=dict(color=color, width=3 if i == 0 else 1.5),
+            opacity=0.8 if i == 0 else 0.6
+        ))
+
+    fig.update_layout(
+        title=f"Players most similar to {player_name} ({role} percentiles)",
+        polar=dict(radialaxis=dict(visible=True, range=[0, 1])),
+        showlegend=True
+    )
+    return fig
+
+def _season_ticks(ax, x, seasons):
+    """Mark the first innings/match of each season on the x axis."""
+    starts = np.flatnonzero(np.r_[True, seasons[1:] != seasons[:-1]])
+    ax.set_xticks(x[starts], seasons[starts], rotation=45)
+
+@traced
+def plot_batting_form(df, player_name, n=10, start_year=None, end_year=None):
+    form = an.batting_form(df, player_name, n, start_year, end_year)
+    x = form['Innings'].to_numpy()
+    fig, ax = _subplots(figsize=(14, 6))
+    ax.bar(x, form['Runs'], color=np.where(form['Runs'] >= 50, '#2ca02c', '#9ecae1'), label='Runs')
+    ax.plot(x, form['Rolling Runs'] / n, color='#d62728', linewidth=2, label=f'Runs per innings (last {n})')
+    ax.axhline(50, color='grey', linestyle='--', linewidth=1)
+    _season_ticks(ax, x, form['Season'].to_numpy())
+    ax.set_title(f"{player_name}: Runs per Innings and Rolling Form")
+    ax.set_xlabel("Season")
+    ax.set_ylabel("Runs")
+    ax.legend(loc='upper left')
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_bowling_form(df, bowler_name, n=10, start_year=None, end_year=None):
+    form = an.bowling_form(df, bowler_name, n, start_year, end_year)
+    x = form['Innings'].to_numpy()
+    fig, ax = _subplots(figsize=(14, 6))
+    ax.bar(x, form['Wickets'], color='#9467bd', label='Wickets')
+    ax.set_ylabel("Wickets")
+    econ = ax.twinx()
+    econ.plot(x, form['Rolling Economy'], color='#ff7f0e', linewidth=2, label=f'Economy (last {n})')
+    econ.set_ylabel("Economy")
+    _season_ticks(ax, x, form['Season'].to_numpy())
+    ax.set_title(f"{bowler_name}: Wickets per Innings and Rolling Economy")
+    ax.set_xlabel("Season")
+    fig.legend(loc='upper left', bbox_to_anchor=(0, 1), bbox_transform=ax.transAxes)
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_team_form(df, team_name, n=10, start_year=None, end_year=None):
+    form = an.team_form(df, team_name, n, start_year, end_year)
+    x = form['Match #'].to_numpy()
+    fig = Figure(figsize=(14, 8))
+    ax1, ax2 = fig.subplots(2, 1, sharex=True, height_ratios=[2, 1])
+    ax1.plot(x, form['Rolling Win %'], color='#1f77b4', linewidth=2)
+    ax1.axhline(50, color='grey', linestyle='--', linewidth=1)
+    ax1.set_ylim(0, 100)
+    ax1.set_ylabel(f"Win % (last {n})")
+    ax1.set_title(f"{team_name}: Rolling Win % and Streaks")
+    ax2.bar(x, form['Streak'], color=np.where(form['Streak'] > 0, '#2ca02c', '#d62728'))
+    ax2.axhline(0, color='black', linewidth=0.8)
+    ax2.set_ylabel("Streak")
+    _season_ticks(ax2, x, form['Season'].to_numpy())
+    ax2.set_xlabel("Season")
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_chase_curve(df, match_id):
+    curve = an.chase_curve(df, match_id)
+    fig, ax = _subplots(figsize=(14, 6))
+    ax.plot(curve['Ball #'], curve['Win %'], color='#1f77b4', linewidth=2)
+    fell = curve['Wickets In Hand'].diff().lt(0)
+    ax.scatter(curve.loc[fell, 'Ball #'], curve.loc[fell, 'Win %'], color='#d62728', zorder=3, label='After a wicket')
+    ax.axhline(50, color='grey', linestyle='--', linewidth=1)
+    ax.set_ylim(0, 100)
+    ax.set_title(f"Match {match_id}: Chasing Side's Win Probability")
+    ax.set_xlabel("Ball")
+    ax.set_ylabel("Win %")
+    ax.legend(loc='upper left')
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_season_chases(df, season, team_name=None):
+    curves = an.chase_curves(df, season, team_name)
+    # One column per chase, so every curve of a result is drawn in a single call.
+    wide = curves.pivot(index='Ball #', columns='Match', values='Win %')
+    won = curves.drop_duplicates('Match').set_index('Match')['Won'].reindex(wide.columns)
+    fig, ax = _subplots(figsize=(14, 7))
+    if won.any():
+        ax.plot(wide.index, wide.loc[:, won.to_numpy()], color='#2ca02c', alpha=0.35, linewidth=1)
+    if (~won).any():
+        ax.plot(wide.index, wide.loc[:, ~won.to_numpy()], color='#d62728', alpha=0.35, linewidth=1)
+    ax.plot([], [], color='#2ca02c', label='Chase won')
+    ax.plot([], [], color='#d62728', label='Chase lost')
+    ax.axhline(50, color='grey', linestyle='--', linewidth=1)
+    ax.set_ylim(0, 100)
+    involving = f" involving {team_name}" if team_name else ""
+    ax.set_title(f"{season}: Win Probability of Every Chase{involving}")
+    ax.set_xlabel("Ball")
+    ax.set_ylabel("Win %")
+    ax.legend(loc='lower left')
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_partnerships_by_wicket(df, team_name=None, start_year=None, end_year=None):
+    table = an.partnerships_by_wicket(df, team_name, start_year, end_year)
+    fig, ax = _subplots(figsize=(12, 6))
+    sns.barplot(x='Wicket', y='Average', data=table, color='#4c72b0', ax=ax)
+    ax.bar_label(ax.containers[0], fmt='%.1f')
+    ax.set_ylabel("Average partnership")
+    rate = ax.twinx()
+    rate.plot(range(len(table)), table['Run Rate'], color='#dd8452', marker='o', linewidth=2)
+    rate.set_ylabel("Run rate", color='#dd8452')
+    ax.set_title(f"{team_name or 'All Teams'}: Partnerships by Wicket")
+    ax.set_xlabel("Wicket")
+    fig.tight_layout()
+    return fig
+
+@traced
+def plot_player_partnerships(df, player_name, start_year=None, end_year=None, n=10):
+    table = an.player_partnerships(df, player_name, start_year, end_year).head(n).iloc[::-1]
+    fig, ax = _subplots(figsize=(12, 7))
+    own = table[f"{player_name}'s Runs"]
+    ax.barh(table['Partner'], own, color='#4c72b0', label=player_name)
+    ax.barh(table['Partner'], table["Partner's Runs"], left=own, color='#55a868', label='Partner')
+    ax.set_title(f"{player_name}: Runs Added with Top {n} Partners")
+    ax.set_xlabel("Runs (extras not shown)")
+    ax.legend(loc='lower right')
+    fig.tight_layout()
+    return fig
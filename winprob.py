@@ -0,0 +1,93 @@
+"""
+Lookup-table win-probability model for the side batting second.
+
+The state before every delivery of a chase is (runs needed, balls left,
+wickets in hand). Historical chases give, for each state, how often it was
+reached and how often the chasing side went on to win. The model turns those
+counts into a dense probability grid once:
+
+- counts are smoothed over neighbouring runs-needed and balls-left cells
+  (box filters built from cumulative sums),
+- sparse cells are shrunk towards the win rate of every state with a similar
+  required run rate and the same wickets in hand,
+- the grid is made monotone: never more likely to win with more runs needed,
+  fewer balls left or fewer wickets in hand.
+
+A query is then one fancy-indexing lookup, so scoring every ball of a season's
+chases is a single vectorized call.
+"""
+import numpy as np
+
+MAX_RUNS = 300
+MAX_BALLS = 120
+WICKETS = 10
+
+# Half-widths of the smoothing windows (runs needed, balls left), the pseudo
+# count pulling sparse cells towards the required-rate prior, and the
+# required-rate bins (runs per over) that prior is taken over.
+RUNS_WINDOW = 2
+BALLS_WINDOW = 3
+PRIOR_WEIGHT = 5
+RATE_BINS = np.r_[np.arange(0, 24.5, 0.5), np.inf]
+
+
+def _box(values, axis, half):
+    """Sum of ``values`` over a window of +/- ``half`` cells along ``axis`` (truncated at the edges)."""
+    size = values.shape[axis]
+    shape = list(values.shape)
+    shape[axis] = 1
+    cum = np.concatenate([np.zeros(shape), np.cumsum(values, axis=axis)], axis=axis)
+    idx = np.arange(size)
+    hi = np.take(cum, np.minimum(idx + half + 1, size), axis=axis)
+    lo = np.take(cum, np.maximum(idx - half, 0), axis=axis)
+    return hi - lo
+
+
+class WinProbability:
+    """Win probability of the chasing side, looked up by (runs needed, balls left, wickets in hand)."""
+
+    def __init__(self, states):
+        """``states``: frame indexed by (runs_needed, balls_left, wickets) with ``states`` and ``wins`` counts."""
+        self.states = states
+        shape = (MAX_RUNS + 1, MAX_BALLS + 1, WICKETS + 1)
+        runs, balls, wickets = (np.clip(np.asarray(states.index.get_level_values(i), dtype='int64'), 0, top)
+                                for i, top in enumerate((MAX_RUNS, MAX_BALLS, WICKETS)))
+        cell = np.ravel_multi_index((runs, balls, wickets), shape)
+        seen = np.bincount(cell, states['states'].to_numpy(), minlength=np.prod(shape)).reshape(shape)
+        won = np.bincount(cell, states['wins'].to_numpy(), minlength=np.prod(shape)).reshape(shape)
+
+        seen = _box(_box(seen, 0, RUNS_WINDOW), 1, BALLS_WINDOW)
+        won = _box(_box(won, 0, RUNS_WINDOW), 1, BALLS_WINDOW)
+
+        r, b, w = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), np.arange(shape[2]), indexing='ij')
+        rate = np.digitize(r * 6 / np.maximum(b, 1), RATE_BINS) * shape[2] + w
+        bins = (len(RATE_BINS) + 1, shape[2])
+        rate_seen = np.bincount(rate.ravel(), seen.ravel(), minlength=np.prod(bins)).reshape(bins)
+        rate_won = np.bincount(rate.ravel(), won.ravel(), minlength=np.prod(bins)).reshape(bins)
+        overall = won.sum() / seen.sum() if seen.sum() else 0.5
+        prior = (rate_won + PRIOR_WEIGHT * overall) / (rate_seen + PRIOR_WEIGHT)
+        # Rates nobody has faced copy the nearest lower rate that was (or the lowest one, below it).
+        faced = rate_seen > 0
+        nearest = np.maximum.accumulate(np.where(faced, np.arange(bins[0])[:, None], 0), axis=0)
+        nearest = np.where(faced.cumsum(axis=0) == 0, faced.argmax(axis=0), nearest)
+        prior = np.take_along_axis(prior, nearest, axis=0)
+        prior[:, 0] = 0  # all out
+        prior = np.maximum.accumulate(np.minimum.accumulate(prior, axis=0), axis=1).ravel()[rate]
+
+        grid = (won + PRIOR_WEIGHT * prior) / (seen + PRIOR_WEIGHT)
+        # Decided states first, so the monotone passes below start from them.
+        grid[:, 0, :] = 0
+        grid[:, :, 0] = 0
+        grid[0] = 1
+        grid = np.minimum.accumulate(grid, axis=0)  # more runs needed never helps
+        grid = np.maximum.accumulate(grid, axis=1)  # nor do fewer balls left
+        grid = np.maximum.accumulate(grid, axis=2)  # nor fewer wickets in hand
+        self.grid = np.ascontiguousarray(grid, dtype='float32')
+
+    def __call__(self, runs_needed, balls_left, wickets_in_hand):
+        """Probabilities (0-1) for scalars or equal-length arrays of states."""
+        runs = np.clip(np.asarray(runs_needed, dtype='int64'), 0, MAX_RUNS)
+        balls = np.clip(np.asarray(balls_left, dtype='int64'), 0, MAX_BALLS)
+        wickets = np.clip(np.asarray(wickets_in_hand, dtype='int64'), 0, WICKETS)
+        return self.grid[runs, balls, wickets]
+